@@ -137,6 +137,12 @@ export const publicStats = {
 export const adminAnalytics = {
   getSummary: (refresh = false) => 
     api<AnalyticsSummary>(`/admin/analytics/summary${refresh ? '?refresh=1' : ''}`),
+
+  // per-event rows past the summary's first page, in the same start time order
+  getEvents: (page: number, page_size: number) =>
+    api<{ items: Event[]; meta: { page: number; page_size: number } }>(
+      `/admin/analytics/events?page=${page}&page_size=${page_size}`
+    ),
 };
 
 // Admin Bookings (for waitlist counts)
@@ -216,6 +222,8 @@ export interface AnalyticsSummary {
     utilization_pct: number;
   };
   events: Event[];
+  events_total: number;
+  events_truncated: boolean;
   top_events: Event[];
   timeseries_7d: {
     bookings: Array<{ date: string; count: number }>;
@@ -22,7 +22,7 @@ import {
   Legend,
   ResponsiveContainer,
 } from 'recharts';
-import { adminAnalytics, AnalyticsSummary, ApiError } from '@/lib/api';
+import { adminAnalytics, AnalyticsSummary, ApiError, Event } from '@/lib/api';
 import { useAuth } from '@/contexts/AuthContext';
 import { useToast } from '@/hooks/use-toast';
 import { format } from 'date-fns';
@@ -31,6 +31,10 @@ export default function Analytics() {
   const [analytics, setAnalytics] = useState<AnalyticsSummary | null>(null);
   const [isLoading, setIsLoading] = useState(true);
   const [isRefreshing, setIsRefreshing] = useState(false);
+  // rows past the summary's first page, fetched on demand
+  const [moreEvents, setMoreEvents] = useState<Event[]>([]);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+  const [eventsExhausted, setEventsExhausted] = useState(false);
 
   const { isAdmin } = useAuth();
   const { toast } = useToast();
@@ -51,6 +55,8 @@ export default function Analytics() {
       
       const data = await adminAnalytics.getSummary(refresh);
       setAnalytics(data);
+      setMoreEvents([]);
+      setEventsExhausted(false);
     } catch (error) {
       if (error instanceof ApiError) {
         toast({
@@ -69,6 +75,29 @@ export default function Analytics() {
     fetchAnalytics(true);
   };
 
+  const loadMoreEvents = async () => {
+    if (!analytics) return;
+    // the summary holds page 1; page through the rest at the same page size
+    const pageSize = analytics.events.length;
+    const page = 2 + Math.floor(moreEvents.length / pageSize);
+    try {
+      setIsLoadingMore(true);
+      const { items } = await adminAnalytics.getEvents(page, pageSize);
+      setMoreEvents(prev => [...prev, ...items]);
+      setEventsExhausted(items.length < pageSize);
+    } catch (error) {
+      if (error instanceof ApiError) {
+        toast({
+          title: "Error loading events",
+          description: error.message,
+          variant: "destructive",
+        });
+      }
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   const formatDateTime = (dateTime: string) => {
     return format(new Date(dateTime), 'MMM d, yyyy • h:mm a');
   };
@@ -99,6 +128,9 @@ export default function Analytics() {
     };
   }) || [];
 
+  const allEvents = analytics ? [...analytics.events, ...moreEvents] : [];
+  const hasMoreEvents = !!analytics?.events_truncated && !eventsExhausted && allEvents.length < analytics.events_total;
+
   if (!isAdmin) {
     return (
       <div className="container mx-auto px-4 py-8">
@@ -355,48 +387,62 @@ export default function Analytics() {
           <Card>
             <CardHeader>
               <CardTitle>All Events Overview</CardTitle>
+              {analytics.events_truncated && (
+                <p className="text-sm text-muted-foreground">
+                  Showing {allEvents.length} of {analytics.events_total} events
+                </p>
+              )}
             </CardHeader>
             <CardContent>
-              {analytics.events.length > 0 ? (
-                <Table>
-                  <TableHeader>
-                    <TableRow>
-                      <TableHead>Event</TableHead>
-                      <TableHead>Start Date</TableHead>
-                      <TableHead>Capacity</TableHead>
-                      <TableHead>Booked</TableHead>
-                      <TableHead>Utilization</TableHead>
-                      <TableHead>Status</TableHead>
-                    </TableRow>
-                  </TableHeader>
-                  <TableBody>
-                    {analytics.events.map((event) => (
-                      <TableRow key={event.id}>
-                        <TableCell>
-                          <div>
-                            <div className="font-medium">{event.name}</div>
-                            <div className="text-sm text-muted-foreground">{event.venue}</div>
-                          </div>
-                        </TableCell>
-                        <TableCell>
-                          {formatDateTime(event.start_time)}
-                        </TableCell>
-                        <TableCell>{event.capacity}</TableCell>
-                        <TableCell>{event.booked_count}</TableCell>
-                        <TableCell>
-                          <div className="flex items-center gap-1">
-                            <span className="text-sm font-medium">
-                              {event.utilization_pct?.toFixed(1)}%
-                            </span>
-                          </div>
-                        </TableCell>
-                        <TableCell>
-                          {getStatusBadge(event.status)}
-                        </TableCell>
+              {allEvents.length > 0 ? (
+                <>
+                  <Table>
+                    <TableHeader>
+                      <TableRow>
+                        <TableHead>Event</TableHead>
+                        <TableHead>Start Date</TableHead>
+                        <TableHead>Capacity</TableHead>
+                        <TableHead>Booked</TableHead>
+                        <TableHead>Utilization</TableHead>
+                        <TableHead>Status</TableHead>
                       </TableRow>
-                    ))}
-                  </TableBody>
-                </Table>
+                    </TableHeader>
+                    <TableBody>
+                      {allEvents.map((event) => (
+                        <TableRow key={event.id}>
+                          <TableCell>
+                            <div>
+                              <div className="font-medium">{event.name}</div>
+                              <div className="text-sm text-muted-foreground">{event.venue}</div>
+                            </div>
+                          </TableCell>
+                          <TableCell>
+                            {formatDateTime(event.start_time)}
+                          </TableCell>
+                          <TableCell>{event.capacity}</TableCell>
+                          <TableCell>{event.booked_count}</TableCell>
+                          <TableCell>
+                            <div className="flex items-center gap-1">
+                              <span className="text-sm font-medium">
+                                {event.utilization_pct?.toFixed(1)}%
+                              </span>
+                            </div>
+                          </TableCell>
+                          <TableCell>
+                            {getStatusBadge(event.status)}
+                          </TableCell>
+                        </TableRow>
+                      ))}
+                    </TableBody>
+                  </Table>
+                  {hasMoreEvents && (
+                    <div className="flex justify-center pt-4">
+                      <Button onClick={loadMoreEvents} disabled={isLoadingMore} variant="outline">
+                        {isLoadingMore ? 'Loading...' : 'Load more events'}
+                      </Button>
+                    </div>
+                  )}
+                </>
               ) : (
                 <div className="text-center py-8 text-muted-foreground">
                   No events found
@@ -1,15 +1,82 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
+from sqlalchemy.orm import Session
 
+from app.core import cache
 from app.core.config import settings
+from app.db import get_db
+from app.models.user import User
 
 security = HTTPBearer()
 
-def get_current_subject(creds: HTTPAuthorizationCredentials = Depends(security)) -> str:
-    token = creds.credentials
+def _decode(creds: HTTPAuthorizationCredentials) -> dict:
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=["HS256"])
-        return payload.get("sub")
+        return jwt.decode(creds.credentials, settings.JWT_SECRET, algorithms=["HS256"])
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    role: str
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == "admin"
+
+
+# Own tier, not the shared response cache: an on-sale's thousands of users
+# would otherwise evict (and be evicted by) cached event bodies
+_principals = cache.LocalTier(settings.PRINCIPAL_CACHE_MAX_ENTRIES)
+
+def _principal_key(user_id: int) -> str:
+    return f"principal:{user_id}"
+
+def _load(db: Session, user_id: int) -> Optional[Tuple[int, str]]:
+    """(token_version, role), from this worker's cache or the users table."""
+    hit = _principals.get(_principal_key(user_id))
+    if hit is not None:
+        return hit
+    row = db.query(User.token_version, User.role).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    _principals.set(_principal_key(user_id), (row[0], row[1]), settings.PRINCIPAL_CACHE_SECONDS)
+    return row[0], row[1]
+
+def invalidate_principal(user_id: int) -> None:
+    """Drop a user's cached (token_version, role) in every worker; call after committing a change."""
+    cache.invalidate(_principal_key(user_id))
+
+def get_current_principal(
+    creds: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+) -> Principal:
+    """
+    The caller's id and role from the JWT. Tokens from create_access_token(role=...)
+    carry role + token_version; the version is checked against a per-worker cache
+    (PRINCIPAL_CACHE_SECONDS), so the users table is read at most once per user
+    per TTL. Older tokens without the claims take their role from the same lookup.
+    """
+    payload = _decode(creds)
+    try:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    current = _load(db, user_id)
+    if current is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unknown user")
+    version, role = current
+    if "token_version" in payload:
+        if payload["token_version"] != version:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+        role = payload.get("role", role)
+    return Principal(id=user_id, role=role)
+
+def require_admin(principal: Principal = Depends(get_current_principal)) -> Principal:
+    if not principal.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
+    return principal
@@ -1,6 +1,6 @@
 # app/api/router.py
 from fastapi import APIRouter
-from .routes import auth, events, admin, bookings, analytics, auth_me, admin_users
+from .routes import auth, events, admin, bookings, analytics, auth_me, admin_users, queue, holds
 
 api_router = APIRouter()
 
@@ -16,6 +16,12 @@ api_router.include_router(events.router, prefix="/events", tags=["events"])
 #   /events/{id}/book, /bookings/{id}, /me/bookings
 api_router.include_router(bookings.router, tags=["bookings"])
 
+# seat holds: /events/{id}/holds, /holds/{token}
+api_router.include_router(holds.router, tags=["holds"])
+
+# waiting room: /events/{id}/queue, /events/{id}/queue/{token}
+api_router.include_router(queue.router, tags=["queue"])
+
 # /admin/*
 api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
 
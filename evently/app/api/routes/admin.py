@@ -1,37 +1,32 @@
 # app/api/routes/admin.py
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Request
+from sqlalchemy import delete, func
 from sqlalchemy.orm import Session
 
-from app.services.booking_service import _try_promote_waitlist  # <--- ADD
+from app.services.booking_service import SEATMAP_PER_ROW, _seat_free, _utcnow, _with_lock, seatmap_task
+from app.services import inventory_gate, outbox, seat_feed, seat_index, seat_layout, waiting_room
 
 from app.db import get_db
-from app.models.user import User
 from app.models.event import Event
 from app.models.booking import Booking
 from app.schemas.event import EventCreate, EventOut, EventUpdate
-from app.api.deps import get_current_subject
-from app.core.cache import safe_delete
+from app.schemas.queue import QueueOpen
+from app.api.deps import Principal, require_admin
 from app.core.limiter import limiter
 from app.models.seat import Seat
 
 
 router = APIRouter()
 
-def require_admin(user_id: str, db: Session):
-    u = db.query(User).filter(User.id == int(user_id)).first()
-    if not u or u.role != "admin":
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
-    return u
-
 @router.post("/events", response_model=EventOut)
 @limiter.limit("20/minute")
 def create_event(
     payload: EventCreate,
     request: Request,
-    subject: str = Depends(get_current_subject),
+    background_tasks: BackgroundTasks,
+    admin: Principal = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
-    require_admin(subject, db)
     e = Event(
         name=payload.name,
         venue=payload.venue,
@@ -40,12 +35,16 @@ def create_event(
         capacity=payload.capacity,
         booked_count=0,
         status="active",
-        created_by=int(subject),
+        created_by=admin.id,
     )
     db.add(e)
+    db.flush()
+    outbox.before_commit(db, e.id, catalog=True)
     db.commit()
     db.refresh(e)
-    safe_delete("analytics:summary")
+    outbox.after_commit(db, e.id, catalog=True)
+    # lay out the seat map after responding; bookings meanwhile use the capacity flow
+    background_tasks.add_task(seatmap_task, db.get_bind(), e.id)
     return e
 
 @router.patch("/events/{event_id}", response_model=EventOut)
@@ -54,10 +53,10 @@ def update_event(
     event_id: int,
     payload: EventUpdate,
     request: Request,
-    subject: str = Depends(get_current_subject),
+    background_tasks: BackgroundTasks,
+    admin: Principal = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
-    require_admin(subject, db)
     e = db.query(Event).filter(Event.id == event_id).first()
     if not e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
@@ -85,15 +84,20 @@ def update_event(
             raise HTTPException(status_code=400, detail="Invalid status")
         e.status = payload.status
 
+    outbox.before_commit(db, e.id, promote=True, catalog=True)
     db.commit()
     db.refresh(e)
 
-    # ⬇️ NEW: sync seats to capacity when capacity was patched
+    # sync seats to capacity when capacity was patched (a map not laid out yet is
+    # built from the new capacity)
     if capacity_changed:
-        _sync_seats_to_capacity(db, e)
+        if e.seatmap_ready:
+            _sync_seats_to_capacity(db, e)
+        else:
+            background_tasks.add_task(seatmap_task, db.get_bind(), e.id)
 
-    safe_delete("analytics:summary")
-    _try_promote_waitlist(db, e.id)
+    inventory_gate.invalidate(e.id)
+    outbox.after_commit(db, e.id, promote=True, catalog=True)
     return e
 
 
@@ -102,29 +106,56 @@ def update_event(
 def deactivate_event(
     event_id: int,
     request: Request,
-    subject: str = Depends(get_current_subject),
+    admin: Principal = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
-    require_admin(subject, db)
     e = db.query(Event).filter(Event.id == event_id).first()
     if not e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
     if e.status != "inactive":
         e.status = "inactive"
+        outbox.before_commit(db, e.id, catalog=True)
         db.commit()
         db.refresh(e)
-        safe_delete("analytics:summary")
+        inventory_gate.invalidate(e.id)
+        outbox.after_commit(db, e.id, catalog=True)
     return e
 
+@router.post("/events/{event_id}/queue")
+@limiter.limit("30/minute")
+def open_waiting_room(
+    event_id: int,
+    payload: QueueOpen,
+    request: Request,
+    admin: Principal = Depends(require_admin),
+    db: Session = Depends(get_db),
+):
+    if not db.query(Event.id).filter(Event.id == event_id).first():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+    if not waiting_room.open_room(event_id, payload.admit_per_second, payload.admit_ttl_seconds):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Redis unavailable")
+    return {"event_id": event_id, "admit_per_second": payload.admit_per_second,
+            "admit_ttl_seconds": payload.admit_ttl_seconds}
+
+@router.delete("/events/{event_id}/queue", status_code=204)
+@limiter.limit("30/minute")
+def close_waiting_room(
+    event_id: int,
+    request: Request,
+    admin: Principal = Depends(require_admin),
+    db: Session = Depends(get_db),
+):
+    waiting_room.close_room(event_id)
+    return
+
 @router.delete("/events/{event_id}", status_code=204)
 @limiter.limit("10/minute")
 def delete_event(
     event_id: int,
     request: Request,
-    subject: str = Depends(get_current_subject),
+    admin: Principal = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
-    require_admin(subject, db)
     e = db.query(Event).filter(Event.id == event_id).first()
     if not e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
@@ -138,8 +169,10 @@ def delete_event(
         )
 
     db.delete(e)
+    outbox.before_commit(db, event_id, catalog=True)
     db.commit()
-    safe_delete("analytics:summary")
+    inventory_gate.invalidate(event_id)
+    outbox.after_commit(db, event_id, catalog=True)
     return
 
 
@@ -147,8 +180,8 @@ from pydantic import BaseModel, Field
 from app.models.seat import Seat
 
 class SeatGridIn(BaseModel):
-    rows: int = Field(..., ge=1, le=26)   # A..Z
-    cols: int = Field(..., ge=1, le=200)  # 1..200
+    rows: int = Field(..., ge=1, le=2000)  # A..Z, AA.., AAA..
+    cols: int = Field(..., ge=1, le=200)   # 1..200
 
 @router.post("/events/{event_id}/seats/generate")
 @limiter.limit("10/minute")
@@ -156,93 +189,70 @@ def generate_seats(
     event_id: int,
     payload: SeatGridIn,
     request: Request,
-    subject: str = Depends(get_current_subject),
+    admin: Principal = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
-    require_admin(subject, db)
-    e = db.query(Event).filter(Event.id == event_id).first()
+    e = _with_lock(db.query(Event).filter(Event.id == event_id), db).first()
     if not e:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    # don't regenerate if exists
-    if db.query(Seat.id).filter(Seat.event_id == event_id).first():
-        raise HTTPException(status_code=409, detail="Seats already exist for this event")
+    if not e.seatmap_ready and (e.booked_count or 0) > 0:
+        raise HTTPException(status_code=409, detail="Event has bookings waiting for its seat map; retry shortly")
+
+    # An untouched map (laid out from capacity, nothing booked or held) is replaced;
+    # one in use is not
+    existing = db.query(func.count(Seat.id)).filter(Seat.event_id == event_id).scalar()
+    if existing:
+        freed = db.execute(
+            delete(Seat).where(Seat.event_id == event_id, _seat_free(_utcnow()))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if freed != existing:
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Seats already exist for this event")
 
-    seats = []
-    for i in range(payload.rows):
-        row_label = chr(ord("A") + i)
-        for c in range(1, payload.cols + 1):
-            seats.append(Seat(event_id=event_id, row_label=row_label, col_number=c, label=f"{row_label}-{c}"))
-    db.bulk_save_objects(seats)
+    version = seat_index.bump_version(db, event_id, layout=True)
+    created = seat_layout.generate(db, event_id, 0, payload.rows * payload.cols, payload.cols, "-", version)
 
     # sync capacity with seats count
     e.capacity = payload.rows * payload.cols
+    e.seatmap_ready = True
+    outbox.before_commit(db, event_id, catalog=True)
     db.commit()
-    safe_delete("analytics:summary")
-    return {"created": len(seats), "capacity": e.capacity}
-
-def _label_for_index(idx: int) -> tuple[str, int, str]:
-    """
-    1-indexed idx → (row_label, col_number, label).
-    Uses 50 seats per row: A-1..A-50, B-1..B-50, ...
-    """
-    if idx <= 0:
-        raise ValueError("idx must be >= 1")
-    row_idx = (idx - 1) // 50          # 0-based row
-    col = (idx - 1) % 50 + 1           # 1..50
-    if row_idx > 25:                   # A..Z only
-        # fall back to extra 'Z' rows if capacity > 26*50; still deterministic
-        row_idx = 25
-    row_label = chr(ord("A") + row_idx)
-    return row_label, col, f"{row_label}-{col}"
+    inventory_gate.invalidate(event_id)
+    outbox.after_commit(db, event_id, catalog=True)
+    seat_feed.layout_changed(event_id)
+    return {"created": created, "capacity": e.capacity}
 
 def _sync_seats_to_capacity(db: Session, e: Event) -> None:
     """
-    Ensure seats table count matches e.capacity:
-      - If none exist: create exactly capacity seats.
-      - If fewer exist: append more seats with deterministic labels.
-      - If more exist: delete unreserved seats from the 'end' until it matches.
-        If not enough unreserved seats, 409.
+    Ensure seats table count matches e.capacity, set-based (app/services/seat_layout.py):
+      - If fewer exist (or none): append seats continuing the map's own layout
+        (seats per row and label style, see seat_layout.shape).
+      - If more exist: delete free seats from the 'end' until it matches.
+        If not enough free seats, 409.
     """
-    current = db.query(Seat).filter(Seat.event_id == e.id).count()
+    current = db.query(func.count(Seat.id)).filter(Seat.event_id == e.id).scalar()
     target = e.capacity or 0
     if current == target:
         return
 
-    if current == 0 and target > 0:
-        # Create 1..target seats
-        seats = []
-        for i in range(1, target + 1):
-            row_label, col, label = _label_for_index(i)
-            seats.append(Seat(event_id=e.id, row_label=row_label, col_number=col, label=label))
-        db.bulk_save_objects(seats)
-        db.commit()
-        return
-
     if current < target:
-        # Append (target - current) seats
-        seats = []
-        for i in range(current + 1, target + 1):
-            row_label, col, label = _label_for_index(i)
-            seats.append(Seat(event_id=e.id, row_label=row_label, col_number=col, label=label))
-        db.bulk_save_objects(seats)
+        version = seat_index.bump_version(db, e.id, layout=True)
+        per_row, sep = seat_layout.shape(db, e.id, (SEATMAP_PER_ROW, ""))
+        seat_layout.grow(db, e.id, current, target, per_row, sep, version)
+        outbox.before_commit(db, e.id, promote=True)  # the worker may have promoted before the new seats existed
         db.commit()
+        seat_feed.layout_changed(e.id)
         return
 
-    # current > target → try to delete extra unreserved seats from the tail
-    extra = current - target
-    tail = (
-        db.query(Seat)
-        .filter(Seat.event_id == e.id, Seat.reserved == False)
-        .order_by(Seat.row_label.desc(), Seat.col_number.desc(), Seat.id.desc())
-        .limit(extra)
-        .all()
-    )
-    if len(tail) < extra:
+    # current > target → try to delete extra free seats from the tail
+    if not seat_layout.shrink(db, e.id, current - target, _utcnow()):
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Not enough free seats to shrink to new capacity; cancel some bookings first",
         )
-    for s in tail:
-        db.delete(s)
+    seat_index.bump_version(db, e.id, layout=True)  # after the DELETE: seat rows are locked before seat_versions
     db.commit()
+    seat_feed.layout_changed(e.id)
@@ -1,67 +1,69 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
 
 from app.db import get_db
-from app.api.deps import get_current_subject
+from app.api.deps import Principal, invalidate_principal, require_admin
 from app.models.user import User
 from app.schemas.user import UserOut
 from app.schemas.admin_user import AdminCreateUser, AdminUpdateUserRole
-from app.core.security import hash_password
+from app.core import hashing
 
 router = APIRouter(prefix="/admin/users", tags=["admin"])
 
-def require_admin(subject: str, db: Session) -> User:
-    u = db.query(User).filter(User.id == int(subject)).first()
-    if not u or u.role != "admin":
-        raise HTTPException(status_code=403, detail="Admin only")
-    return u
-
 @router.get("", response_model=list[UserOut])
 def list_users(
-    subject: str = Depends(get_current_subject),
+    admin: Principal = Depends(require_admin),
     db: Session = Depends(get_db),
     role: Optional[str] = Query(None, pattern="^(user|admin)$"),
 ):
-    require_admin(subject, db)
     qs = db.query(User)
     if role:
         qs = qs.filter(User.role == role)
     return qs.order_by(User.id.asc()).all()
 
+def _email_taken(db: Session, email: str) -> bool:
+    return db.query(User.id).filter(User.email == email).first() is not None
+
+def _add_user(db: Session, u: User) -> User:
+    db.add(u)
+    db.commit()
+    db.refresh(u)
+    return u
+
+# async like /auth/signup: bcrypt runs in the hashing pool (503 when it is full),
+# the DB steps go through the threadpool.
 @router.post("", response_model=UserOut, status_code=201)
-def create_user_as_admin(
+async def create_user_as_admin(
     payload: AdminCreateUser,
-    subject: str = Depends(get_current_subject),
+    admin: Principal = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
-    require_admin(subject, db)
-    exists = db.query(User).filter(User.email == payload.email).first()
-    if exists:
+    if await run_in_threadpool(_email_taken, db, payload.email):
         raise HTTPException(status_code=400, detail="Email already registered")
     u = User(
         name=payload.name,
         email=payload.email,
-        password_hash=hash_password(payload.password),
+        password_hash=await hashing.hash_password(payload.password),
         role=payload.role,
     )
-    db.add(u)
-    db.commit()
-    db.refresh(u)
-    return u
+    return await run_in_threadpool(_add_user, db, u)
 
 @router.patch("/{user_id}/role", response_model=UserOut)
 def update_user_role(
     user_id: int,
     payload: AdminUpdateUserRole,
-    subject: str = Depends(get_current_subject),
+    admin: Principal = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
-    require_admin(subject, db)
     u = db.query(User).filter(User.id == user_id).first()
     if not u:
         raise HTTPException(status_code=404, detail="User not found")
-    u.role = payload.role
+    if u.role != payload.role:
+        u.role = payload.role
+        u.token_version = (u.token_version or 0) + 1  # tokens carrying the old role stop working
     db.commit()
     db.refresh(u)
+    invalidate_principal(u.id)
     return u
@@ -1,35 +1,39 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
 
 from app.db import get_db
-from app.api.deps import get_current_subject
-from app.models.user import User
+from app.api.deps import Principal, require_admin
 from app.core import cache
-from app.services.analytics_service import build_summary
+from app.core.config import settings
+from app.services.analytics_service import EVENT_ROWS, build_summary, event_rows
 
 router = APIRouter(prefix="/admin/analytics", tags=["admin", "analytics"])
 
-def _get_admin(db: Session, subject: str) -> User:
-    u = db.query(User).filter(User.id == int(subject)).first()
-    if not u:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unknown user")
-    if u.role != "admin":
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin required")
-    return u
-
 @router.get("/summary")
 def analytics_summary(
     refresh: bool = Query(default=False, description="Force bypass cache"),
-    subject: str = Depends(get_current_subject),
+    admin: Principal = Depends(require_admin),
+    db: Session = Depends(get_db),
+):
+    body = cache.get_bytes(
+        "analytics:summary",
+        lambda: build_summary(db),
+        soft_ttl=settings.ANALYTICS_CACHE_SOFT_SECONDS,
+        hard_ttl=settings.ANALYTICS_CACHE_HARD_SECONDS,
+        force=refresh,
+    )
+    return Response(content=body, media_type="application/json")
+
+@router.get("/events")
+def analytics_events(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(EVENT_ROWS, ge=1, le=EVENT_ROWS),
+    admin: Principal = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
-    _get_admin(db, subject)
-    key = "analytics:summary"
-    if not refresh:
-        cached = cache.get_json(key)
-        if cached is not None:
-            return cached
-    data = build_summary(db)
-    cache.set_json(key, data, ttl_seconds=60)  # adjust TTL as needed
-    return data
+    """The summary's per-event rows (start time order) past its first EVENT_ROWS, uncached."""
+    return {
+        "items": event_rows(db, (page - 1) * page_size, page_size),
+        "meta": {"page": page, "page_size": page_size},
+    }
@@ -1,40 +1,59 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.db import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, UserOut
 from app.schemas.auth import Token
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core import hashing
+from app.core.security import create_access_token
 from app.core.limiter import limiter  # rate limiting
 
 router = APIRouter()
 
+def _find_user(db: Session, email: str) -> Optional[User]:
+    return db.query(User).filter(User.email == email).first()
+
+def _add_user(db: Session, u: User) -> User:
+    db.add(u)
+    db.commit()
+    db.refresh(u)
+    return u
+
+def _store_rehash(db: Session, u: User, new_hash: str) -> None:
+    u.password_hash = new_hash
+    db.commit()
+
+# async so bcrypt (app/core/hashing.py) runs in the hashing pool while the request
+# holds no threadpool slot; the DB steps still go through the threadpool.
 @router.post("/signup", response_model=UserOut)
 # Optional: @limiter.limit("30/minute")  # if you enable, add "request: Request" to the signature
-def signup(payload: UserCreate, db: Session = Depends(get_db)):
-    exists = db.query(User).filter(User.email == payload.email).first()
-    if exists:
+async def signup(payload: UserCreate, db: Session = Depends(get_db)):
+    if await run_in_threadpool(_find_user, db, payload.email):
         raise HTTPException(status_code=400, detail="Email already registered")
     u = User(
         name=payload.name,
         email=payload.email,
-        password_hash=hash_password(payload.password),
+        password_hash=await hashing.hash_password(payload.password),
         role="user",
     )
-    db.add(u)
-    db.commit()
-    db.refresh(u)
-    return u
+    return await run_in_threadpool(_add_user, db, u)
 
 @router.post("/login", response_model=Token)
 @limiter.limit("5/minute")
-def login(payload: UserLogin, request: Request, db: Session = Depends(get_db)):
-    u = db.query(User).filter(User.email == payload.email).first()
-    if not u or not verify_password(payload.password, u.password_hash):
+async def login(payload: UserLogin, request: Request, db: Session = Depends(get_db)):
+    u = await run_in_threadpool(_find_user, db, payload.email)
+    ok, new_hash = await hashing.verify_password(payload.password, u.password_hash) if u else (False, None)
+    if not ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
         )
-    token = create_access_token(str(u.id))
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this hash was made
+        await run_in_threadpool(_store_rehash, db, u, new_hash)
+    token = create_access_token(str(u.id), role=u.role, token_version=u.token_version)
     return Token(access_token=token)
@@ -2,15 +2,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.db import get_db
-from app.api.deps import get_current_subject
+from app.api.deps import Principal, get_current_principal
 from app.models.user import User
 from app.schemas.user import UserOut
 
 router = APIRouter()
 
 @router.get("/me", response_model=UserOut)
-def me(subject: str = Depends(get_current_subject), db: Session = Depends(get_db)):
-    u = db.query(User).filter(User.id == int(subject)).first()
+def me(principal: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
+    u = db.query(User).filter(User.id == principal.id).first()
     if not u:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unknown user")
     return u
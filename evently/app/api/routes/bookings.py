@@ -1,64 +1,101 @@
 # app/api/routes/bookings.py
 from typing import Optional
-from fastapi import APIRouter, Depends, Header, HTTPException, status, Request
+from fastapi import APIRouter, Depends, Header, Request
 from sqlalchemy.orm import Session
 
-from app.db import get_db
-from app.api.deps import get_current_subject
-from app.models.user import User
+from app.db import get_db, get_async_db
+from app.api.deps import Principal, get_current_principal
+from app.core.config import settings
 from app.models.booking import Booking
 from app.schemas.booking import BookingCreate, BookingOut
 from app.services.booking_service import create_booking, cancel_booking
+from app.services import waiting_room
 from app.core.limiter import limiter  # rate limiting
 
 # ✅ define router BEFORE using it in decorators
 router = APIRouter()
 
-def _get_user(db: Session, subject: str) -> User:
-    u = db.query(User).filter(User.id == int(subject)).first()
-    if not u:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unknown user")
-    return u
+def _book(db: Session, principal: Principal, event_id: int, payload: BookingCreate,
+          idempotency_key: Optional[str], queue_token: Optional[str] = None) -> BookingOut:
+    owner = str(principal.id)
+    admitted_until = waiting_room.claim(event_id, queue_token, owner)
+    try:
+        bk = create_booking(
+            db,
+            user_id=principal.id,
+            event_id=event_id,
+            qty=payload.qty,
+            idempotency_key=idempotency_key,
+            allow_waitlist=payload.waitlist,  # supports waitlist
+            seat_ids=payload.seat_ids,
+            hold_token=payload.hold_token,
+            prefer_contiguous=payload.prefer_contiguous,
+        )
+    except Exception:
+        if admitted_until is not None:  # the admission was not used: give it back
+            waiting_room.unclaim(event_id, queue_token, owner, admitted_until)
+        raise
+    return BookingOut.model_validate(bk)
 
-@router.post("/events/{event_id}/book", response_model=BookingOut)
-@limiter.limit("10/minute")  # SlowAPI requires the request arg in the function
-def book_event(
-    event_id: int,
-    payload: BookingCreate,
-    request: Request,
-    subject: str = Depends(get_current_subject),
-    db: Session = Depends(get_db),
-    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
-):
-    u = _get_user(db, subject)
-    bk = create_booking(
-        db,
-        user_id=u.id,
-        event_id=event_id,
-        qty=payload.qty,
-        idempotency_key=idempotency_key,
-        allow_waitlist=payload.waitlist,  # supports waitlist
-        seat_ids=payload.seat_ids,  
-    )
-    return bk
+def _cancel(db: Session, principal: Principal, booking_id: int) -> BookingOut:
+    bk = cancel_booking(db, booking_id=booking_id, user_id=principal.id, is_admin=principal.is_admin)
+    return BookingOut.model_validate(bk)
+
+if settings.DB_ASYNC:
+    # Async path: handlers run on the event loop and drive the same service code
+    # through AsyncSession.run_sync, so concurrency is bounded by the DB pool
+    # rather than Starlette's threadpool. Redis calls made by that code wait in a
+    # worker thread, not on the loop (see cache._off_loop).
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    @router.post("/events/{event_id}/book", response_model=BookingOut)
+    @limiter.limit("10/minute")
+    async def book_event(
+        event_id: int,
+        payload: BookingCreate,
+        request: Request,
+        principal: Principal = Depends(get_current_principal),
+        db: AsyncSession = Depends(get_async_db),
+        idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+        queue_token: Optional[str] = Header(default=None, alias="X-Queue-Token"),
+    ):
+        return await db.run_sync(_book, principal, event_id, payload, idempotency_key, queue_token)
+
+    @router.delete("/bookings/{booking_id}", response_model=BookingOut)
+    async def cancel(
+        booking_id: int,
+        principal: Principal = Depends(get_current_principal),
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        return await db.run_sync(_cancel, principal, booking_id)
+
+else:
+    @router.post("/events/{event_id}/book", response_model=BookingOut)
+    @limiter.limit("10/minute")  # SlowAPI requires the request arg in the function
+    def book_event(
+        event_id: int,
+        payload: BookingCreate,
+        request: Request,
+        principal: Principal = Depends(get_current_principal),
+        db: Session = Depends(get_db),
+        idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+        queue_token: Optional[str] = Header(default=None, alias="X-Queue-Token"),
+    ):
+        return _book(db, principal, event_id, payload, idempotency_key, queue_token)
 
-@router.delete("/bookings/{booking_id}", response_model=BookingOut)
-def cancel(
-    booking_id: int,
-    subject: str = Depends(get_current_subject),
-    db: Session = Depends(get_db),
-):
-    u = _get_user(db, subject)
-    is_admin = (u.role == "admin")
-    bk = cancel_booking(db, booking_id=booking_id, user_id=u.id, is_admin=is_admin)
-    return bk
+    @router.delete("/bookings/{booking_id}", response_model=BookingOut)
+    def cancel(
+        booking_id: int,
+        principal: Principal = Depends(get_current_principal),
+        db: Session = Depends(get_db),
+    ):
+        return _cancel(db, principal, booking_id)
 
 @router.get("/me/bookings", response_model=list[BookingOut])
-def my_bookings(subject: str = Depends(get_current_subject), db: Session = Depends(get_db)):
-    u = _get_user(db, subject)
+def my_bookings(principal: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
     rows = (
         db.query(Booking)
-        .filter(Booking.user_id == u.id)
+        .filter(Booking.user_id == principal.id)
         .order_by(Booking.created_at.desc())
         .all()
     )
@@ -1,42 +1,104 @@
 # app/api/routes/events.py
 from __future__ import annotations
+import base64
+import hashlib
+import json
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Tuple
 
-from fastapi import APIRouter, Depends, Query, HTTPException, status
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import Float, func, literal_column, tuple_
 from sqlalchemy.orm import Session
 
-from app.db import get_db
+from app.db import get_db, get_async_db
+from app.core import cache
+from app.core.config import settings
 from app.models.event import Event
-from app.models.booking import Booking            # <-- NEW (for waitlist counts)
 from app.models.seat import Seat
-from app.schemas.event import EventOut, EventListResponse
+from app.schemas.event import EventOut, EventListResponse, EventSuggestion
 from app.schemas.seat import SeatOut
+from app.services import event_cache, event_search, seat_feed, seat_index, seat_layout
+from app.services.booking_service import _utcnow
 
 router = APIRouter()
 
-@router.get("", response_model=EventListResponse, name="list_events")  # final path: /events
-def list_events(
-    db: Session = Depends(get_db),
-    page: int = Query(1, ge=1),
-    page_size: int = Query(10, ge=1, le=100),
-    q: Optional[str] = Query(None, description="search in name/venue"),
-    venue: Optional[str] = None,
-    status: Optional[str] = Query(None, pattern="^(active|inactive)$"),
-    date_from: Optional[datetime] = None,
-    date_to: Optional[datetime] = None,
-    sort: str = Query("start_time", pattern="^(name|start_time|utilization)$"),
-    order: str = Query("asc", pattern="^(asc|desc)$"),
-):
+def _utilization():
+    # Spelled exactly like the ix_events_utilization_id expression so the planner can use it;
+    # float8 so the value round-trips exactly through a cursor.
+    return literal_column("(CAST(events.booked_count AS FLOAT) / NULLIF(events.capacity, 0))", Float)
+
+
+def _encode_cursor(sort: str, order: str, value, event_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps({"s": sort, "o": order, "v": value, "id": event_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str, order: str):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if data["s"] != sort or data["o"] != order:
+            raise ValueError("cursor belongs to a different sort")
+        value = datetime.fromisoformat(data["v"]) if sort == "start_time" else data["v"]
+        return value, int(data["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _count_events(db: Session, qs, filters: dict, mode: str) -> Tuple[Optional[int], bool]:
+    """
+    (total, estimated). "exact" is a COUNT(*) cached in Redis per filter set for
+    EVENT_COUNT_CACHE_SECONDS; "estimate" is the planner's row estimate on
+    Postgres (falls back to the cached exact count elsewhere); "none" skips it.
+    """
+    if mode == "none":
+        return None, False
+    if mode == "estimate" and db.bind.dialect.name == "postgresql":
+        compiled = qs.with_entities(Event.id).statement.compile(dialect=db.bind.dialect)
+        plan = db.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"]), True
+
+    key = "events:count:" + hashlib.sha1(
+        json.dumps(filters, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    total = cache.get_json(key)
+    if total is None:
+        total = qs.count()
+        cache.set_json(key, total, ttl_seconds=settings.EVENT_COUNT_CACHE_SECONDS)
+    return total, False
+
+
+def _list_events(
+    db: Session,
+    page: int,
+    page_size: int,
+    q: Optional[str],
+    venue: Optional[str],
+    status: Optional[str],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    sort: str,
+    order: str,
+    cursor: Optional[str] = None,
+    count: Optional[str] = None,
+) -> dict:
+    """
+    Two paging modes over the same filters/sort:
+      - page/page_size (OFFSET; kept for existing clients), exact total by default
+      - cursor: keyset on (sort key, id), so deep pages cost the same as page 1;
+        no total unless asked for. Both return next_cursor when more rows follow.
+    """
     qs = db.query(Event)
 
     if q:
-        ilike = f"%{q.lower()}%"
-        qs = qs.filter(
-            func.lower(Event.name).like(ilike) |
-            func.lower(Event.venue).like(ilike)
-        )
+        qs = qs.filter(event_search.match(q))
     if venue:
         qs = qs.filter(Event.venue == venue)
     if status:
@@ -46,66 +108,196 @@ def list_events(
     if date_to:
         qs = qs.filter(Event.start_time <= date_to)
 
-    total = qs.count()
+    filters = {"q": q, "venue": venue, "status": status, "date_from": date_from, "date_to": date_to}
+    total, estimated = _count_events(db, qs, filters, count or ("none" if cursor else "exact"))
 
-    # sorting
-    if sort == "name":
-        crit = Event.name
+    # sorting (id breaks ties so the keyset order is total)
+    if sort == "relevance":
+        if not q:
+            raise HTTPException(status_code=400, detail="sort=relevance requires q")
+        key, order = event_search.rank(db, q), "desc"  # best match first
+    elif sort == "name":
+        key = Event.name
     elif sort == "utilization":
-        crit = (Event.booked_count * 1.0) / func.nullif(Event.capacity, 0)
+        key = _utilization()
     else:
-        crit = Event.start_time
+        key = Event.start_time
+    if cursor:
+        value, last_id = _decode_cursor(cursor, sort, order)
+        after = tuple_(key, Event.id) < tuple_(value, last_id) if order == "desc" \
+            else tuple_(key, Event.id) > tuple_(value, last_id)
+        qs = qs.filter(after)
     if order == "desc":
-        crit = crit.desc()
-
-    items = qs.order_by(crit).offset((page - 1) * page_size).limit(page_size).all()
-
-    # ---- NEW: attach waitlisted_count for each event (for admin UI) ----
-    event_ids = [e.id for e in items]
-    if event_ids:
-        rows = (
-            db.query(Booking.event_id, func.count().label("cnt"))
-              .filter(Booking.status == "WAITLISTED", Booking.event_id.in_(event_ids))
-              .group_by(Booking.event_id)
-              .all()
-        )
-        wl_map = {eid: cnt for (eid, cnt) in rows}
+        qs = qs.order_by(key.desc(), Event.id.desc())
     else:
-        wl_map = {}
+        qs = qs.order_by(key, Event.id)
+    if not cursor:
+        qs = qs.offset((page - 1) * page_size)
 
-    for e in items:
-        # dynamic attr used by EventOut.waitlisted_count
-        setattr(e, "waitlisted_count", wl_map.get(e.id, 0))
+    rows = qs.add_columns(key.label("sort_key")).limit(page_size + 1).all()
+    items = [e for e, _ in rows[:page_size]]
+    next_cursor = None
+    if len(rows) > page_size:
+        last, last_key = rows[page_size - 1]
+        next_cursor = _encode_cursor(sort, order, last_key, last.id)
 
     return {
         "items": items,
-        "meta": {"page": page, "page_size": page_size, "total": total},
+        "meta": {
+            "page": None if cursor else page,
+            "page_size": page_size,
+            "total": total,
+            "total_estimated": estimated,
+            "next_cursor": next_cursor,
+        },
     }
 
-@router.get("/{event_id}", response_model=EventOut)  # final path: /events/{event_id}
-def get_event(event_id: int, db: Session = Depends(get_db)):
+def _get_event(db: Session, event_id: int) -> Event:
     e = db.query(Event).filter(Event.id == event_id).first()
     if not e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+    return e
+
+# Declared before /{event_id} so "suggest" is never parsed as an id.
+@router.get("/suggest", response_model=list[EventSuggestion])
+def suggest_events(
+    q: str = Query(..., min_length=1, max_length=100, description="name prefix"),
+    limit: int = Query(8, ge=1, le=20),
+    db: Session = Depends(get_db),
+):
+    return event_search.suggest(db, q, limit)
 
-    # ---- NEW: single-event waitlist count ----
-    wl = (
-        db.query(func.count())
-          .select_from(Booking)
-          .filter(Booking.event_id == event_id, Booking.status == "WAITLISTED")
-          .scalar()
-        or 0
+def _list_response(request: Request, db: Session, params: dict) -> Response:
+    return event_cache.list_response(
+        request, params,
+        lambda: EventListResponse.model_validate(_list_events(db, **params), from_attributes=True)
+        .model_dump(mode="json"),
     )
-    setattr(e, "waitlisted_count", wl)
 
-    return e
+def _event_response(request: Request, db: Session, event_id: int) -> Response:
+    return event_cache.event_response(
+        request, event_id, lambda: EventOut.model_validate(_get_event(db, event_id)).model_dump(mode="json"),
+    )
+
+# Both handlers answer from the versioned cache (see app/services/event_cache.py):
+# a matching If-None-Match is a 304 without a DB round trip.
+if settings.DB_ASYNC:
+    # Same queries, driven through AsyncSession.run_sync (see app/db.py).
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    @router.get("", response_model=EventListResponse, name="list_events")  # final path: /events
+    async def list_events(
+        request: Request,
+        db: AsyncSession = Depends(get_async_db),
+        page: int = Query(1, ge=1),
+        page_size: int = Query(10, ge=1, le=100),
+        q: Optional[str] = Query(None, description="search in name/venue"),
+        venue: Optional[str] = None,
+        status: Optional[str] = Query(None, pattern="^(active|inactive)$"),
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        sort: str = Query("start_time", pattern="^(name|start_time|utilization|relevance)$"),
+        order: str = Query("asc", pattern="^(asc|desc)$"),
+        cursor: Optional[str] = Query(None, description="meta.next_cursor of the previous page"),
+        count: Optional[str] = Query(None, pattern="^(exact|estimate|none)$"),
+    ):
+        params = dict(page=page, page_size=page_size, q=q, venue=venue, status=status, date_from=date_from,
+                      date_to=date_to, sort=sort, order=order, cursor=cursor, count=count)
+        return await db.run_sync(lambda s: _list_response(request, s, params))
+
+    @router.get("/{event_id}", response_model=EventOut)  # final path: /events/{event_id}
+    async def get_event(event_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(lambda s: _event_response(request, s, event_id))
+
+else:
+    @router.get("", response_model=EventListResponse, name="list_events")  # final path: /events
+    def list_events(
+        request: Request,
+        db: Session = Depends(get_db),
+        page: int = Query(1, ge=1),
+        page_size: int = Query(10, ge=1, le=100),
+        q: Optional[str] = Query(None, description="search in name/venue"),
+        venue: Optional[str] = None,
+        status: Optional[str] = Query(None, pattern="^(active|inactive)$"),
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        sort: str = Query("start_time", pattern="^(name|start_time|utilization|relevance)$"),
+        order: str = Query("asc", pattern="^(asc|desc)$"),
+        cursor: Optional[str] = Query(None, description="meta.next_cursor of the previous page"),
+        count: Optional[str] = Query(None, pattern="^(exact|estimate|none)$"),
+    ):
+        params = dict(page=page, page_size=page_size, q=q, venue=venue, status=status, date_from=date_from,
+                      date_to=date_to, sort=sort, order=order, cursor=cursor, count=count)
+        return _list_response(request, db, params)
+
+    @router.get("/{event_id}", response_model=EventOut)  # final path: /events/{event_id}
+    def get_event(event_id: int, request: Request, db: Session = Depends(get_db)):
+        return _event_response(request, db, event_id)
 
 @router.get("/{event_id}/seats", response_model=list[SeatOut])
 def list_event_seats(event_id: int, db: Session = Depends(get_db)):
+    if settings.SEAT_INDEX_ENABLED:
+        idx = seat_index.get(db, event_id)
+        return idx.seats(_utcnow()) if idx else []
     seats = (
         db.query(Seat)
         .filter(Seat.event_id == event_id)
-        .order_by(Seat.row_label, Seat.col_number, Seat.label)
+        .order_by(*seat_layout.SEAT_ORDER)
         .all()
     )
     return seats
+
+
+@router.get("/{event_id}/seatmap")
+def get_event_seatmap(
+    event_id: int,
+    since_version: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(get_db),
+):
+    """
+    Compact seat map: {"version", "layout_version", "rows": [...], "reserved", "held"}
+    with the two base64 bitmaps in seat-map order (see SeatIndex.compact). With
+    ?since_version= only the seats changed after that version come back, as
+    {"version", "layout_version", "changes": [[seat_id, 0 free | 1 reserved | 2 held], ...]}.
+    """
+    now = _utcnow()
+    if since_version is not None:
+        body = seat_index.changes(db, event_id, since_version, now)
+    else:
+        idx = seat_index.get(db, event_id) if settings.SEAT_INDEX_ENABLED else seat_index.snapshot(db, event_id)
+        body = idx.compact(now) if idx else None
+    if body is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+    return Response(content=cache.dumps(body), media_type="application/json")
+
+
+@router.get("/{event_id}/seats/stream")
+async def stream_event_seats(
+    event_id: int,
+    request: Request,
+    since_version: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(get_db),
+):
+    """
+    Server-Sent Events: a "hello" frame (version, layout_version, booked_count and,
+    with ?since_version=, the seats changed since), then "seats" deltas as bookings,
+    cancellations, promotions and holds commit, "layout" when seats are added or
+    removed and "resync" when this stream missed messages (see app/services/seat_feed.py).
+    """
+    # Subscribe before reading the catch-up, so no commit falls between the two
+    q = seat_feed.hub.subscribe(event_id)
+    try:
+        first = await run_in_threadpool(seat_feed.hello, db, event_id, since_version, _utcnow())
+    except BaseException:
+        seat_feed.hub.unsubscribe(event_id, q)
+        raise
+    finally:
+        db.close()  # the stream itself never touches the DB
+    if first is None:
+        seat_feed.hub.unsubscribe(event_id, q)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+    return StreamingResponse(
+        seat_feed.stream(event_id, q, first, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
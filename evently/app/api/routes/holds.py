@@ -0,0 +1,40 @@
+# app/api/routes/holds.py
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from app.db import get_db
+from app.api.deps import Principal, get_current_principal
+from app.core.limiter import limiter
+from app.schemas.hold import HoldCreate, HoldOut
+from app.services import waiting_room
+from app.services.hold_service import create_hold, release_hold
+
+router = APIRouter()
+
+@router.post("/events/{event_id}/holds", response_model=HoldOut)
+@limiter.limit("20/minute")
+def hold_seats(
+    event_id: int,
+    payload: HoldCreate,
+    request: Request,
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+    queue_token: Optional[str] = Header(default=None, alias="X-Queue-Token"),
+):
+    # holds take seats off sale like a booking does: same waiting-room gate (checked, not spent)
+    waiting_room.require_admitted(event_id, queue_token, str(principal.id))
+    return create_hold(
+        db,
+        user_id=principal.id,
+        event_id=event_id,
+        qty=payload.qty,
+        seat_ids=payload.seat_ids,
+        minutes=payload.minutes,
+    )
+
+@router.delete("/holds/{token}", status_code=204)
+def drop_hold(token: str, principal: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
+    if not release_hold(db, token, principal.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hold not found")
+    return
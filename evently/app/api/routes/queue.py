@@ -0,0 +1,21 @@
+# app/api/routes/queue.py
+from fastapi import APIRouter, Depends, Request
+
+from app.api.deps import Principal, get_current_principal
+from app.core.limiter import limiter
+from app.schemas.queue import QueueTicket
+from app.services import waiting_room
+
+router = APIRouter()
+
+@router.post("/events/{event_id}/queue", response_model=QueueTicket)
+@limiter.limit("30/minute")
+def join_queue(event_id: int, request: Request, principal: Principal = Depends(get_current_principal)):
+    # Joining and polling are Redis only, apart from the principal check (cached
+    # per worker, so at most one users read per user per PRINCIPAL_CACHE_SECONDS).
+    # The ticket is bound to the user, who is the only one who may book with it.
+    return waiting_room.join(event_id, str(principal.id))
+
+@router.get("/events/{event_id}/queue/{token}", response_model=QueueTicket)
+def queue_status(event_id: int, token: str):
+    return waiting_room.poll(event_id, token)
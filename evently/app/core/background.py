@@ -0,0 +1,34 @@
+import logging
+import threading
+from typing import Callable, List, Tuple
+
+log = logging.getLogger(__name__)
+
+# Periodic in-process jobs: (name, interval_seconds, fn). Registered at import/startup
+# time by the features that need them, started/stopped from app.main.
+_jobs: List[Tuple[str, float, Callable[[], None]]] = []
+_threads: List[threading.Thread] = []
+_stop = threading.Event()
+
+def register(name: str, interval_seconds: float, fn: Callable[[], None]) -> None:
+    _jobs.append((name, interval_seconds, fn))
+
+def _loop(name: str, interval_seconds: float, fn: Callable[[], None]) -> None:
+    while not _stop.wait(interval_seconds):
+        try:
+            fn()
+        except Exception:
+            log.exception("background job %s failed", name)
+
+def start() -> None:
+    _stop.clear()
+    for name, interval, fn in _jobs:
+        t = threading.Thread(target=_loop, args=(name, interval, fn), name=f"bg-{name}", daemon=True)
+        t.start()
+        _threads.append(t)
+
+def stop() -> None:
+    _stop.set()
+    for t in _threads:
+        t.join(timeout=5)
+    _threads.clear()
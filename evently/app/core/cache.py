@@ -1,26 +1,214 @@
+import asyncio
 import json
+import logging
 import os
-from typing import Any, Optional
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
 
 _REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
 
+log = logging.getLogger(__name__)
+
+def _json_default(o: Any) -> str:
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    return str(o)
+
+def dumps(value: Any) -> bytes:
+    """JSON bytes as served to clients (datetimes in ISO 8601, like FastAPI)."""
+    return json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+
+# ---------------- client, pool and circuit breaker ----------------
+#
+# One ConnectionPool per process with bounded socket timeouts, so a slow or
+# unreachable Redis costs at most REDIS_SOCKET_TIMEOUT per call instead of an OS
+# connect timeout. Every connection reports I/O errors to a circuit breaker:
+# after REDIS_BREAKER_FAILURES consecutive failures it opens and _get_client()
+# returns None (callers already treat that as "no cache") without touching the
+# network. After a backoff that doubles on every failed probe (capped at
+# REDIS_BREAKER_MAX_SECONDS) a single caller is let through as a probe; its
+# first successful reply closes the breaker.
+
+_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.25"))
+_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "0.25"))
+_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+
+BREAKER_STATE = Gauge("evently_redis_breaker_state", "Redis circuit breaker (0 closed, 1 half-open, 2 open)")
+BREAKER_FAILURES = Gauge("evently_redis_breaker_failures", "Consecutive Redis I/O failures")
+
+class CircuitBreaker:
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, threshold: int = 3, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0  # consecutive openings; drives the backoff
+        self.retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def _set(self, state: int) -> None:
+        self.state = state
+        BREAKER_STATE.set(state)
+        BREAKER_FAILURES.set(self.failures)
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if now < self.retry_at:
+                return False
+            # Let one probe through; if it never reports back, another may try after the same wait
+            self.retry_at = now + max(self.base_delay, _CONNECT_TIMEOUT + _SOCKET_TIMEOUT)
+            self._set(self.HALF_OPEN)
+            return True
+
+    def success(self) -> None:
+        if self.state == self.CLOSED and not self.failures:
+            return
+        with self._lock:
+            if self.state != self.CLOSED:
+                log.info("redis reachable again; closing circuit breaker")
+            self.failures = 0
+            self.trips = 0
+            self._set(self.CLOSED)
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                delay = min(self.max_delay, self.base_delay * 2 ** self.trips)
+                self.trips += 1
+                self.retry_at = time.monotonic() + delay
+                if self.state != self.OPEN:
+                    log.warning("redis unavailable; circuit breaker open for %.1fs", delay)
+                self._set(self.OPEN)
+            else:
+                BREAKER_FAILURES.set(self.failures)
+
+breaker = CircuitBreaker(
+    threshold=int(os.getenv("REDIS_BREAKER_FAILURES", "3")),
+    base_delay=float(os.getenv("REDIS_BREAKER_BASE_SECONDS", "0.5")),
+    max_delay=float(os.getenv("REDIS_BREAKER_MAX_SECONDS", "30")),
+)
+
+def _io_errors():
+    from redis.exceptions import ConnectionError, TimeoutError  # type: ignore
+    return (ConnectionError, TimeoutError, OSError)
+
+def _off_loop(call, *args, **kwargs):
+    """
+    Run a blocking socket call. Under DB_ASYNC=1 the service code runs inside
+    AsyncSession.run_sync, i.e. on the event loop thread; there the call goes to
+    a worker thread and the greenlet awaits it, so Redis never stalls the loop.
+    """
+    from sqlalchemy.util.concurrency import await_only, in_greenlet
+
+    if not in_greenlet():
+        return call(*args, **kwargs)
+    return await_only(asyncio.to_thread(call, *args, **kwargs))
+
+class _Tripwire:
+    """Connection mixin: report socket-level outcomes to the breaker."""
+
+    def connect(self):
+        try:
+            return _off_loop(super().connect)
+        except _io_errors():
+            breaker.failure()
+            raise
+
+    def send_packed_command(self, *args, **kwargs):
+        try:
+            return _off_loop(super().send_packed_command, *args, **kwargs)
+        except _io_errors():
+            breaker.failure()
+            raise
+
+    def read_response(self, *args, **kwargs):
+        try:
+            response = _off_loop(super().read_response, *args, **kwargs)
+        except _io_errors():
+            breaker.failure()
+            raise
+        breaker.success()
+        return response
+
+class _AsyncTripwire:
+    async def connect(self):
+        try:
+            return await super().connect()
+        except _io_errors():
+            breaker.failure()
+            raise
+
+    async def send_packed_command(self, *args, **kwargs):
+        try:
+            return await super().send_packed_command(*args, **kwargs)
+        except _io_errors():
+            breaker.failure()
+            raise
+
+    async def read_response(self, *args, **kwargs):
+        try:
+            response = await super().read_response(*args, **kwargs)
+        except _io_errors():
+            breaker.failure()
+            raise
+        breaker.success()
+        return response
+
+def _pool_kwargs() -> dict:
+    return dict(
+        decode_responses=True,
+        socket_timeout=_SOCKET_TIMEOUT,
+        socket_connect_timeout=_CONNECT_TIMEOUT,
+        max_connections=_MAX_CONNECTIONS,
+        health_check_interval=30,
+    )
+
 _client = None
+_async_client = None
+
 def _get_client():
+    """Shared sync client, or None while Redis is unavailable (breaker open)."""
     global _client
-    if _client is not None:
-        return _client
-    try:
-        import redis  # type: ignore
-        _client = redis.Redis.from_url(_REDIS_URL, decode_responses=True)
-        # Ping once; if it fails, treat as no cache
+    if not breaker.allow():
+        return None
+    if _client is None:
         try:
-            _client.ping()
+            import redis  # type: ignore
+            pool = redis.ConnectionPool.from_url(_REDIS_URL, **_pool_kwargs())
+            pool.connection_class = type("BreakerConnection", (_Tripwire, pool.connection_class), {})
+            _client = redis.Redis(connection_pool=pool)
         except Exception:
-            _client = None
-    except Exception:
-        _client = None
+            return None
     return _client
 
+def get_async_client():
+    """asyncio counterpart of _get_client() for handlers on the event loop; same breaker."""
+    global _async_client
+    if not breaker.allow():
+        return None
+    if _async_client is None:
+        try:
+            import redis.asyncio as aioredis  # type: ignore
+            pool = aioredis.ConnectionPool.from_url(_REDIS_URL, **_pool_kwargs())
+            pool.connection_class = type("BreakerConnection", (_AsyncTripwire, pool.connection_class), {})
+            _async_client = aioredis.Redis(connection_pool=pool)
+        except Exception:
+            return None
+    return _async_client
+
 def get_json(key: str) -> Optional[Any]:
     c = _get_client()
     if not c:
@@ -36,7 +224,7 @@ def set_json(key: str, value: Any, ttl_seconds: int = 60) -> None:
     if not c:
         return
     try:
-        c.set(key, json.dumps(value, default=str), ex=ttl_seconds)
+        c.set(key, json.dumps(value, default=_json_default), ex=ttl_seconds)
     except Exception:
         pass
 
@@ -51,3 +239,353 @@ def delete(key: str) -> None:
 
 # convenient alias used by services/routes
 safe_delete = delete
+
+async def aget_json(key: str) -> Optional[Any]:
+    c = get_async_client()
+    if not c:
+        return None
+    try:
+        val = await c.get(key)
+        return None if val is None else json.loads(val)
+    except Exception:
+        return None
+
+async def aset_json(key: str, value: Any, ttl_seconds: int = 60) -> None:
+    c = get_async_client()
+    if not c:
+        return
+    try:
+        await c.set(key, json.dumps(value, default=_json_default), ex=ttl_seconds)
+    except Exception:
+        pass
+
+async def adelete(key: str) -> None:
+    c = get_async_client()
+    if not c:
+        return
+    try:
+        await c.delete(key)
+    except Exception:
+        pass
+
+# ---------------- single-flight, stale-while-revalidate ----------------
+#
+# <key> holds {"v": value, "at": compute_started_at} for hard_ttl seconds. The
+# entry is fresh for soft_ttl seconds unless <key>:stale holds a later timestamp
+# (mark_stale, called by writes instead of deleting; a write that lands while the
+# value is being computed therefore still marks it stale). A stale entry is still served while exactly one
+# caller, holding <key>:lock, recomputes it; on a cold miss the others wait
+# briefly for that caller instead of all recomputing at once, and one of them
+# takes over if it fails.
+
+CACHE_REQUESTS = Counter(
+    "evently_cache_requests_total",
+    "Reads through cache.get_or_compute by outcome (hit, stale, miss)",
+    ["cache", "result"],
+)
+
+_UNLOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+
+def mark_stale(key: str, ttl_seconds: int = 3600) -> None:
+    """Flag <key> for recompute on the next read; the current value keeps being served meanwhile."""
+    _local_drop(key)
+    c = _get_client()
+    if not c:
+        return
+    try:
+        c.set(f"{key}:stale", time.time(), ex=ttl_seconds)
+        c.publish(_INVALIDATE_CHANNEL, key)
+    except Exception:
+        pass
+
+def _store(c, key: str, value: Any, started_at: float, hard_ttl: int) -> None:
+    c.set(key, json.dumps({"v": value, "at": started_at}, default=_json_default), ex=hard_ttl)
+
+def get_or_compute(
+    key: str,
+    compute: Callable[[], Any],
+    soft_ttl: int = 60,
+    hard_ttl: int = 600,
+    lock_ttl: int = 30,
+    wait_seconds: float = 2.0,
+    force: bool = False,
+    name: Optional[str] = None,
+) -> Any:
+    """
+    Read-through cache with one recompute in flight per key. Falls back to
+    calling compute() directly when Redis is unavailable.
+    """
+    metric = CACHE_REQUESTS.labels(name or key.split(":")[0], "miss")
+    c = _get_client()
+    if not c:
+        metric.inc()
+        return compute()
+    try:
+        raw, stale_flag = c.mget(key, f"{key}:stale")
+    except Exception:
+        metric.inc()
+        return compute()
+
+    entry = None if raw is None or force else json.loads(raw)
+    stale_since = float(stale_flag) if stale_flag else 0.0
+    if entry is not None and entry["at"] > stale_since and time.time() - entry["at"] < soft_ttl:
+        CACHE_REQUESTS.labels(name or key.split(":")[0], "hit").inc()
+        return entry["v"]
+
+    token = uuid.uuid4().hex
+    try:
+        leader = bool(c.set(f"{key}:lock", token, nx=True, ex=lock_ttl))
+    except Exception:
+        leader = False
+
+    if entry is not None and not leader:
+        CACHE_REQUESTS.labels(name or key.split(":")[0], "stale").inc()
+        return entry["v"]
+
+    metric.inc()
+    if not leader and not force:
+        # Cold miss while another caller recomputes: wait for its value. A lock
+        # released with nothing stored means that compute raised; the next
+        # waiter to take the lock tries again instead of sitting out the wait.
+        deadline = time.monotonic() + wait_seconds
+        while not leader and time.monotonic() < deadline:
+            time.sleep(0.05)
+            try:
+                raw, holder = c.mget(key, f"{key}:lock")
+                if raw is None and holder is None:
+                    leader = bool(c.set(f"{key}:lock", token, nx=True, ex=lock_ttl))
+            except Exception:
+                break
+            if raw is not None:
+                return json.loads(raw)["v"]
+        if not leader:
+            return compute()
+
+    try:
+        started_at = time.time()
+        value = compute()
+        try:
+            _store(c, key, value, started_at, hard_ttl)
+        except Exception:
+            pass
+        return value
+    finally:
+        if leader:
+            try:
+                c.eval(_UNLOCK, 1, f"{key}:lock", token)
+            except Exception:
+                pass
+
+# ---------------- in-process tier ----------------
+#
+# A size-bounded LRU of pre-serialized JSON bytes in front of the Redis tier, so
+# a hot read is a dict lookup with no network round trip and no re-encoding.
+# Entries live LOCAL_CACHE_TTL_SECONDS at most; invalidate()/mark_stale() drop
+# them here and broadcast the key on Redis pub/sub so every worker's listener
+# (start_listener, run from app startup) drops its copy too. Callers with their
+# own working set (principals) get a separate LocalTier, so a burst of distinct
+# keys in one cache cannot evict the other; invalidation reaches every tier.
+
+_LOCAL_MAX = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "1024"))
+_LOCAL_TTL = float(os.getenv("LOCAL_CACHE_TTL_SECONDS", "5"))
+_INVALIDATE_CHANNEL = "cache:invalidate"
+
+_local: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+_local_lock = threading.Lock()
+_listener: Optional[threading.Thread] = None
+_listener_stop = threading.Event()
+
+class LocalTier:
+    """A size-bounded, per-entry TTL LRU of its own, dropped by the same invalidations."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        _tiers.append(self)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                return None
+            if hit[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return hit[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def drop(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+_tiers: List[LocalTier] = []
+
+def _local_get(key: str) -> Optional[bytes]:
+    with _local_lock:
+        hit = _local.get(key)
+        if hit is None:
+            return None
+        if hit[0] < time.monotonic():
+            del _local[key]
+            return None
+        _local.move_to_end(key)
+        return hit[1]
+
+def _local_set(key: str, body: bytes, ttl_seconds: float) -> None:
+    with _local_lock:
+        _local[key] = (time.monotonic() + ttl_seconds, body)
+        _local.move_to_end(key)
+        while len(_local) > _LOCAL_MAX:
+            _local.popitem(last=False)
+
+def _local_drop(key: str) -> None:
+    with _local_lock:
+        _local.pop(key, None)
+    for tier in _tiers:
+        tier.drop(key)
+
+def get_local(key: str) -> Optional[bytes]:
+    """Local tier only (no Redis)."""
+    return _local_get(key)
+
+def set_local(key: str, body: bytes, ttl_seconds: float) -> None:
+    _local_set(key, body, ttl_seconds)
+
+def invalidate(key: str) -> None:
+    """Delete <key> in Redis and in every worker's local tier."""
+    _local_drop(key)
+    c = _get_client()
+    if not c:
+        return
+    try:
+        c.delete(key)
+        c.publish(_INVALIDATE_CHANNEL, key)
+    except Exception:
+        pass
+
+def take_turn(name: str, interval_seconds: float) -> Optional[bool]:
+    """
+    Periodic jobs that every worker schedules but one should run: True for the
+    process that takes this interval's turn (the lock expires just before the
+    next interval), False for the others, None without Redis.
+    """
+    c = _get_client()
+    if not c:
+        return None
+    try:
+        return bool(c.set(f"turn:{name}", 1, nx=True, px=max(1, int(interval_seconds * 900))))
+    except Exception:
+        return None
+
+_unbumped: set = set()  # bumps that could not reach Redis; replayed once it is back
+
+def version(key: str) -> Optional[int]:
+    """
+    Current value of the version counter <key> (None without Redis). Held in the
+    local tier, so a hot read costs no round trip; bump() drops it everywhere.
+    A missing counter starts from the clock, never from a number used before.
+    """
+    body = _local_get(key)
+    if body is not None:
+        return int(body)
+    c = _get_client()
+    if not c:
+        return None
+    if _unbumped:
+        bump()
+    try:
+        c.set(key, time.time_ns() // 1000, nx=True)
+        value = int(c.get(key))
+    except Exception:
+        return None
+    _local_set(key, str(value).encode(), _LOCAL_TTL)
+    return value
+
+def bump(*keys: str) -> None:
+    """Increment version counters (after the write commits) and drop them in every worker."""
+    for key in keys:
+        _local_drop(key)
+    with _local_lock:
+        keys = tuple(_unbumped.union(keys))
+        _unbumped.clear()
+    c = _get_client()
+    try:
+        if not c:
+            raise ConnectionError("redis unavailable")
+        pipe = c.pipeline(transaction=False)
+        for key in keys:
+            pipe.set(key, time.time_ns() // 1000, nx=True)
+            pipe.incr(key)
+            pipe.publish(_INVALIDATE_CHANNEL, key)
+        pipe.execute()
+    except Exception:
+        with _local_lock:
+            _unbumped.update(keys)
+
+def get_bytes(
+    key: str,
+    compute: Callable[[], Any],
+    soft_ttl: int = 60,
+    hard_ttl: int = 600,
+    local_ttl: Optional[float] = None,
+    force: bool = False,
+    name: Optional[str] = None,
+) -> bytes:
+    """Two-tier read: local bytes, else get_or_compute() through Redis, serialized once per fill."""
+    if not force:
+        body = _local_get(key)
+        if body is not None:
+            CACHE_REQUESTS.labels(name or key.split(":")[0], "local_hit").inc()
+            return body
+    body = dumps(get_or_compute(key, compute, soft_ttl, hard_ttl, force=force, name=name))
+    _local_set(key, body, _LOCAL_TTL if local_ttl is None else local_ttl)
+    return body
+
+def _listen() -> None:
+    while not _listener_stop.is_set():
+        c = _get_client()
+        if not c:
+            _listener_stop.wait(5)
+            continue
+        try:
+            ps = c.pubsub(ignore_subscribe_messages=True)
+            ps.subscribe(_INVALIDATE_CHANNEL)
+            # Messages may have been missed while (re)connecting
+            with _local_lock:
+                _local.clear()
+            for tier in _tiers:
+                tier.clear()
+            while not _listener_stop.is_set():
+                msg = ps.get_message(timeout=1.0)
+                if msg and msg.get("type") == "message":
+                    _local_drop(msg["data"])
+            ps.close()
+        except Exception:
+            log.warning("cache invalidation listener lost Redis; retrying")
+            _listener_stop.wait(1)
+
+def start_listener() -> None:
+    global _listener
+    if _listener is not None and _listener.is_alive():
+        return
+    _listener_stop.clear()
+    _listener = threading.Thread(target=_listen, name="cache-invalidation", daemon=True)
+    _listener.start()
+
+def stop_listener() -> None:
+    _listener_stop.set()
@@ -0,0 +1,82 @@
+"""
+Password hashing off the request path.
+
+bcrypt is CPU-bound and holds the GIL for most of its run. Done inline it occupies
+one of Starlette's threadpool slots per login and slows every other thread in the
+worker, including the booking endpoints. Here it runs in a small process pool
+(HASH_WORKERS processes, started on first use). At most HASH_WORKERS + HASH_QUEUE
+hashes may be in flight per API worker. Past that, callers get an immediate 503
+instead of queueing behind a login burst. HASH_WORKERS=0 keeps hashing on the
+threadpool, behind the same bound.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.security import make_context
+
+_executor: Optional[Executor] = None
+_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(1, settings.HASH_WORKERS) + settings.HASH_QUEUE)
+
+# ---- run in the hashing processes (module-level so they pickle) ----
+
+@lru_cache(maxsize=4)
+def _context(rounds: int):
+    return make_context(rounds)
+
+def _hash(plain: str, rounds: int) -> str:
+    return _context(rounds).hash(plain)
+
+def _verify_and_update(plain: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return _context(rounds).verify_and_update(plain, hashed)
+
+# ---- called from request handlers ----
+
+def _get_executor() -> Optional[Executor]:
+    global _executor
+    if settings.HASH_WORKERS <= 0:
+        return None
+    with _lock:
+        if _executor is None:
+            # spawn, not fork: the API process already runs threads (pool, listeners)
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+async def _submit(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-ins in progress, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        executor = _get_executor()
+        if executor is None:
+            return await run_in_threadpool(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+    finally:
+        _slots.release()
+
+async def hash_password(plain: str) -> str:
+    return await _submit(_hash, plain, settings.BCRYPT_ROUNDS)
+
+async def verify_password(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """(matches, new_hash). new_hash is set when the stored hash was made at another BCRYPT_ROUNDS."""
+    return await _submit(_verify_and_update, plain, hashed, settings.BCRYPT_ROUNDS)
+
+def shutdown() -> None:
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -2,5 +2,7 @@ import os
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+from app.core.config import settings
+
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
-limiter = Limiter(key_func=get_remote_address, storage_uri=REDIS_URL)
+limiter = Limiter(key_func=get_remote_address, storage_uri=REDIS_URL, enabled=settings.RATE_LIMIT_ENABLED)
@@ -6,7 +6,17 @@ from passlib.context import CryptContext
 
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def make_context(rounds: int) -> CryptContext:
+    # min == max == default: a hash at any other cost "needs update", so login rehashes it
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+pwd_context = make_context(settings.BCRYPT_ROUNDS)
 
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
@@ -14,7 +24,15 @@ def verify_password(plain: str, hashed: str) -> bool:
 def hash_password(plain: str) -> str:
     return pwd_context.hash(plain)
 
-def create_access_token(subject: str, expires_minutes: Optional[int] = None) -> str:
+def create_access_token(
+    subject: str,
+    expires_minutes: Optional[int] = None,
+    role: Optional[str] = None,
+    token_version: Optional[int] = None,
+) -> str:
     expire = datetime.utcnow() + timedelta(minutes=expires_minutes or settings.JWT_EXPIRE_MINUTES)
     to_encode = {"sub": subject, "exp": expire}
+    if role is not None:
+        # Lets get_current_principal authorize without loading the user
+        to_encode.update(role=role, token_version=token_version or 0)
     return jwt.encode(to_encode, settings.JWT_SECRET, algorithm="HS256")
@@ -7,7 +7,10 @@ from slowapi.middleware import SlowAPIMiddleware
 from prometheus_fastapi_instrumentator import Instrumentator
 
 from app.api.router import api_router
+from app.core import background, cache, hashing
+from app.core.config import settings
 from app.core.limiter import limiter
+from app.services import booking_service, hold_service, inventory_gate, seat_feed
 
 app = FastAPI(title="Evently API")
 
@@ -30,6 +33,27 @@ async def _rate_limit_handler(request: Request, exc: RateLimitExceeded):
 # Prometheus metrics at /metrics
 Instrumentator().instrument(app).expose(app, include_in_schema=False)
 
+# Background jobs (in-process, one set per worker)
+background.register("hold-sweeper", settings.SEAT_HOLD_SWEEP_SECONDS, hold_service.sweep_job)
+if settings.SEATMAP_SWEEP_SECONDS > 0:
+    background.register("seatmap-sweep", settings.SEATMAP_SWEEP_SECONDS, booking_service.seatmap_job)
+if settings.WAITLIST_RECONCILE_SECONDS > 0:
+    background.register("waitlist-reconcile", settings.WAITLIST_RECONCILE_SECONDS, booking_service.waitlist_reconcile_job)
+if settings.INVENTORY_GATE_ENABLED:
+    background.register("inventory-reconcile", settings.INVENTORY_RECONCILE_SECONDS, inventory_gate.reconcile_job)
+
+@app.on_event("startup")
+def _start_background_jobs():
+    background.start()
+    cache.start_listener()
+
+@app.on_event("shutdown")
+def _stop_background_jobs():
+    background.stop()
+    cache.stop_listener()
+    hashing.shutdown()
+    seat_feed.hub.stop()
+
 # Healthz (already existed; keep yours if present)
 @app.get("/healthz")
 def healthz():
@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, String, Integer, DateTime, func
+from sqlalchemy import BigInteger, String, Integer, DateTime, Index, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -12,3 +12,8 @@ class Booking(Base):
     status: Mapped[str] = mapped_column(String(20), nullable=False, default="CONFIRMED")
     idempotency_key: Mapped[str | None] = mapped_column(String(64), nullable=True)
     created_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_bookings_event_status_created", "event_id", "status", "created_at", "id"),
+        Index("ix_bookings_user_created", "user_id", "created_at"),
+    )
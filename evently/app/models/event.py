@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, String, Integer, DateTime, func
+from sqlalchemy import BigInteger, Boolean, String, Integer, DateTime, Index, false, func, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -13,6 +13,20 @@ class Event(Base):
     capacity: Mapped[int] = mapped_column(Integer, nullable=False)
     booked_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     status: Mapped[str] = mapped_column(String(20), nullable=False, default="active")
+    # WAITLISTED bookings (rows / seats asked for), kept in step by booking_service
+    waitlisted_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    waitlisted_qty: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # The seat map has been laid out; until then bookings take the capacity-only flow
+    seatmap_ready: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=false())
     created_by: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
     created_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
     updated_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    # GET /events keyset pagination: one (sort key, id) index per sort mode
+    __table_args__ = (
+        Index("ix_events_start_time_id", "start_time", "id"),
+        Index("ix_events_name_id", "name", "id"),
+        Index("ix_events_utilization_id", text("(CAST(booked_count AS FLOAT) / NULLIF(capacity, 0))"), "id"),
+        # seatmap sweep: the few events still waiting for a seat map
+        Index("ix_events_seatmap_pending", "id", postgresql_where=text("NOT seatmap_ready")),
+    )
@@ -0,0 +1,20 @@
+from datetime import date
+
+from sqlalchemy import BigInteger, Date, Integer, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+class EventDailyStats(Base):
+    """Per event and UTC day rollup, incremented by the booking write path (analytics_service.record)."""
+    __tablename__ = "event_daily_stats"
+    event_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    bookings: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    cancellations: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    seats_booked: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    seats_released: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        Index("ix_event_daily_stats_day", "day"),
+    )
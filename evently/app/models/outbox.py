@@ -0,0 +1,15 @@
+from sqlalchemy import JSON, BigInteger, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+class OutboxMessage(Base):
+    """
+    Post-commit work for one write (services/outbox.py), inserted in the write's own
+    transaction and deleted by the worker once handled.
+    """
+    __tablename__ = "outbox"
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    event_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, UniqueConstraint, Index
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, ForeignKey, UniqueConstraint, Index
 from .base import Base
 
 class Seat(Base):
@@ -16,7 +16,17 @@ class Seat(Base):
     reserved = Column(Boolean, nullable=False, default=False)
     reserved_booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="SET NULL"), nullable=True)
 
+    # Temporary hold (POST /events/{id}/holds); an expired hold counts as free
+    hold_token = Column(String(32), nullable=True, index=True)
+    held_by = Column(BigInteger, nullable=True)
+    held_until = Column(DateTime(timezone=True), nullable=True, index=True)
+
+    # seat_versions.version of the last transaction that changed this seat
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+
     __table_args__ = (
         UniqueConstraint("event_id", "label", name="uq_seats_event_label"),
         Index("ix_seats_event_reserved", "event_id", "reserved"),
+        Index("ix_seats_event_version", "event_id", "version"),
+        Index("ix_seats_reserved_booking_id", "reserved_booking_id"),
     )
@@ -0,0 +1,15 @@
+from sqlalchemy import BigInteger, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+class SeatVersion(Base):
+    """
+    Seat-map version counters of one event (services/seat_index.py), on their own
+    row so seat writes never lock the events row. No row yet = both 0.
+    """
+    __tablename__ = "seat_versions"
+    event_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    # bumped with every seat change / every seat add-remove
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    layout_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
@@ -6,6 +6,8 @@ class BookingCreate(BaseModel):
     qty: int = Field(..., gt=0)
     waitlist: bool = False
     seat_ids: Optional[List[int]] = None   # <-- add (let users pick exact seats)
+    hold_token: Optional[str] = None       # convert seats held via POST /events/{id}/holds
+    prefer_contiguous: bool = False        # auto-assign: seat the party side by side in one row if possible
 
 class BookingOut(BaseModel):
     id: int
@@ -34,13 +34,24 @@ class EventOut(BaseModel):
     booked_count: int
     status: str
     waitlisted_count: int = 0   # <— add
+    waitlisted_qty: int = 0
+    seatmap_ready: bool = False
+    model_config = ConfigDict(from_attributes=True)
+
+class EventSuggestion(BaseModel):
+    id: int
+    name: str
+    venue: str
+    start_time: datetime
     model_config = ConfigDict(from_attributes=True)
 
 # (Optional for list endpoint)
 class EventListMeta(BaseModel):
-    page: int
+    page: Optional[int] = None          # None in cursor mode
     page_size: int
-    total: int
+    total: Optional[int] = None         # None when count=none (default in cursor mode)
+    total_estimated: bool = False       # total is the planner's estimate (count=estimate)
+    next_cursor: Optional[str] = None   # pass as ?cursor= for the next page; None on the last page
 
 class EventListResponse(BaseModel):
     items: List[EventOut]
@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+
+class HoldCreate(BaseModel):
+    qty: Optional[int] = Field(None, gt=0, le=settings.SEAT_HOLD_MAX_SEATS)  # auto-pick this many seats
+    seat_ids: Optional[List[int]] = Field(None, max_length=settings.SEAT_HOLD_MAX_SEATS)  # or hold these exact seats
+    minutes: int = Field(settings.SEAT_HOLD_MINUTES, ge=1, le=settings.SEAT_HOLD_MAX_MINUTES)
+
+class HoldOut(BaseModel):
+    token: str
+    event_id: int
+    seat_ids: List[int]
+    seat_labels: List[str]
+    expires_at: datetime
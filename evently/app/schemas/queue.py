@@ -0,0 +1,17 @@
+from typing import Literal, Optional
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+
+class QueueOpen(BaseModel):
+    admit_per_second: float = Field(settings.WAITING_ROOM_ADMIT_PER_SECOND, gt=0)
+    admit_ttl_seconds: int = Field(settings.WAITING_ROOM_ADMIT_TTL_SECONDS, ge=10)
+
+class QueueTicket(BaseModel):
+    event_id: int
+    token: Optional[str] = None
+    # open: no waiting room (book directly); waiting; admitted; expired (re-join)
+    state: Literal["open", "waiting", "admitted", "expired"]
+    position: int = 0
+    estimated_wait_seconds: Optional[float] = None
+    admitted_until: Optional[float] = None   # epoch seconds
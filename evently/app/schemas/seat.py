@@ -8,6 +8,7 @@ class SeatOut(BaseModel):
     row_label: Optional[str] = None
     col_number: Optional[int] = None
     reserved: bool
+    held: bool = False  # under a live hold (only reported by the seat index)
 
     class Config:
         from_attributes = True
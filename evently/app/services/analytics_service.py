@@ -1,94 +1,140 @@
 from __future__ import annotations
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 from typing import Dict, Any, List
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, select
+from sqlalchemy import case, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from app.models.event import Event
-from app.models.booking import Booking
+from app.models.event_daily_stats import EventDailyStats
+
+TOP_EVENTS = 5
+EVENT_ROWS = 100  # per-event rows in the summary; the rest via event_rows(), totals cover every event
 
 def _utilization(booked: int, capacity: int) -> float:
     if not capacity:
         return 0.0
     return round(100.0 * float(booked) / float(capacity), 2)
 
+def record(
+    db: Session,
+    event_id: int,
+    bookings: int = 0,
+    cancellations: int = 0,
+    seats_booked: int = 0,
+    seats_released: int = 0,
+    day: date | None = None,
+) -> None:
+    """
+    Add to the event_daily_stats row of <day> (default today, UTC) inside the
+    caller's transaction. One upsert per write; issue it last, next to the event
+    row update, so the rollup row lock is held only until the caller commits.
+    """
+    insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(EventDailyStats).values(
+        event_id=event_id,
+        day=day or datetime.now(timezone.utc).date(),
+        bookings=bookings,
+        cancellations=cancellations,
+        seats_booked=seats_booked,
+        seats_released=seats_released,
+    )
+    t = EventDailyStats.__table__.c
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[t.event_id, t.day],
+        set_={
+            "bookings": t.bookings + stmt.excluded.bookings,
+            "cancellations": t.cancellations + stmt.excluded.cancellations,
+            "seats_booked": t.seats_booked + stmt.excluded.seats_booked,
+            "seats_released": t.seats_released + stmt.excluded.seats_released,
+        },
+    ))
+
+def _event_row(ev) -> Dict[str, Any]:
+    cap = ev.capacity or 0
+    booked = ev.booked_count or 0
+    return {
+        "id": ev.id,
+        "name": ev.name,
+        "venue": ev.venue,
+        "start_time": ev.start_time,
+        "end_time": ev.end_time,
+        "capacity": cap,
+        "booked_count": booked,
+        "utilization_pct": _utilization(booked, cap),
+        "status": ev.status,
+    }
+
+_EVENT_COLS = (Event.id, Event.name, Event.venue, Event.start_time, Event.end_time,
+               Event.capacity, Event.booked_count, Event.status)
+
+def event_rows(db: Session, offset: int = 0, limit: int = EVENT_ROWS) -> List[Dict[str, Any]]:
+    """Per-event rows by start time, one page at a time (the summary holds the first page)."""
+    return [_event_row(ev) for ev in db.execute(
+        select(*_EVENT_COLS).order_by(Event.start_time.asc(), Event.id).offset(offset).limit(limit)
+    )]
+
 def build_summary(db: Session) -> Dict[str, Any]:
-    # Per-event rows
-    events: List[Event] = db.query(Event).order_by(Event.start_time.asc()).all()
-    rows = []
-    total_capacity = 0
-    total_booked = 0
-    active_events = 0
-    for ev in events:
-        cap = ev.capacity or 0
-        booked = ev.booked_count or 0
-        total_capacity += cap
-        total_booked += booked
-        if ev.status == "active":
-            active_events += 1
-        rows.append({
-            "id": ev.id,
-            "name": ev.name,
-            "venue": ev.venue,
-            "start_time": ev.start_time,
-            "end_time": ev.end_time,
-            "capacity": cap,
-            "booked_count": booked,
-            "utilization_pct": _utilization(booked, cap),
-            "status": ev.status,
-        })
+    """
+    Reads O(days + top-N) rows: totals are SQL aggregates over events, the
+    timeseries comes from the event_daily_stats rollup, and only the top events
+    plus the first EVENT_ROWS events by start time are materialized.
+    "events_truncated" says whether "events" stops short of "events_total";
+    the remaining rows are paged by GET /admin/analytics/events.
+    """
+    totals = db.execute(
+        select(
+            func.count(Event.id),
+            func.coalesce(func.sum(case((Event.status == "active", 1), else_=0)), 0),
+            func.coalesce(func.sum(Event.capacity), 0),
+            func.coalesce(func.sum(Event.booked_count), 0),
+        )
+    ).one()
+    n_events, active_events, total_capacity, total_booked = (int(v) for v in totals)
 
-    # Top events by booked_count (limit 5)
-    top_events = sorted(rows, key=lambda r: r["booked_count"], reverse=True)[:5]
+    rows = event_rows(db, 0, EVENT_ROWS)
+    top_events = [_event_row(ev) for ev in
+                  db.execute(select(*_EVENT_COLS).order_by(Event.booked_count.desc(), Event.id).limit(TOP_EVENTS))]
 
-    # 7-day timeseries (UTC)
+    # 7-day timeseries (UTC) from the daily rollup
     now = datetime.now(timezone.utc)
-    since = now - timedelta(days=6)  # inclusive window of 7 days
-    # Postgres date_trunc; SQLite falls back to simple grouping on date string
-    # Bookings created counts
-    q_book = (
-        db.query(func.date_trunc('day', Booking.created_at).label('day'), func.count().label('cnt'))
-        .filter(Booking.created_at >= since)
-        .filter(Booking.status == "CONFIRMED")
-        .group_by(func.date_trunc('day', Booking.created_at))
-        .order_by(func.date_trunc('day', Booking.created_at).asc())
-    )
-    # Cancellations counts (by the booking's created_at date window; alternatively use updated_at if you have it)
-    q_cancel = (
-        db.query(func.date_trunc('day', Booking.created_at).label('day'), func.count().label('cnt'))
-        .filter(Booking.created_at >= since)
-        .filter(Booking.status == "CANCELLED")
-        .group_by(func.date_trunc('day', Booking.created_at))
-        .order_by(func.date_trunc('day', Booking.created_at).asc())
-    )
+    since = (now - timedelta(days=6)).date()  # inclusive window of 7 days
+    daily = db.execute(
+        select(
+            EventDailyStats.day,
+            func.sum(EventDailyStats.bookings),
+            func.sum(EventDailyStats.cancellations),
+        )
+        .where(EventDailyStats.day >= since)
+        .group_by(EventDailyStats.day)
+    ).all()
+    by_day = {r[0]: (int(r[1]), int(r[2])) for r in daily}
 
-    # Execute and normalize to 7 buckets
-    def normalize(rows_):
-        m = { r[0].date().isoformat(): int(r[1]) for r in rows_ }
+    def series(i: int) -> List[Dict[str, Any]]:
         out = []
-        for i in range(7):
-            d = (since + timedelta(days=i)).date().isoformat()
-            out.append({"date": d, "count": m.get(d, 0)})
+        for d in range(7):
+            day = since + timedelta(days=d)
+            out.append({"date": day.isoformat(), "count": by_day.get(day, (0, 0))[i]})
         return out
 
-    book_rows = q_book.all()
-    cancel_rows = q_cancel.all()
-
     summary = {
         "generated_at": now.isoformat(),
         "totals": {
-            "events": len(events),
+            "events": n_events,
             "active_events": active_events,
             "capacity": total_capacity,
             "booked": total_booked,
             "utilization_pct": _utilization(total_booked, total_capacity),
         },
         "events": rows,
+        "events_total": n_events,
+        "events_truncated": n_events > len(rows),
         "top_events": top_events,
         "timeseries_7d": {
-            "bookings": normalize(book_rows),
-            "cancellations": normalize(cancel_rows),
+            "bookings": series(0),
+            "cancellations": series(1),
         },
     }
     return summary
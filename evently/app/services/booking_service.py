@@ -1,9 +1,12 @@
-from typing import Optional, List
+from datetime import datetime, timezone
+from typing import Optional, List, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import select
+from sqlalchemy import BigInteger, Integer, and_, bindparam, column, func, or_, select, update, values
 from fastapi import HTTPException, status
-from app.core.cache import safe_delete
+from app.core import cache
+from app.core.config import settings
+from app.services import event_cache, inventory_gate, outbox, seat_feed, seat_index, seat_layout
 
 from app.models.event import Event
 from app.models.booking import Booking
@@ -12,84 +15,195 @@ from app.models.seat import Seat
 
 # ---------------- seat helpers ----------------
 
-def _row_label_from_index(i: int) -> str:
-    """0->A, 25->Z, 26->AA, ..."""
-    s = ""
-    while True:
-        s = chr(ord("A") + (i % 26)) + s
-        i = i // 26 - 1
-        if i < 0:
-            return s
+def _with_lock(query, db: Session, skip_locked: bool = False):
+    if db.bind and getattr(db.bind.dialect, "name", "") != "sqlite":
+        return query.with_for_update(skip_locked=skip_locked)
+    return query
 
 
-def _seed_basic_grid(db: Session, event_id: int, capacity: int, per_row: int = 10) -> None:
-    """
-    Create seat rows A.. with <per_row> seats per row until 'capacity' seats exist.
-    Idempotent: if seats already exist for the event, do nothing.
-    Uses flush() so it stays in the same transaction as the caller.
-    """
-    if capacity <= 0:
-        return
-    if db.query(Seat.id).filter(Seat.event_id == event_id).first():
-        return
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
 
-    per_row = max(1, int(per_row))
-    to_add = []
-    row_idx, col = 0, 1
-
-    for _ in range(capacity):
-        row_label = _row_label_from_index(row_idx)
-        label = f"{row_label}{col}"
-        to_add.append(
-            Seat(
-                event_id=event_id,
-                label=label,
-                row_label=row_label,
-                col_number=col,
-                reserved=False,
-                reserved_booking_id=None,
-            )
-        )
-        col += 1
-        if col > per_row:
-            col = 1
-            row_idx += 1
 
-    db.bulk_save_objects(to_add)
-    db.flush()
-
-
-def _with_lock(query, db: Session):
-    if db.bind and getattr(db.bind.dialect, "name", "") != "sqlite":
-        return query.with_for_update()
-    return query
+def _seat_free(now: datetime):
+    """Seat filter: not reserved and not under a live hold (expired holds count as free)."""
+    return and_(
+        Seat.reserved == False,
+        or_(Seat.held_until.is_(None), Seat.held_until < now),
+    )
 
 
-def _has_seatmap(db: Session, event_id: int) -> bool:
-    return db.query(Seat.id).filter(Seat.event_id == event_id).first() is not None
+def _held_by_other(seat: Seat, now: datetime, hold_token: Optional[str] = None) -> bool:
+    until = seat.held_until
+    if until is None or seat.hold_token == hold_token:
+        return False
+    if until.tzinfo is None:  # SQLite hands back naive UTC
+        until = until.replace(tzinfo=timezone.utc)
+    return until >= now
 
 
 def _seat_labels_for_booking(db: Session, booking_id: int) -> List[str]:
     rows = (
         db.query(Seat.label)
         .filter(Seat.reserved_booking_id == booking_id)
-        .order_by(Seat.row_label, Seat.col_number, Seat.label)
+        .order_by(*seat_layout.SEAT_ORDER)
         .all()
     )
     return [r[0] for r in rows]
 
 
-def _attach_seats_to_booking(db: Session, booking: Booking, seats: List[Seat]) -> None:
+def _attach_seats_to_booking(db: Session, booking: Booking, seats: List[Seat], version: int) -> None:
     for s in seats:
+        s.version = version
         s.reserved = True
         s.reserved_booking_id = booking.id
+        s.hold_token = None
+        s.held_by = None
+        s.held_until = None
 
 
 # ---------------- waitlist promotion ----------------
 
-def _try_promote_waitlist(db: Session, event_id: int) -> None:
+def _fifo_prefix(db: Session, event_id: int, free: int) -> List[Tuple[int, int]]:
+    """
+    (booking_id, qty) for the longest FIFO prefix of WAITLISTED bookings whose
+    total qty fits into <free>, computed in one pass with a running SUM(qty).
+    Strict FIFO: a waiter that does not fit blocks everyone queued behind it.
+    """
+    if free <= 0:
+        return []
+    running = func.sum(Booking.qty).over(
+        order_by=(Booking.created_at.asc(), Booking.id.asc())
+    ).label("running")
+    w = (
+        select(Booking.id, Booking.qty, running)
+        .where(Booking.event_id == event_id, Booking.status == "WAITLISTED")
+        .subquery()
+    )
+    rows = db.execute(
+        select(w.c.id, w.c.qty).where(w.c.running <= free).order_by(w.c.running)
+    ).all()
+    return [(r[0], r[1]) for r in rows]
+
+
+_BULK_CHUNK = 5000  # rows per statement; keeps bind params well under Postgres' 65535 limit
+
+
+def _chunks(items: list, size: int = _BULK_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _reserve_seats_bulk(db: Session, assignments: List[Tuple[int, int]], version: int) -> None:
+    """Mark seats reserved for bookings set-based; assignments = [(seat_id, booking_id)]."""
+    if not assignments:
+        return
+    if getattr(db.bind.dialect, "name", "") == "postgresql":
+        for chunk in _chunks(assignments):
+            v = values(
+                column("sid", Integer), column("bid", BigInteger), name="v"
+            ).data(chunk)
+            db.execute(
+                update(Seat)
+                .where(Seat.id == v.c.sid)
+                .values(reserved=True, reserved_booking_id=v.c.bid, version=version)
+                .execution_options(synchronize_session=False)
+            )
+    else:
+        db.execute(
+            update(Seat.__table__)
+            .where(Seat.__table__.c.id == bindparam("sid"))
+            .values(reserved=True, reserved_booking_id=bindparam("bid"), version=version),
+            [{"sid": sid, "bid": bid} for sid, bid in assignments],
+        )
+
+
+def _confirm_waiters(db: Session, booking_ids: List[int]) -> bool:
+    """Flip WAITLISTED -> CONFIRMED; False if any waiter changed state concurrently."""
+    updated = 0
+    for chunk in _chunks(booking_ids):
+        res = db.execute(
+            update(Booking)
+            .where(Booking.id.in_(chunk), Booking.status == "WAITLISTED")
+            .values(status="CONFIRMED")
+            .execution_options(synchronize_session=False)
+        )
+        updated += res.rowcount
+    return updated == len(booking_ids)
+
+
+def _adjust_waitlist(db: Session, event_id: int, count: int, qty: int) -> None:
+    """Move events.waitlisted_count/_qty in the caller's transaction (atomic increment)."""
+    db.execute(
+        update(Event)
+        .where(Event.id == event_id)
+        .values(
+            waitlisted_count=Event.waitlisted_count + count,
+            waitlisted_qty=Event.waitlisted_qty + qty,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+_WAITLIST_RECONCILE_LOCK = 0x65766C77  # pg advisory lock key ("evlw")
+
+
+def _waitlist_counts():
+    waiting = and_(Booking.event_id == Event.id, Booking.status == "WAITLISTED")
+    return (select(func.count(Booking.id)).where(waiting).scalar_subquery(),
+            select(func.coalesce(func.sum(Booking.qty), 0)).where(waiting).scalar_subquery())
+
+
+def reconcile_waitlist_counts(db: Session) -> int:
+    """
+    Repair drift in events.waitlisted_count/_qty from bookings; returns events
+    fixed. One read finds the drifted events; each is then locked and
+    recounted, so a concurrent _adjust_waitlist is either already counted or
+    applied after this commit, never overwritten. On Postgres an advisory lock
+    keeps a second reconcile from running at the same time (it returns 0).
+    """
+    if db.bind.dialect.name == "postgresql" and not db.execute(
+        select(func.pg_try_advisory_xact_lock(_WAITLIST_RECONCILE_LOCK))
+    ).scalar():
+        db.rollback()
+        return 0
+    cnt, qty = _waitlist_counts()
+    drifted = db.execute(
+        select(Event.id).where(or_(Event.waitlisted_count != cnt, Event.waitlisted_qty != qty))
+    ).scalars().all()
+    fixed = []
+    for event_id in drifted:
+        _with_lock(db.query(Event.id).filter(Event.id == event_id), db).first()
+        cnt, qty = _waitlist_counts()  # a new statement: counts as of the lock
+        fixed += db.execute(
+            update(Event)
+            .where(Event.id == event_id, or_(Event.waitlisted_count != cnt, Event.waitlisted_qty != qty))
+            .values(waitlisted_count=cnt, waitlisted_qty=qty)
+            .returning(Event.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+    db.commit()
+    if fixed:
+        event_cache.touch(*fixed)
+    return len(fixed)
+
+
+def waitlist_reconcile_job() -> None:
+    from app.db import SessionLocal
+
+    # every API worker schedules this; with Redis one of them runs it per interval
+    if cache.take_turn("waitlist-reconcile", settings.WAITLIST_RECONCILE_SECONDS) is False:
+        return
+    with SessionLocal() as db:
+        reconcile_waitlist_counts(db)
+
+
+def _try_promote_waitlist(db: Session, event_id: int, _attempts: int = 3) -> None:
     """
     Promote WAITLISTED bookings into CONFIRMED while seats/capacity allow.
+    The admissible FIFO prefix is computed set-based (see _fifo_prefix), seats are
+    assigned in bulk and everything commits once, so the event row lock is held
+    for a fixed number of statements regardless of how many waiters there are.
     For seat-mapped events, promotion requires a full set of seats for the waiter (FIFO).
     """
     q = db.query(Event).filter(Event.id == event_id)
@@ -97,62 +211,253 @@ def _try_promote_waitlist(db: Session, event_id: int) -> None:
     if not ev or ev.status != "active":
         return
 
-    if _has_seatmap(db, event_id):
-        # Seat-map: only promote when we can assign a full set of seats to the next waiter
-        while True:
-            wl = (
-                db.query(Booking)
-                .filter(Booking.event_id == event_id, Booking.status == "WAITLISTED")
-                .order_by(Booking.created_at.asc(), Booking.id.asc())
-                .first()
+    if ev.seatmap_ready:
+        free = (
+            db.query(func.count(Seat.id))
+            .filter(Seat.event_id == event_id, _seat_free(_utcnow()))
+            .scalar()
+            or 0
+        )
+        waiters = _fifo_prefix(db, event_id, free)
+        if not waiters:
+            db.rollback()
+            return
+        # SKIP LOCKED: a skip_locked booking or hold may hold free seats while it
+        # waits for this event row; never wait on them here
+        seat_ids = [
+            r[0]
+            for r in _with_lock(
+                db.query(Seat.id).filter(Seat.event_id == event_id, _seat_free(_utcnow())),
+                db, skip_locked=True,
             )
-            if not wl:
+            .order_by(*seat_layout.SEAT_ORDER)
+            .limit(sum(qty for _, qty in waiters))
+            .all()
+        ]
+        # Seats may have been taken between the count and the lock: keep the prefix that still fits.
+        admitted, assignments, pos = [], [], 0
+        for bid, qty in waiters:
+            if pos + qty > len(seat_ids):
                 break
-
-            avail = (
-                _with_lock(
-                    db.query(Seat).filter(Seat.event_id == event_id, Seat.reserved == False),
-                    db
-                )
-                .order_by(Seat.row_label, Seat.col_number, Seat.label)
-                .limit(wl.qty)
-                .all()
-            )
-            if len(avail) < wl.qty:
-                break  # not enough seats yet for this waiter
-
-            wl.status = "CONFIRMED"
-            _attach_seats_to_booking(db, wl, avail)
-            ev.booked_count = (ev.booked_count or 0) + wl.qty
-            db.commit()
+            admitted.append(bid)
+            assignments.extend((sid, bid) for sid in seat_ids[pos:pos + qty])
+            pos += qty
+        if not admitted:
+            db.rollback()
+            return
+        total = pos
     else:
         # Capacity-only flow
         free = ev.capacity - (ev.booked_count or 0)
-        if free <= 0:
+        waiters = _fifo_prefix(db, event_id, free)
+        if not waiters:
+            db.rollback()
             return
-        waiters = (
-            db.query(Booking)
-            .filter(Booking.event_id == event_id, Booking.status == "WAITLISTED")
-            .order_by(Booking.created_at.asc(), Booking.id.asc())
-            .all()
-        )
-        changed = False
-        for w in waiters:
-            if w.qty <= free:
-                w.status = "CONFIRMED"
-                ev.booked_count = (ev.booked_count or 0) + w.qty
-                free -= w.qty
-                changed = True
-                if free <= 0:
-                    break
-        if changed:
-            db.commit()
+        admitted = [bid for bid, _ in waiters]
+        assignments = []
+        total = sum(qty for _, qty in waiters)
+
+    if not _confirm_waiters(db, admitted):
+        # A waiter was cancelled while we computed the prefix: start over.
+        db.rollback()
+        if _attempts > 1:
+            _try_promote_waitlist(db, event_id, _attempts - 1)
+        return
+    version = None
+    if assignments:
+        version = seat_index.bump_version(db, event_id)
+        _reserve_seats_bulk(db, assignments, version)
+    _adjust_waitlist(db, event_id, -len(admitted), -total)
+    ev.booked_count = (ev.booked_count or 0) + total
+    promoted = [(bid, "promoted") for bid in admitted]
+    outbox.before_commit(db, event_id, notify=promoted, bookings=len(admitted), seats_booked=total)
+    db.commit()
+    inventory_gate.adjust(event_id, -total)
+
+    outbox.after_commit(db, event_id, notify=promoted)
+    seat_feed.publish(event_id, version, [(sid, seat_index.RESERVED) for sid, _ in assignments], booked=total)
+
 
-    safe_delete("analytics:summary")
+# ---------------- seat-map materialization ----------------
+
+SEATMAP_PER_ROW = 10  # maps laid out from capacity: A1..A10, B1..
+
+
+def materialize_seatmap(db: Session, event_id: int) -> bool:
+    """
+    Lay out the seat map of an event that only has a capacity (SEATMAP_PER_ROW
+    seats per row, set-based) and flag it ready, in one transaction under the
+    event row lock. Bookings confirmed before that came through the capacity
+    flow; they take the first seats, in booking order. A capacity-flow admission
+    racing with this finds the flag set and retries on the map (_admit_capacity).
+    Returns False if there was nothing to do.
+    """
+    ev = _with_lock(db.query(Event).filter(Event.id == event_id), db).populate_existing().first()
+    if not ev or ev.seatmap_ready or (ev.capacity or 0) <= 0:
+        db.rollback()
+        return False
+
+    version = seat_index.bump_version(db, event_id, layout=True)
+    seat_layout.generate(db, event_id, 0, ev.capacity, SEATMAP_PER_ROW, "", version)
+    booked = db.query(Booking.id, Booking.qty).filter(
+        Booking.event_id == event_id, Booking.status == "CONFIRMED",
+    ).order_by(Booking.id).all()
+    if booked:
+        seat_ids = [
+            r[0]
+            for r in db.query(Seat.id).filter(Seat.event_id == event_id, _seat_free(_utcnow()))
+            .order_by(*seat_layout.SEAT_ORDER)
+            .limit(sum(qty for _, qty in booked))
+        ]
+        assignments, pos = [], 0
+        for bid, qty in booked:
+            assignments.extend((sid, bid) for sid in seat_ids[pos:pos + qty])
+            pos += qty
+        _reserve_seats_bulk(db, assignments, version)
+    ev.seatmap_ready = True
+    db.commit()
+    event_cache.touch(event_id, catalog=True)  # seatmap_ready
+    seat_feed.layout_changed(event_id)
+    return True
+
+
+def seatmap_sweep(db: Session, limit: int) -> int:
+    """Materialize up to <limit> events still without a seat map; returns how many were laid out."""
+    pending = [
+        r[0]
+        for r in db.query(Event.id)
+        .filter(Event.seatmap_ready == False, Event.capacity > 0)
+        .order_by(Event.id)
+        .limit(limit)
+    ]
+    db.rollback()
+    return sum(materialize_seatmap(db, event_id) for event_id in pending)
+
+
+def seatmap_job() -> None:
+    from app.db import SessionLocal
+
+    with SessionLocal() as db:
+        seatmap_sweep(db, settings.SEATMAP_SWEEP_BATCH)
+
+
+def seatmap_task(bind, event_id: int) -> None:
+    """BackgroundTasks entry point: lay out one event's map after the response, on the request's engine."""
+    with Session(bind=bind, autoflush=False) as db:
+        materialize_seatmap(db, event_id)
 
 
 # ---------------- create / cancel ----------------
 
+def _auto_assign(
+    db: Session, event_id: int, qty: int, now: datetime, skip_locked: bool,
+    prefer_contiguous: bool = False,
+) -> List[Seat]:
+    """
+    Lock the first <qty> free seats in seat-map order. Candidates come from the
+    in-memory seat index; the DB re-checks and locks them, and we fall back to
+    the ordered scan if any were taken meanwhile. In skip_locked mode concurrent
+    buyers see the same index, so over-fetch candidates and let SKIP LOCKED
+    spread them across disjoint seats.
+    With prefer_contiguous, first try the best-fitting blocks of adjacent seats
+    in one row (see SeatIndex.contiguous); if none can be locked whole, the
+    party is seated like any other booking.
+    """
+    order = seat_layout.SEAT_ORDER
+    if settings.SEAT_INDEX_ENABLED:
+        idx = seat_index.get(db, event_id)
+        if idx and prefer_contiguous and qty > 1:
+            for block in idx.contiguous(qty, limit=3 if skip_locked else 1):
+                chosen = _with_lock(
+                    db.query(Seat).filter(Seat.id.in_(block), Seat.event_id == event_id, _seat_free(now)),
+                    db, skip_locked=skip_locked,
+                ).order_by(*order).all()
+                if len(chosen) == qty:
+                    return chosen
+        candidates = idx.first_free(qty * 4 if skip_locked else qty, now) if idx else []
+        if len(candidates) >= qty:
+            chosen = _with_lock(
+                db.query(Seat).filter(Seat.id.in_(candidates), Seat.event_id == event_id, _seat_free(now)),
+                db, skip_locked=skip_locked,
+            ).order_by(*order).limit(qty).all()
+            if len(chosen) == qty:
+                return chosen
+    return _with_lock(
+        db.query(Seat).filter(Seat.event_id == event_id, _seat_free(now)),
+        db, skip_locked=skip_locked,
+    ).order_by(*order).limit(qty).all()
+
+
+def _find_idempotent(db: Session, idempotency_key: Optional[str], user_id: int, event_id: int) -> Optional[Booking]:
+    """
+    Existing booking for this (user, event, Idempotency-Key), decorated with seat
+    labels and marked `replayed` (it was not created by the current call).
+    """
+    if not idempotency_key:
+        return None
+    existing = db.execute(
+        select(Booking).where(
+            Booking.idempotency_key == idempotency_key,
+            Booking.user_id == user_id,
+            Booking.event_id == event_id,
+        )
+    ).scalars().first()
+    if existing:
+        # decorate with seat labels for response
+        existing.seat_labels = _seat_labels_for_booking(db, existing.id)
+        existing.replayed = True
+    return existing
+
+
+def _waitlist(db: Session, user_id: int, event_id: int, qty: int, idempotency_key: Optional[str]) -> Booking:
+    bk = Booking(
+        user_id=user_id, event_id=event_id, qty=qty,
+        status="WAITLISTED", idempotency_key=idempotency_key,
+    )
+    db.add(bk)
+    _adjust_waitlist(db, event_id, 1, qty)
+    db.flush()
+    outbox.before_commit(db, event_id, notify=[(bk.id, "waitlisted")])
+    db.commit(); db.refresh(bk)
+    bk.seat_labels = []
+    outbox.after_commit(db, event_id, notify=[(bk.id, "waitlisted")])
+    return bk
+
+
+def _admit_capacity(db: Session, event_id: int, qty: int, seatless: bool = False) -> bool:
+    """
+    Lock-free capacity admission: a single conditional UPDATE instead of
+    SELECT ... FOR UPDATE + read/modify/write. Zero rows back means the event is
+    full or no longer active, or (seatless) its seat map was laid out. The row
+    lock it takes lasts until the caller's commit, so issue it late, but before
+    seat_index.bump_version: the events row always comes before seat_versions.
+    """
+    conditions = [Event.id == event_id, Event.status == "active", Event.booked_count + qty <= Event.capacity]
+    if seatless:
+        conditions.append(Event.seatmap_ready == False)
+    row = db.execute(
+        update(Event)
+        .where(*conditions)
+        .values(booked_count=Event.booked_count + qty)
+        .returning(Event.booked_count)
+        .execution_options(synchronize_session=False)
+    ).first()
+    return row is not None
+
+
+def _not_admitted(
+    db: Session, ev: Event, user_id: int, event_id: int, qty: int,
+    idempotency_key: Optional[str], allow_waitlist: bool,
+) -> Booking:
+    """_admit_capacity returned no row: roll back the pending booking, then waitlist or 409."""
+    db.rollback()
+    if ev.status != "active":  # reloaded after rollback
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Event not active")
+    if allow_waitlist:
+        return _waitlist(db, user_id, event_id, qty, idempotency_key)
+    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Capacity exceeded")
+
+
 def create_booking(
     db: Session,
     user_id: int,
@@ -161,77 +466,124 @@ def create_booking(
     idempotency_key: Optional[str],
     allow_waitlist: bool = False,
     seat_ids: Optional[List[int]] = None,
+    hold_token: Optional[str] = None,
+    prefer_contiguous: bool = False,
 ) -> Booking:
     # Idempotency (scoped to user+event)
-    if idempotency_key:
-        existing = db.execute(
-            select(Booking).where(
-                Booking.idempotency_key == idempotency_key,
-                Booking.user_id == user_id,
-                Booking.event_id == event_id,
-            )
-        ).scalars().first()
-        if existing:
-            # decorate with seat labels for response
-            existing.seat_labels = _seat_labels_for_booking(db, existing.id)
-            return existing
+    existing = _find_idempotent(db, idempotency_key, user_id, event_id)
+    if existing:
+        return existing
+
+    # Flash-sale gate: sold-out requests never open a transaction on the event
+    admitted = inventory_gate.try_acquire(event_id, qty)
+    if admitted is False:
+        # the counter may outlive its event: answer for the event first (PK read, no lock)
+        ev_status = db.query(Event.status).filter(Event.id == event_id).scalar()
+        db.rollback()
+        if ev_status is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+        if ev_status != "active":
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Event not active")
+        if allow_waitlist:
+            return _waitlist(db, user_id, event_id, qty, idempotency_key)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Sold out")
+
+    try:
+        bk = _create_booking(
+            db, user_id, event_id, qty, idempotency_key, allow_waitlist, seat_ids, hold_token, prefer_contiguous,
+        )
+    except BaseException:
+        if admitted:
+            inventory_gate.release(event_id, qty)
+        raise
+    if admitted and (bk.status != "CONFIRMED" or getattr(bk, "replayed", False)):
+        # nothing was booked by this call (waitlisted, or a concurrent retry with
+        # the same Idempotency-Key won): give back what it took
+        inventory_gate.release(event_id, qty)
+    elif admitted is None:
+        inventory_gate.prime(db, event_id)
+    return bk
+
 
-    # Load and validate event
-    ev = _with_lock(db.query(Event).filter(Event.id == event_id), db).first()
+def _create_booking(
+    db: Session,
+    user_id: int,
+    event_id: int,
+    qty: int,
+    idempotency_key: Optional[str],
+    allow_waitlist: bool,
+    seat_ids: Optional[List[int]],
+    hold_token: Optional[str] = None,
+    prefer_contiguous: bool = False,
+) -> Booking:
+    # Load and validate event (no row lock here: the capacity flow admits with a
+    # conditional UPDATE; the seat-map flow locks the row below)
+    ev = db.query(Event).filter(Event.id == event_id).first()
     if not ev:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
     if ev.status != "active":
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Event not active")
 
-    # If event has no seats yet, auto-seed a grid from its capacity (idempotent)
-    if not _has_seatmap(db, ev.id) and (ev.capacity or 0) > 0:
-        _seed_basic_grid(db, ev.id, ev.capacity, per_row=10)
+    # --- Seat-map flow (the map is laid out off the request path, see materialize_seatmap) ---
+    if ev.seatmap_ready:
+        # skip_locked mode never locks the event row here: concurrent buyers claim
+        # disjoint seats via SKIP LOCKED and booked_count is admitted atomically.
+        # Converting a hold skips the event lock too: its seats are already ours.
+        skip_locked = settings.SEAT_ALLOCATION_MODE == "skip_locked"
+        lock_event = not (skip_locked or hold_token)
+        now = _utcnow()
+        if lock_event:
+            ev = _with_lock(db.query(Event).filter(Event.id == event_id), db).populate_existing().first()
+            if ev.status != "active":
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Event not active")
 
-    seatmap = _has_seatmap(db, event_id)
-
-    # --- Seat-map flow ---
-    if seatmap:
         # Only enforce qty==len(seat_ids) when seat_ids is provided and non-empty.
         if seat_ids is not None and len(seat_ids) > 0 and len(seat_ids) != qty:
             raise HTTPException(status_code=400, detail="qty must equal number of seat_ids")
 
-        if seat_ids and len(seat_ids) > 0:
-            # Explicit seat pick
+        if hold_token:
+            # Convert a live hold owned by this user
+            chosen = _with_lock(
+                db.query(Seat).filter(
+                    Seat.event_id == event_id,
+                    Seat.hold_token == hold_token,
+                    Seat.held_by == user_id,
+                    Seat.reserved == False,
+                    Seat.held_until >= now,
+                ),
+                db
+            ).order_by(*seat_layout.SEAT_ORDER).all()
+            if not chosen:
+                raise HTTPException(status_code=409, detail="Hold expired or not found")
+            if len(chosen) != qty:
+                raise HTTPException(status_code=400, detail="qty must equal number of held seats")
+        elif seat_ids and len(seat_ids) > 0:
+            # Explicit seat pick; the seat index turns away already-taken picks before any row lock
+            if settings.SEAT_INDEX_ENABLED and not allow_waitlist:
+                idx = seat_index.get(db, event_id)
+                taken = [idx.label(sid) for sid in seat_ids if idx.is_free(sid, now) is False] if idx else []
+                if taken:
+                    db.rollback()
+                    raise HTTPException(status_code=409, detail=f"Seat(s) not available: {', '.join(taken)}")
             seats = _with_lock(
                 db.query(Seat).filter(Seat.id.in_(seat_ids), Seat.event_id == event_id),
                 db
             ).all()
             if len(seats) != len(seat_ids):
                 raise HTTPException(status_code=404, detail="One or more seats not found")
-            taken = [s.label for s in seats if s.reserved]
+            taken = [s.label for s in seats if s.reserved or _held_by_other(s, now)]
             if taken:
                 if allow_waitlist:
-                    bk = Booking(
-                        user_id=user_id, event_id=event_id, qty=qty,
-                        status="WAITLISTED", idempotency_key=idempotency_key,
-                    )
-                    db.add(bk); db.commit(); db.refresh(bk)
-                    bk.seat_labels = []
-                    safe_delete("analytics:summary")
-                    return bk
+                    return _waitlist(db, user_id, event_id, qty, idempotency_key)
                 raise HTTPException(status_code=409, detail=f"Seat(s) not available: {', '.join(taken)}")
             chosen = seats
         else:
             # Auto-assign best available seats
-            chosen = _with_lock(
-                db.query(Seat).filter(Seat.event_id == event_id, Seat.reserved == False),
-                db
-            ).order_by(Seat.row_label, Seat.col_number, Seat.label).limit(qty).all()
+            chosen = _auto_assign(db, event_id, qty, now, skip_locked, prefer_contiguous)
             if len(chosen) < qty:
+                db.rollback()  # release any partially locked seats
                 if allow_waitlist:
-                    bk = Booking(
-                        user_id=user_id, event_id=event_id, qty=qty,
-                        status="WAITLISTED", idempotency_key=idempotency_key,
-                    )
-                    db.add(bk); db.commit(); db.refresh(bk)
-                    bk.seat_labels = []
-                    safe_delete("analytics:summary")
-                    return bk
+                    return _waitlist(db, user_id, event_id, qty, idempotency_key)
                 raise HTTPException(status_code=409, detail="Not enough seats available")
 
         # Create booking & reserve seats
@@ -240,73 +592,66 @@ def create_booking(
             status="CONFIRMED", idempotency_key=idempotency_key,
         )
         db.add(bk)
-        db.flush()  # to have bk.id
-        _attach_seats_to_booking(db, bk, chosen)
-        ev.booked_count = (ev.booked_count or 0) + qty
-
         try:
-            db.commit()
+            db.flush()  # to have bk.id
+            # Lock order for every seat writer: events row, then seat_versions
+            if not lock_event:
+                admitted = _admit_capacity(db, event_id, qty)
+            else:
+                ev.booked_count = (ev.booked_count or 0) + qty
+                admitted = True
+            if admitted:
+                version = seat_index.bump_version(db, event_id)
+                _attach_seats_to_booking(db, bk, chosen, version)
+                outbox.before_commit(db, event_id, notify=[(bk.id, "confirmed")], bookings=1, seats_booked=qty)
+                db.commit()
         except IntegrityError:
             db.rollback()
-            if idempotency_key:
-                existing = db.execute(
-                    select(Booking).where(
-                        Booking.idempotency_key == idempotency_key,
-                        Booking.user_id == user_id,
-                        Booking.event_id == event_id,
-                    )
-                ).scalars().first()
-                if existing:
-                    existing.seat_labels = _seat_labels_for_booking(db, existing.id)
-                    return existing
+            existing = _find_idempotent(db, idempotency_key, user_id, event_id)
+            if existing:
+                return existing
             raise
 
+        if not admitted:
+            return _not_admitted(db, ev, user_id, event_id, qty, idempotency_key, allow_waitlist)
+
         db.refresh(bk)
         bk.seat_labels = [s.label for s in chosen]
-        safe_delete("analytics:summary")
+        outbox.after_commit(db, event_id, notify=[(bk.id, "confirmed")])
+        seat_feed.publish(event_id, version, [(s.id, seat_index.RESERVED) for s in chosen], booked=qty)
         return bk
 
-    # --- Legacy capacity flow (no seat map) ---
-    current = (ev.booked_count or 0)
-    if current + qty > ev.capacity:
-        if allow_waitlist:
-            bk = Booking(
-                user_id=user_id, event_id=event_id, qty=qty,
-                status="WAITLISTED", idempotency_key=idempotency_key,
-            )
-            db.add(bk); db.commit(); db.refresh(bk)
-            bk.seat_labels = []
-            safe_delete("analytics:summary")
-            return bk
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Capacity exceeded")
-
+    # --- Capacity flow (no seat map): conditional-UPDATE admission ---
     bk = Booking(
         user_id=user_id, event_id=event_id, qty=qty,
         status="CONFIRMED", idempotency_key=idempotency_key,
     )
     db.add(bk)
-    ev.booked_count = current + qty
-
     try:
-        db.commit()
+        db.flush()
+        admitted = _admit_capacity(db, event_id, qty, seatless=True)
+        if admitted:
+            outbox.before_commit(db, event_id, notify=[(bk.id, "confirmed")], bookings=1, seats_booked=qty)
+            db.commit()
     except IntegrityError:
         db.rollback()
-        if idempotency_key:
-            existing = db.execute(
-                select(Booking).where(
-                    Booking.idempotency_key == idempotency_key,
-                    Booking.user_id == user_id,
-                    Booking.event_id == event_id,
-                )
-            ).scalars().first()
-            if existing:
-                existing.seat_labels = _seat_labels_for_booking(db, existing.id)
-                return existing
+        existing = _find_idempotent(db, idempotency_key, user_id, event_id)
+        if existing:
+            return existing
         raise
 
+    if not admitted:
+        db.rollback()
+        if ev.seatmap_ready:  # laid out meanwhile: book from the map instead
+            return _create_booking(
+                db, user_id, event_id, qty, idempotency_key, allow_waitlist, seat_ids, hold_token, prefer_contiguous,
+            )
+        return _not_admitted(db, ev, user_id, event_id, qty, idempotency_key, allow_waitlist)
+
     db.refresh(bk)
     bk.seat_labels = []
-    safe_delete("analytics:summary")
+    outbox.after_commit(db, event_id, notify=[(bk.id, "confirmed")])
+    seat_feed.publish(event_id, booked=qty)
     return bk
 
 
@@ -320,26 +665,37 @@ def cancel_booking(db: Session, booking_id: int, user_id: int, is_admin: bool) -
     ev = _with_lock(db.query(Event).filter(Event.id == bk.event_id), db).first()
     if not ev:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+    db.refresh(bk)  # a promotion may have confirmed it before we got the event lock
 
     if bk.status == "CONFIRMED":
         # Free seats if seat map exists
-        if _has_seatmap(db, bk.event_id):
+        freed, version = [], None
+        if ev.seatmap_ready:
             seats = _with_lock(db.query(Seat).filter(Seat.reserved_booking_id == bk.id), db).all()
+            version = seat_index.bump_version(db, bk.event_id) if seats else None
             for s in seats:
+                s.version = version
                 s.reserved = False
                 s.reserved_booking_id = None
+                freed.append(s.id)
         bk.status = "CANCELLED"
         ev.booked_count = max(0, (ev.booked_count or 0) - bk.qty)
+        outbox.before_commit(
+            db, bk.event_id, promote=True, notify=[(bk.id, "cancelled")], cancellations=1, seats_released=bk.qty,
+        )
         db.commit()
         db.refresh(bk)
-        safe_delete("analytics:summary")
-        # try promotions after freeing seats
-        _try_promote_waitlist(db, bk.event_id)
+        inventory_gate.release(bk.event_id, bk.qty)
+        seat_feed.publish(bk.event_id, version, [(sid, seat_index.FREE) for sid in freed], booked=-bk.qty)
+        # promotions after freeing seats (inline, or by the outbox worker)
+        outbox.after_commit(db, bk.event_id, promote=True, notify=[(bk.id, "cancelled")])
 
     elif bk.status == "WAITLISTED":
         bk.status = "CANCELLED"
+        _adjust_waitlist(db, bk.event_id, -1, -bk.qty)
+        outbox.before_commit(db, bk.event_id, notify=[(bk.id, "cancelled")], cancellations=1)
         db.commit()
         db.refresh(bk)
-        safe_delete("analytics:summary")
+        outbox.after_commit(db, bk.event_id, notify=[(bk.id, "cancelled")])
 
     return bk
@@ -0,0 +1,81 @@
+"""
+Read-through cache for GET /events and GET /events/{id}.
+
+Entries are keyed by a version counter in Redis: events:v:<id> per event and
+events:v for the catalogue (every list query). Writers call touch() after they
+commit; old entries are simply never read again and expire on their own
+(EVENT_CACHE_SECONDS). A booking, cancel or promotion bumps only its event:
+bumping the catalogue on every booking would empty every cached list many times
+a second during an on-sale. Admin writes (create, update, status, delete, seat
+map) also bump the catalogue. The counts a list shows (booked, waitlisted) are
+instead refreshed per EVENT_LIST_AVAILABILITY_SECONDS window, which is part of
+the list version, so a list is at most one window behind the bookings.
+
+The response body is cached as serialized JSON bytes (Redis, plus the
+per-worker local tier) and the ETag is derived from key + version, so a
+matching If-None-Match gets a 304 before the database or the serializer is
+touched. Without Redis everything is computed per request, as before.
+"""
+import hashlib
+import time
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request, Response
+
+from app.core import cache
+from app.core.config import settings
+
+CATALOG = "events:v"
+
+
+def _event_version_key(event_id: int) -> str:
+    return f"events:v:{event_id}"
+
+
+def touch(*event_ids: int, catalog: bool = False) -> None:
+    """Invalidate the given events, and every cached list when <catalog>. Call after commit."""
+    keys = [_event_version_key(i) for i in event_ids]
+    if catalog:
+        keys.append(CATALOG)
+    if keys:
+        cache.bump(*keys)
+
+
+def list_key(params: Dict[str, Any]) -> str:
+    """Cache key for a list query: the validated parameters, normalized and hashed."""
+    normalized = "&".join(
+        f"{k}={v.isoformat() if hasattr(v, 'isoformat') else v}"
+        for k, v in sorted(params.items()) if v is not None
+    )
+    return "events:list:" + hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def _respond(request: Request, key: str, version: Any, compute: Callable[[], Any],
+             ttl: int) -> Response:
+    if version is None:
+        return Response(content=cache.dumps(compute()), media_type="application/json")
+    key = f"{key}:{version}"
+    etag = '"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    match = request.headers.get("if-none-match")
+    if match and (match.strip() == "*" or etag in (t.strip().removeprefix("W/") for t in match.split(","))):
+        return Response(status_code=304, headers=headers)
+    body = cache.get_bytes(
+        key, compute,
+        soft_ttl=ttl, hard_ttl=ttl,
+        name="events",
+    )
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def event_response(request: Request, event_id: int, compute: Callable[[], Any]) -> Response:
+    return _respond(request, f"events:detail:{event_id}", cache.version(_event_version_key(event_id)), compute,
+                    settings.EVENT_CACHE_SECONDS)
+
+
+def list_response(request: Request, params: Dict[str, Any], compute: Callable[[], Any]) -> Response:
+    version, ttl = cache.version(CATALOG), settings.EVENT_CACHE_SECONDS
+    window = settings.EVENT_LIST_AVAILABILITY_SECONDS
+    if version is not None and window > 0:
+        version, ttl = f"{version}.{int(time.time() // window)}", min(ttl, window)
+    return _respond(request, list_key(params), version, compute, ttl)
@@ -0,0 +1,68 @@
+"""
+Event search for GET /events?q= and GET /events/suggest.
+
+On Postgres the substring filter lower(name|venue) LIKE '%q%' is served by the
+pg_trgm GIN indexes from migration 0010, results can be ranked by trigram word
+similarity, and name-prefix autocomplete walks a btree on lower(name) COLLATE "C"
+(byte order, so a prefix LIKE is a range scan that is already sorted). Other
+dialects (SQLite in tests) get the same filters unindexed and a prefix-first rank.
+"""
+from typing import List
+
+from sqlalchemy import Float, case, cast, func, literal
+from sqlalchemy.orm import Session
+
+from app.models.event import Event
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _is_pg(db: Session) -> bool:
+    return db.bind.dialect.name == "postgresql"
+
+
+def match(q: str):
+    """Filter: q appears in the event name or venue (case-insensitive)."""
+    pattern = f"%{_escape_like(q.lower())}%"
+    return (
+        func.lower(Event.name).like(pattern, escape="\\")
+        | func.lower(Event.venue).like(pattern, escape="\\")
+    )
+
+
+def rank(db: Session, q: str):
+    """Relevance (float8, higher is better); name hits outrank venue hits."""
+    term = q.lower()
+    if _is_pg(db):
+        return cast(
+            func.greatest(
+                func.word_similarity(literal(term), func.lower(Event.name)),
+                func.word_similarity(literal(term), func.lower(Event.venue)) * 0.5,
+            ),
+            Float,
+        )
+    esc = _escape_like(term)
+    return cast(
+        case(
+            (func.lower(Event.name).like(f"{esc}%", escape="\\"), 3),
+            (func.lower(Event.name).like(f"%{esc}%", escape="\\"), 2),
+            else_=1,
+        ),
+        Float,
+    )
+
+
+def suggest(db: Session, prefix: str, limit: int = 8) -> List[Event]:
+    """Active events whose name starts with <prefix>, alphabetical (index range scan on Postgres)."""
+    key = func.lower(Event.name)
+    if _is_pg(db):
+        key = key.collate("C")  # matches ix_events_name_prefix
+    return (
+        db.query(Event)
+        .filter(key.like(f"{_escape_like(prefix.lower())}%", escape="\\"), Event.status == "active")
+        .order_by(key, Event.id)
+        .limit(limit)
+        .all()
+    )
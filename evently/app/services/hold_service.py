@@ -0,0 +1,162 @@
+"""
+Temporary seat holds.
+
+A hold marks seats with a token and an expiry (seats.hold_token / held_until)
+in one short transaction that never locks the event row. While the hold is live
+the seats are skipped by auto-assign, explicit picks and waitlist promotion;
+POST /events/{id}/book with `hold_token` converts them into a booking. Expired
+holds already count as free in every query; the sweeper just clears them in
+batches and gives waitlisted bookings a chance at the freed seats.
+
+A user may hold at most SEAT_HOLD_MAX_SEATS live seats per event, and while a
+waiting room is open only with an admitted queue token (routes/holds.py).
+"""
+import uuid
+from datetime import timedelta
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.event import Event
+from app.models.seat import Seat
+from app.services import seat_feed, seat_index, seat_layout
+from app.services.booking_service import (
+    _held_by_other, _seat_free, _try_promote_waitlist, _utcnow, _with_lock,
+)
+
+def create_hold(
+    db: Session,
+    user_id: int,
+    event_id: int,
+    qty: Optional[int],
+    seat_ids: Optional[List[int]],
+    minutes: int,
+) -> dict:
+    ev = db.query(Event.id, Event.status, Event.seatmap_ready).filter(Event.id == event_id).first()
+    if not ev:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+    if ev.status != "active":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Event not active")
+    if not ev.seatmap_ready:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Seat map not ready yet")
+
+    now = _utcnow()
+    already = (
+        db.query(func.count(Seat.id))
+        .filter(Seat.event_id == event_id, Seat.held_by == user_id, Seat.held_until > now, Seat.reserved == False)
+        .scalar()
+    )
+    if already + (len(set(seat_ids)) if seat_ids else (qty or 0)) > settings.SEAT_HOLD_MAX_SEATS:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"At most {settings.SEAT_HOLD_MAX_SEATS} seats may be held per event",
+        )
+    if seat_ids:
+        seats = _with_lock(
+            db.query(Seat).filter(Seat.id.in_(seat_ids), Seat.event_id == event_id), db
+        ).all()
+        if len(seats) != len(set(seat_ids)):
+            raise HTTPException(status_code=404, detail="One or more seats not found")
+        taken = [s.label for s in seats if s.reserved or _held_by_other(s, now)]
+        if taken:
+            db.rollback()
+            raise HTTPException(status_code=409, detail=f"Seat(s) not available: {', '.join(taken)}")
+    else:
+        if not qty:
+            raise HTTPException(status_code=400, detail="qty or seat_ids required")
+        seats = _with_lock(
+            db.query(Seat).filter(Seat.event_id == event_id, _seat_free(now)),
+            db, skip_locked=True,
+        ).order_by(*seat_layout.SEAT_ORDER).limit(qty).all()
+        if len(seats) < qty:
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Not enough seats available")
+
+    token = uuid.uuid4().hex
+    until = now + timedelta(minutes=minutes)
+    version = seat_index.bump_version(db, event_id)
+    for s in seats:
+        s.version = version
+        s.hold_token = token
+        s.held_by = user_id
+        s.held_until = until
+    db.commit()
+    seat_feed.publish(event_id, version, [(s.id, seat_index.HELD) for s in seats])
+    return {
+        "token": token,
+        "event_id": event_id,
+        "seat_ids": [s.id for s in seats],
+        "seat_labels": [s.label for s in seats],
+        "expires_at": until,
+    }
+
+def release_hold(db: Session, token: str, user_id: int) -> int:
+    """Give <user_id>'s held seats back; 0 (nothing bumped or published) for anyone else's token."""
+    held = (
+        db.query(Seat.event_id)
+        .filter(Seat.hold_token == token, Seat.held_by == user_id, Seat.reserved == False)
+        .first()
+    )
+    if not held:
+        db.rollback()
+        return 0
+    version = seat_index.bump_version(db, held.event_id)
+    freed = db.execute(
+        update(Seat)
+        .where(Seat.hold_token == token, Seat.held_by == user_id, Seat.reserved == False)
+        .values(hold_token=None, held_by=None, held_until=None, version=version)
+        .returning(Seat.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    if not freed:  # converted into a booking meanwhile
+        db.rollback()
+        return 0
+    db.commit()
+    seat_feed.publish(held.event_id, version, [(sid, seat_index.FREE) for sid in freed])
+    _try_promote_waitlist(db, held.event_id)
+    return len(freed)
+
+def release_expired_holds(db: Session, batch_size: int = 500) -> int:
+    """Clear expired holds batch by batch, then try waitlist promotion on the touched events."""
+    released, events = 0, set()
+    while True:
+        rows = _with_lock(
+            db.query(Seat.id, Seat.event_id).filter(
+                Seat.held_until.is_not(None), Seat.held_until < _utcnow()
+            ),
+            db, skip_locked=True,
+        ).limit(batch_size).all()
+        if not rows:
+            db.rollback()
+            break
+        by_event = {}
+        for r in rows:
+            by_event.setdefault(r.event_id, []).append(r.id)
+        versions = {}
+        for event_id, ids in sorted(by_event.items()):  # stable lock order on events
+            versions[event_id] = seat_index.bump_version(db, event_id)
+            db.execute(
+                update(Seat)
+                .where(Seat.id.in_(ids))
+                .values(hold_token=None, held_by=None, held_until=None, version=versions[event_id])
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+        for event_id, ids in by_event.items():
+            seat_feed.publish(event_id, versions[event_id], [(sid, seat_index.FREE) for sid in ids])
+        released += len(rows)
+        events.update(by_event)
+        if len(rows) < batch_size:
+            break
+    for event_id in events:
+        _try_promote_waitlist(db, event_id)
+    return released
+
+def sweep_job() -> None:
+    from app.db import SessionLocal
+
+    with SessionLocal() as db:
+        release_expired_holds(db, settings.SEAT_HOLD_SWEEP_BATCH)
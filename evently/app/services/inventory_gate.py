@@ -0,0 +1,156 @@
+"""
+Redis admission gate for flash sales.
+
+Keeps a per-event "remaining inventory" counter (capacity - booked_count) in Redis
+and decrements it atomically with a Lua script before a booking reaches Postgres.
+Requests that cannot possibly succeed are turned away (or waitlisted) without
+touching the event row. Postgres stays authoritative: the counter may only
+over-estimate what is left, and a periodic reconcile corrects live counters from
+the DB (in one process per interval, whichever worker takes the Redis lock).
+Counters are created only by prime() on a booking and lapse
+INVENTORY_GATE_TTL_SECONDS later, so idle events hold no keys.
+"""
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core import cache
+from app.core.config import settings
+from app.models.event import Event
+
+_KEY = "inv:{}:remaining"
+_RECONCILE_LOCK = "inv:reconcile"
+
+# 1 = admitted (counter decremented), 0 = sold out, -1 = unknown (no counter yet)
+_ACQUIRE = """
+local v = redis.call('GET', KEYS[1])
+if not v then return -1 end
+if tonumber(v) < tonumber(ARGV[1]) then return 0 end
+redis.call('DECRBY', KEYS[1], ARGV[1])
+return 1
+"""
+# Reconcile: set the counter only if it still holds the value read before the DB
+# snapshot (KEEPTTL: reconciling never keeps an idle counter alive)
+_CAS = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  redis.call('SET', KEYS[1], ARGV[2], 'KEEPTTL')
+  return 1
+end
+return 0
+"""
+# Adjust only an existing counter; a missing one is re-primed from the DB.
+_ADJUST = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+  return redis.call('INCRBY', KEYS[1], ARGV[1])
+end
+return nil
+"""
+
+_scripts = {}
+
+def _script(c, name: str, body: str):
+    key = (id(c), name)
+    if key not in _scripts:
+        _scripts[key] = c.register_script(body)
+    return _scripts[key]
+
+def _client():
+    if not settings.INVENTORY_GATE_ENABLED:
+        return None
+    return cache._get_client()
+
+def try_acquire(event_id: int, qty: int) -> Optional[bool]:
+    """True = admitted, False = cannot succeed, None = gate has no opinion (go to DB)."""
+    c = _client()
+    if not c:
+        return None
+    try:
+        res = int(_script(c, "acquire", _ACQUIRE)(keys=[_KEY.format(event_id)], args=[qty]))
+    except Exception:
+        return None
+    if res < 0:
+        return None
+    return res == 1
+
+def adjust(event_id: int, delta: int) -> None:
+    """Give back (+) or consume (-) inventory after the DB changed booked_count."""
+    c = _client()
+    if not c or not delta:
+        return
+    try:
+        _script(c, "adjust", _ADJUST)(keys=[_KEY.format(event_id)], args=[delta])
+    except Exception:
+        pass
+
+def release(event_id: int, qty: int) -> None:
+    adjust(event_id, qty)
+
+def invalidate(event_id: int) -> None:
+    if _client():
+        cache.delete(_KEY.format(event_id))
+
+def prime(db: Session, event_id: int) -> None:
+    """Seed a missing counter from the DB (SET NX: never overwrites a live counter)."""
+    c = _client()
+    if not c:
+        return
+    row = (
+        db.query(Event.capacity, Event.booked_count, Event.status)
+        .filter(Event.id == event_id)
+        .first()
+    )
+    if not row or row.status != "active":
+        return
+    try:
+        c.set(_KEY.format(event_id), max(0, row.capacity - (row.booked_count or 0)),
+              nx=True, ex=settings.INVENTORY_GATE_TTL_SECONDS)
+    except Exception:
+        pass
+
+def reconcile(db: Session) -> int:
+    """
+    Correct the live counters of active events from events.booked_count; returns
+    how many were rewritten. Each counter is read before the DB snapshot and
+    compare-and-set after it: one that moved in between (an acquire, a release)
+    is left alone until the next pass, so an update is never overwritten with an
+    older count. Missing counters are not created.
+    """
+    c = _client()
+    if not c:
+        return 0
+    ids = [i for (i,) in db.query(Event.id).filter(Event.status == "active")]
+    if not ids:
+        return 0
+    try:
+        seen = {i: v for i, v in zip(ids, c.mget([_KEY.format(i) for i in ids])) if v is not None}
+    except Exception:
+        return 0
+    if not seen:
+        return 0
+    db.rollback()  # the snapshot below must start after the counters were read
+    rows = (
+        db.query(Event.id, Event.capacity, Event.booked_count)
+        .filter(Event.id.in_(seen), Event.status == "active")
+        .all()
+    )
+    cas = _script(c, "cas", _CAS)
+    try:
+        pipe = c.pipeline(transaction=False)
+        for r in rows:
+            cas(keys=[_KEY.format(r.id)], args=[seen[r.id], max(0, r.capacity - (r.booked_count or 0))],
+                client=pipe)
+        return sum(pipe.execute())
+    except Exception:
+        return 0
+
+def _reconcile_turn() -> bool:
+    """True for the one process that takes this interval's reconcile (the lock expires just before the next)."""
+    return bool(_client() and cache.take_turn(_RECONCILE_LOCK, settings.INVENTORY_RECONCILE_SECONDS))
+
+def reconcile_job() -> None:
+    from app.db import SessionLocal
+
+    if not _reconcile_turn():
+        return
+    with SessionLocal() as db:
+        reconcile(db)
@@ -0,0 +1,187 @@
+"""
+Transactional outbox for the side effects of booking and admin writes.
+
+A write names what must follow it with before_commit() (inside its transaction)
+and after_commit() (right after): the event_daily_stats rollup counts, the
+analytics summary / event cache invalidation, a waitlist promotion pass for the
+event and the users to notify.
+
+OUTBOX_ENABLED=0: the rollup is written in the transaction and the rest runs
+inline in after_commit(), so a cancel waits for the whole promotion cascade.
+
+OUTBOX_ENABLED=1: before_commit() inserts one outbox row in the same transaction
+and after_commit() does nothing. The worker (python -m app.worker) drains the
+table in batches with drain():
+  1. claim up to OUTBOX_BATCH rows, oldest first, FOR UPDATE SKIP LOCKED, so
+     several workers can share the table;
+  2. promote waitlists, invalidate caches and send notifications;
+  3. apply the rollups summed per (event, day) and delete the rows, in the
+     claiming transaction.
+A worker that dies before step 3 commits leaves its rows to be claimed again:
+delivery is at-least-once for step 2 (promotion and invalidation are
+idempotent; a notification may repeat) and exactly-once for the rollups.
+"""
+import logging
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy.orm import Session
+
+from app.core.cache import mark_stale
+from app.core.config import settings
+from app.models.booking import Booking
+from app.models.outbox import OutboxMessage
+from app.services import analytics_service, event_cache
+
+log = logging.getLogger(__name__)
+notifications = logging.getLogger("evently.notifications")
+
+OUTBOX_LAG = Gauge("evently_outbox_lag_seconds", "Age of the oldest unprocessed outbox message")
+OUTBOX_MESSAGES = Counter("evently_outbox_messages_total", "Outbox messages handled by the worker")
+
+_COUNTS = ("bookings", "cancellations", "seats_booked", "seats_released")
+
+
+def before_commit(
+    db: Session,
+    event_id: int,
+    promote: bool = False,
+    notify: Iterable[Tuple[int, str]] = (),
+    catalog: bool = False,
+    **counts: int,
+) -> None:
+    """
+    Inside the write's transaction. <counts> are analytics_service.record()
+    counters; <notify> is (booking_id, what happened) pairs; <catalog> marks a
+    change to what event lists show beyond availability (see event_cache.touch).
+    """
+    counts = {k: v for k, v in counts.items() if v}
+    if not settings.OUTBOX_ENABLED:
+        if counts:
+            analytics_service.record(db, event_id, **counts)
+        return
+    payload = {"day": datetime.now(timezone.utc).date().isoformat(), "promote": promote}
+    if catalog:
+        payload["catalog"] = True
+    if counts:
+        payload["counts"] = counts
+    notify = [list(n) for n in notify]
+    if notify:
+        payload["notify"] = notify
+    db.add(OutboxMessage(event_id=event_id, payload=payload))
+
+
+def after_commit(
+    db: Session,
+    event_id: int,
+    promote: bool = False,
+    notify: Iterable[Tuple[int, str]] = (),
+    catalog: bool = False,
+) -> None:
+    """Right after the commit: the inline side effects, unless the worker has them."""
+    if settings.OUTBOX_ENABLED:
+        return
+    from app.services.booking_service import _try_promote_waitlist
+
+    mark_stale("analytics:summary")
+    event_cache.touch(event_id, catalog=catalog)
+    _notify(db, notify)
+    if promote:
+        _try_promote_waitlist(db, event_id)
+
+
+def _notify(db: Session, notify: Iterable[Tuple[int, str]]) -> None:
+    """One structured log line per booking on the evently.notifications logger (the delivery hook)."""
+    notify = list(notify)
+    if not notify:
+        return
+    what = {bid: kind for bid, kind in notify}
+    for bk in db.query(Booking.id, Booking.user_id, Booking.event_id, Booking.qty, Booking.status).filter(
+        Booking.id.in_(what)
+    ):
+        notifications.info(
+            "booking %s", what[bk.id],
+            extra={"booking_id": bk.id, "user_id": bk.user_id, "event_id": bk.event_id,
+                   "qty": bk.qty, "status": bk.status},
+        )
+
+
+# ---------------- worker side ----------------
+
+def drain(session_factory: Callable[[], Session], limit: int) -> int:
+    """Handle one batch of up to <limit> messages; returns how many were handled."""
+    from app.services.booking_service import _try_promote_waitlist, _with_lock
+
+    with session_factory() as db:
+        batch: List[OutboxMessage] = _with_lock(
+            db.query(OutboxMessage).order_by(OutboxMessage.id), db, skip_locked=True,
+        ).limit(limit).all()
+        if not batch:
+            db.rollback()
+            return 0
+
+        touched, catalog, promote, notify = set(), set(), set(), []
+        rollups: Dict[Tuple[int, str], Dict[str, int]] = {}
+        for m in batch:
+            p = m.payload
+            if m.event_id is not None:
+                touched.add(m.event_id)
+                if p.get("catalog"):
+                    catalog.add(m.event_id)
+                if p.get("promote"):
+                    promote.add(m.event_id)
+            notify.extend(p.get("notify", ()))
+            if p.get("counts"):
+                acc = rollups.setdefault((m.event_id, p["day"]), dict.fromkeys(_COUNTS, 0))
+                for k, v in p["counts"].items():
+                    acc[k] += v
+
+        # Side effects in their own session: promotion commits as it goes, while
+        # the claimed rows stay locked until the end
+        with session_factory() as work:
+            for event_id in sorted(promote):
+                _try_promote_waitlist(work, event_id)
+            _notify(work, notify)
+        event_cache.touch(*touched - catalog)
+        event_cache.touch(*catalog, catalog=True)
+        mark_stale("analytics:summary")
+
+        for (event_id, day), counts in sorted(rollups.items()):
+            analytics_service.record(db, event_id, day=date.fromisoformat(day), **counts)
+        db.query(OutboxMessage).filter(OutboxMessage.id.in_([m.id for m in batch])).delete(
+            synchronize_session=False
+        )
+        db.commit()
+    if rollups:
+        mark_stale("analytics:summary")  # the summary reads the rollups just committed
+    OUTBOX_MESSAGES.inc(len(batch))
+    return len(batch)
+
+
+def lag_seconds(db: Session) -> float:
+    """Age of the oldest message still in the table (0 when empty)."""
+    oldest: Optional[datetime] = (
+        db.query(OutboxMessage.created_at).order_by(OutboxMessage.id).limit(1).scalar()
+    )
+    db.rollback()
+    if oldest is None:
+        return 0.0
+    if oldest.tzinfo is None:  # SQLite hands back naive UTC
+        oldest = oldest.replace(tzinfo=timezone.utc)
+    return max(0.0, (datetime.now(timezone.utc) - oldest).total_seconds())
+
+
+def run(session_factory: Callable[[], Session], stop) -> None:
+    """Worker loop until <stop> (a threading.Event) is set: drain, export the lag, poll when idle."""
+    while not stop.is_set():
+        try:
+            handled = drain(session_factory, settings.OUTBOX_BATCH)
+            with session_factory() as db:
+                OUTBOX_LAG.set(lag_seconds(db))
+        except Exception:
+            log.exception("outbox batch failed; retrying")
+            handled = 0
+            stop.wait(1)
+        if handled < settings.OUTBOX_BATCH:
+            stop.wait(settings.OUTBOX_POLL_SECONDS)
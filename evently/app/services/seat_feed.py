@@ -0,0 +1,186 @@
+"""
+Live seat availability over Server-Sent Events.
+
+Writers publish a small delta to the Redis channel seats:<event_id> after their
+commit: the seats that changed as [seat_id, state] pairs (states as in
+seat_index: 0 free, 1 reserved, 2 held), the seat version they were
+stamped with, and the change to booked_count. Seat-map additions/removals
+publish a "layout" message instead.
+
+Each API worker runs one hub task on its event loop with a single pattern
+subscription (seats:*). It formats every message into an SSE frame once and
+hands the same bytes to the queue of every local subscriber of that event, so a
+reader costs a queue slot, not a DB query or a Redis connection. A subscriber
+that falls QUEUE frames behind, or any subscriber while the hub is reconnecting
+to Redis, gets a "resync" frame and should re-read GET /events/{id}/seatmap
+(?since_version= its last version). Seat versions go up by one per write, so a
+client that sees a version jump has missed a message and does the same.
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core import cache
+from app.core.config import settings
+from app.models.event import Event
+from app.services import seat_index
+
+log = logging.getLogger(__name__)
+
+_PATTERN = "seats:*"
+
+RESYNC = b'event: resync\ndata: {}\n\n'
+PING = b": ping\n\n"
+
+
+def _channel(event_id: int) -> str:
+    return f"seats:{event_id}"
+
+
+# ---------------- publishing (sync, after commit) ----------------
+
+def publish(
+    event_id: int,
+    version: Optional[int] = None,
+    changes: Iterable[Tuple[int, int]] = (),
+    booked: int = 0,
+    kind: str = "seats",
+) -> None:
+    """Best effort: without Redis subscribers simply miss it and resync on the version gap."""
+    c = cache._get_client()
+    if not c:
+        return
+    body = {"type": kind, "event_id": event_id, "version": version,
+            "changes": [list(ch) for ch in changes], "booked": booked}
+    try:
+        c.publish(_channel(event_id), cache.dumps(body))
+    except Exception:
+        pass
+
+
+def layout_changed(event_id: int) -> None:
+    publish(event_id, kind="layout")
+
+
+# ---------------- fan-out (per worker, on the event loop) ----------------
+
+def frame(kind: str, data: bytes) -> bytes:
+    return b"event: " + kind.encode() + b"\ndata: " + data + b"\n\n"
+
+
+class _Hub:
+    def __init__(self) -> None:
+        self.subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, event_id: int) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=settings.SEAT_FEED_QUEUE)
+        self.subscribers.setdefault(event_id, set()).add(q)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return q
+
+    def unsubscribe(self, event_id: int, q: asyncio.Queue) -> None:
+        subs = self.subscribers.get(event_id)
+        if subs is not None:
+            subs.discard(q)
+            if not subs:
+                del self.subscribers[event_id]
+
+    @staticmethod
+    def _offer(q: asyncio.Queue, data: bytes) -> None:
+        try:
+            q.put_nowait(data)
+        except asyncio.QueueFull:
+            # too far behind to catch up frame by frame
+            while not q.empty():
+                q.get_nowait()
+            q.put_nowait(RESYNC)
+
+    def dispatch(self, event_id: int, data: bytes) -> None:
+        for q in tuple(self.subscribers.get(event_id, ())):
+            self._offer(q, data)
+
+    def _resync_all(self) -> None:
+        for subs in tuple(self.subscribers.values()):
+            for q in tuple(subs):
+                self._offer(q, RESYNC)
+
+    async def _run(self) -> None:
+        while self.subscribers:
+            c = cache.get_async_client()
+            if c is None:
+                await asyncio.sleep(1)
+                continue
+            ps = c.pubsub(ignore_subscribe_messages=True)
+            try:
+                await ps.psubscribe(_PATTERN)
+                self._resync_all()  # anything published while (re)connecting was missed
+                while self.subscribers:
+                    msg = await ps.get_message(timeout=1.0)
+                    if not msg or msg.get("type") != "pmessage":
+                        continue
+                    channel = msg["channel"]
+                    channel = channel.decode() if isinstance(channel, bytes) else channel
+                    data = msg["data"] if isinstance(msg["data"], bytes) else msg["data"].encode()
+                    try:
+                        event_id = int(channel.rsplit(":", 1)[1])
+                        kind = json.loads(data).get("type", "seats")
+                    except (ValueError, AttributeError):
+                        continue
+                    self.dispatch(event_id, frame(kind, data))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.warning("seat feed lost Redis; retrying")
+                self._resync_all()
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await ps.aclose()
+                except Exception:
+                    pass
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+hub = _Hub()
+
+
+def hello(db: Session, event_id: int, since_version: Optional[int], now: datetime) -> Optional[bytes]:
+    """
+    First frame of a stream: current version, layout_version and booked_count,
+    plus the seats changed after since_version when given (the catch-up between
+    a client's GET /seatmap and its subscription). None if the event does not exist.
+    """
+    head = seat_index.head(db, event_id, Event.booked_count)
+    if head is None:
+        return None
+    body = {"type": "hello", "event_id": event_id, "version": head.version,
+            "layout_version": head.layout_version, "booked_count": head.booked_count, "changes": []}
+    if since_version is not None:
+        body.update(seat_index.changes(db, event_id, since_version, now))
+    return frame("hello", cache.dumps(body))
+
+
+async def stream(event_id: int, q: asyncio.Queue, first: bytes, is_disconnected):
+    """SSE body for one subscriber: <first>, then hub frames, with a comment ping while idle."""
+    try:
+        yield first
+        while True:
+            try:
+                data = await asyncio.wait_for(q.get(), timeout=settings.SEAT_FEED_PING_SECONDS)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    return
+                data = PING
+            yield data
+    finally:
+        hub.unsubscribe(event_id, q)
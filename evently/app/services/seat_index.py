@@ -0,0 +1,425 @@
+"""
+Per-event seat availability index, kept in process memory.
+
+Each event's seats are laid out row-major in the seat-map order
+(seat_layout.SEAT_ORDER: row by length then label, col_number, label) with one state byte per seat in a bytearray, so
+"first N free seats" is a C-level bytearray.find() and "is seat X free" is a
+binary search over the id array. Group bookings ask contiguous() for the
+best-fitting run of adjacent free seats from a sorted free-run list. Nothing
+here is authoritative: every seat write bumps seat_versions.version in the same
+transaction and stamps the touched seats with the new value (seats.version), so
+a reader compares versions with one PK lookup and pulls only the seats that
+changed since. Adding or removing seats bumps seat_versions.layout_version,
+which forces a full rebuild. Allocation still locks and re-checks the candidate
+seats in the DB.
+
+Memory is about 9 bytes per seat (id + state byte; 16 more when ids do not rise
+in seat-map order): rows, columns and labels are kept per segment of adjacent
+seats, not per seat. A cold index is built once per event however many
+requests miss it together.
+
+The same versions drive the compact seat-map wire format (compact() / changes()):
+row layout once per layout_version, state as two base64 bitmaps, and deltas of
+the seats whose version is past the client's.
+"""
+import base64
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.event import Event
+from app.models.seat import Seat
+from app.models.seat_version import SeatVersion
+from app.services import seat_layout
+
+FREE, RESERVED, HELD = 0, 1, 2
+
+_FREE_BYTE = bytes([FREE])
+_BUSY_BYTE = bytes([RESERVED])
+# state -> 0 free / 1 busy; live and expired holds both count as busy for runs
+_BUSY_TABLE = bytes([FREE] + [RESERVED] * 255)
+# state -> ASCII '1'/'0' for the compact bitmaps
+_RESERVED_BITS = bytes(ord("1") if s == RESERVED else ord("0") for s in range(256))
+_HELD_BITS = bytes(ord("1") if s == HELD else ord("0") for s in range(256))
+
+
+def _bitmap(bits: bytes) -> str:
+    """ASCII '0'/'1' per seat -> base64, seat i at bit 7 - i % 8 of byte i // 8."""
+    if not bits:
+        return ""
+    pad = -len(bits) % 8
+    packed = int(bits + b"0" * pad, 2).to_bytes((len(bits) + pad) // 8, "big")
+    return base64.b64encode(packed).decode()
+
+
+def _aware(ts: Optional[datetime]) -> Optional[datetime]:
+    if ts is not None and ts.tzinfo is None:  # SQLite hands back naive UTC
+        return ts.replace(tzinfo=timezone.utc)
+    return ts
+
+
+# Per segment: (row_label, first col_number, label separator or the explicit labels)
+_Segment = Tuple[Optional[str], Optional[int], Union[str, List[str]]]
+
+
+class SeatIndex:
+    __slots__ = (
+        "event_id", "version", "layout_version",
+        "ids", "state", "holds", "segments",
+        "_starts", "_meta", "_by_id", "_pos_of", "_runs", "_layout",
+    )
+
+    def __init__(self, event_id: int, version: int, layout_version: int):
+        self.event_id = event_id
+        self.version = version
+        self.layout_version = layout_version
+        self.ids = array("q")
+        self.state = bytearray()
+        self.holds: Dict[int, datetime] = {}  # pos -> held_until, only for HELD seats
+        # [start, end) position ranges of physically adjacent seats (same row, consecutive
+        # col_number) and what they look like; fixed per layout_version
+        self.segments: List[Tuple[int, int]] = []
+        self._starts = array("q")
+        self._meta: List[_Segment] = []
+        # id -> position when ids do not rise in seat-map order (else ids itself is searched)
+        self._by_id: Optional[array] = None
+        self._pos_of: Optional[array] = None
+        self._runs: Optional[List[Tuple[int, int]]] = None
+        self._layout: Optional[List[dict]] = None  # compact() rows, fixed per layout_version
+
+    def _share_layout(self, other: "SeatIndex") -> None:
+        for name in ("ids", "segments", "_starts", "_meta", "_by_id", "_pos_of", "_layout"):
+            setattr(self, name, getattr(other, name))
+
+    def _position(self, seat_id: int) -> Optional[int]:
+        keys = self.ids if self._by_id is None else self._by_id
+        k = bisect_left(keys, seat_id)
+        if k == len(keys) or keys[k] != seat_id:
+            return None
+        return k if self._pos_of is None else self._pos_of[k]
+
+    def _seat_at(self, i: int) -> Tuple[Optional[str], Optional[int], str]:
+        """(row_label, col_number, label) of position <i>."""
+        k = bisect_right(self._starts, i) - 1
+        row, col, labels = self._meta[k]
+        off = i - self._starts[k]
+        label = labels[off] if isinstance(labels, list) else f"{row}{labels}{col + off}"
+        return row, None if col is None else col + off, label
+
+    def label(self, seat_id: int) -> Optional[str]:
+        i = self._position(seat_id)
+        return None if i is None else self._seat_at(i)[2]
+
+    def _set(self, i: int, reserved: bool, held_until: Optional[datetime]) -> None:
+        self.holds.pop(i, None)
+        if reserved:
+            self.state[i] = RESERVED
+        elif held_until is not None:
+            self.state[i] = HELD
+            self.holds[i] = _aware(held_until)
+        else:
+            self.state[i] = FREE
+
+    def _is_free_at(self, i: int, now: datetime) -> bool:
+        s = self.state[i]
+        return s == FREE or (s == HELD and self.holds[i] < now)
+
+    def is_free(self, seat_id: int, now: datetime) -> Optional[bool]:
+        """None if the seat is not part of this event."""
+        i = self._position(seat_id)
+        if i is None:
+            return None
+        return self._is_free_at(i, now)
+    def first_free(self, n: int, now: datetime) -> List[int]:
+        """Seat ids of the first <n> free seats in seat-map order (expired holds count as free)."""
+        found: List[int] = []
+        expired = sorted(i for i, until in self.holds.items() if until < now)
+        e, i = 0, self.state.find(_FREE_BYTE)
+        while len(found) < n:
+            if e < len(expired) and (i < 0 or expired[e] < i):
+                found.append(expired[e])
+                e += 1
+            elif i >= 0:
+                found.append(i)
+                i = self.state.find(_FREE_BYTE, i + 1)
+            else:
+                break
+        return [self.ids[i] for i in found]
+
+    def free_count(self, now: datetime) -> int:
+        return self.state.count(_FREE_BYTE) + sum(1 for until in self.holds.values() if until < now)
+
+    def _free_runs(self) -> List[Tuple[int, int]]:
+        """
+        Sorted (length, start) of every maximal run of free adjacent seats. Built
+        once per index version with C-level find() over a 0/1 view of the state,
+        then shared by every lookup until the next delta produces a new index.
+        """
+        if self._runs is None:
+            busy = self.state.translate(_BUSY_TABLE)
+            runs = []
+            for a, b in self.segments:
+                i = busy.find(_FREE_BYTE, a, b)
+                while i >= 0:
+                    j = busy.find(_BUSY_BYTE, i, b)
+                    if j < 0:
+                        j = b
+                    runs.append((j - i, i))
+                    i = busy.find(_FREE_BYTE, j, b)
+            runs.sort()
+            self._runs = runs
+        return self._runs
+
+    def contiguous(self, n: int, limit: int = 1) -> List[List[int]]:
+        """
+        Up to <limit> candidate blocks of <n> adjacent free seats, best first:
+        the shortest run that fits (best-fit, keeps big runs for big parties),
+        ties broken by seat-map position (nearest to the front). Seats are
+        taken from the front end of each run.
+        """
+        runs = self._free_runs()
+        k = bisect_left(runs, (n, -1))
+        return [list(self.ids[start:start + n]) for _, start in runs[k:k + limit]]
+
+    def seats(self, now: datetime) -> List[dict]:
+        """Seat-map rows shaped like SeatOut, without loading ORM objects."""
+        state, holds, ids, out = self.state, self.holds, self.ids, []
+        for (a, b), (row, col, labels) in zip(self.segments, self._meta):
+            for off, i in enumerate(range(a, b)):
+                out.append({
+                    "id": ids[i],
+                    "event_id": self.event_id,
+                    "label": labels[off] if isinstance(labels, list) else f"{row}{labels}{col + off}",
+                    "row_label": row,
+                    "col_number": None if col is None else col + off,
+                    "reserved": state[i] == RESERVED,
+                    "held": state[i] == HELD and holds[i] >= now,
+                })
+        return out
+
+    def _rows(self) -> List[dict]:
+        """
+        One entry per segment: row label, first col_number and seat count, the
+        first seat id when ids run consecutively (else "ids"), and the label
+        separator when labels are row + sep + col (else "labels").
+        """
+        if self._layout is None:
+            layout = []
+            for (a, b), (row, col, labels) in zip(self.segments, self._meta):
+                n = b - a
+                entry = {"row": row, "col": col, "n": n}
+                ids = self.ids[a:b]
+                if ids == array("q", range(ids[0], ids[0] + n)):
+                    entry["id"] = ids[0]
+                else:
+                    entry["ids"] = list(ids)
+                if isinstance(labels, list):
+                    entry["labels"] = labels
+                else:
+                    entry["sep"] = labels
+                layout.append(entry)
+            self._layout = layout
+        return self._layout
+
+    def compact(self, now: datetime) -> dict:
+        """The seat map as layout rows + reserved/held bitmaps in seat-map order."""
+        held = bytearray(self.state.translate(_HELD_BITS))
+        for i, until in self.holds.items():
+            if until < now:
+                held[i] = ord("0")
+        return {
+            "event_id": self.event_id,
+            "version": self.version,
+            "layout_version": self.layout_version,
+            "seats": len(self.state),
+            "rows": self._rows(),
+            "reserved": _bitmap(self.state.translate(_RESERVED_BITS)),
+            "held": _bitmap(bytes(held)),
+        }
+
+
+_lock = threading.Lock()
+_indexes: "OrderedDict[int, SeatIndex]" = OrderedDict()
+# single-flight builds: one stripe per event id, so a cold event is read from the DB once
+_build_locks = [threading.Lock() for _ in range(64)]
+
+
+def bump_version(db: Session, event_id: int, layout: bool = False) -> int:
+    """
+    Bump seat_versions.version inside the caller's transaction and return the new
+    value; stamp it on every seat the transaction touches. The row lock this
+    takes orders concurrent seat writers of the event, so versions become
+    visible in commit order. It is the event's counter row, not the events row,
+    so seat writers queue behind each other only from the bump to their commit.
+    Lock order: a writer that touches the events row (row lock, admission
+    UPDATE, booked_count) does so before the bump, never after. Bump right
+    before the seat UPDATEs.
+    """
+    insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(SeatVersion).values(event_id=event_id, version=1, layout_version=1 if layout else 0)
+    t = SeatVersion.__table__.c
+    bumped = {"version": t.version + 1}
+    if layout:
+        bumped["layout_version"] = t.layout_version + 1
+    return db.execute(
+        stmt.on_conflict_do_update(index_elements=[t.event_id], set_=bumped).returning(t.version)
+    ).scalar_one()
+
+
+def head(db: Session, event_id: int, *columns):
+    """(version, layout_version, *columns of events) of an event; None if it does not exist."""
+    return db.execute(
+        select(
+            func.coalesce(SeatVersion.version, 0).label("version"),
+            func.coalesce(SeatVersion.layout_version, 0).label("layout_version"),
+            *columns,
+        )
+        .select_from(Event)
+        .outerjoin(SeatVersion, SeatVersion.event_id == Event.id)
+        .where(Event.id == event_id)
+    ).first()
+
+
+def _segment_meta(row: Optional[str], col: Optional[int], labels: List[str]) -> _Segment:
+    for sep in ("", "-"):
+        if col is not None and labels == [f"{row}{sep}{c}" for c in range(col, col + len(labels))]:
+            return row, col, sep
+    return row, col, labels
+
+
+def _build(db: Session, event_id: int, version: int, layout_version: int) -> SeatIndex:
+    idx = SeatIndex(event_id, version, layout_version)
+    rows = db.execute(
+        select(Seat.id, Seat.label, Seat.row_label, Seat.col_number,
+               Seat.reserved, Seat.held_until, Seat.version)
+        .where(Seat.event_id == event_id)
+        .order_by(*seat_layout.SEAT_ORDER)
+    ).all()
+    idx.state = bytearray(len(rows))
+    seg_start, labels = 0, []
+    for i, r in enumerate(rows):
+        if i and (r.row_label != rows[i - 1].row_label or r.col_number is None
+                  or rows[i - 1].col_number is None or r.col_number != rows[i - 1].col_number + 1):
+            idx.segments.append((seg_start, i))
+            idx._meta.append(_segment_meta(rows[seg_start].row_label, rows[seg_start].col_number, labels))
+            seg_start, labels = i, []
+        idx.ids.append(r.id)
+        labels.append(r.label)
+        idx._set(i, r.reserved, r.held_until)
+        if r.version > idx.version:
+            idx.version = r.version
+    if rows:
+        idx.segments.append((seg_start, len(rows)))
+        idx._meta.append(_segment_meta(rows[seg_start].row_label, rows[seg_start].col_number, labels))
+    idx._starts = array("q", (a for a, _ in idx.segments))
+    if any(idx.ids[i] >= idx.ids[i + 1] for i in range(len(idx.ids) - 1)):
+        order = sorted(range(len(idx.ids)), key=idx.ids.__getitem__)
+        idx._by_id = array("q", (idx.ids[i] for i in order))
+        idx._pos_of = array("q", order)
+    return idx
+
+
+def _apply_delta(db: Session, idx: SeatIndex, version: int) -> bool:
+    """Pull seats changed since idx.version; False if the layout moved under us."""
+    rows = db.execute(
+        select(Seat.id, Seat.reserved, Seat.held_until, Seat.version)
+        .where(Seat.event_id == idx.event_id, Seat.version > idx.version)
+    ).all()
+    for r in rows:
+        i = idx._position(r.id)
+        if i is None:
+            return False
+        idx._set(i, r.reserved, r.held_until)
+        version = max(version, r.version)
+    idx.version = version
+    return True
+
+
+def get(db: Session, event_id: int) -> Optional[SeatIndex]:
+    """
+    Up-to-date index for the event (as of the versions read here), or None if
+    the event does not exist. The returned object may be shared with other
+    threads; treat it as read-only.
+    """
+    h = head(db, event_id)
+    if h is None:
+        return None
+    version, layout_version = h
+
+    def _current() -> Optional[SeatIndex]:
+        with _lock:
+            idx = _indexes.get(event_id)
+            if idx is not None:
+                _indexes.move_to_end(event_id)
+        return idx
+
+    idx = _current()
+    if idx is not None and idx.layout_version == layout_version and idx.version >= version:
+        return idx
+
+    with _build_locks[event_id % len(_build_locks)]:
+        idx = _current()  # built or refreshed by whoever held the lock before us?
+        if idx is not None and idx.layout_version == layout_version and idx.version >= version:
+            return idx
+        if idx is not None and idx.layout_version == layout_version:
+            # Copy-on-write so readers holding the old object never see a half-applied delta
+            fresh = SeatIndex(event_id, idx.version, layout_version)
+            fresh._share_layout(idx)
+            fresh.state, fresh.holds = bytearray(idx.state), dict(idx.holds)
+            if not _apply_delta(db, fresh, version):
+                fresh = _build(db, event_id, version, layout_version)
+        else:
+            fresh = _build(db, event_id, version, layout_version)
+
+        with _lock:
+            cur = _indexes.get(event_id)
+            if cur is None or (cur.layout_version, cur.version) <= (fresh.layout_version, fresh.version):
+                _indexes[event_id] = fresh
+                _indexes.move_to_end(event_id)
+            while len(_indexes) > settings.SEAT_INDEX_MAX_EVENTS:
+                _indexes.popitem(last=False)
+    return fresh
+
+
+def forget(event_id: int) -> None:
+    with _lock:
+        _indexes.pop(event_id, None)
+
+
+def changes(db: Session, event_id: int, since: int, now: datetime) -> Optional[dict]:
+    """
+    Seats whose state changed after seat version <since>, as [id, state] pairs
+    (0 free, 1 reserved, 2 held), via ix_seats_event_version. None if the event
+    does not exist. A layout_version other than the client's means seats were
+    added or removed: refetch the full map.
+    """
+    h = head(db, event_id)
+    if h is None:
+        return None
+    version, layout_version = h
+    rows = db.execute(
+        select(Seat.id, Seat.reserved, Seat.held_until, Seat.version)
+        .where(Seat.event_id == event_id, Seat.version > since)
+        .order_by(Seat.version, Seat.id)
+    ).all()
+    out = []
+    for r in rows:
+        until = _aware(r.held_until)
+        out.append([r.id, RESERVED if r.reserved else HELD if until is not None and until >= now else FREE])
+        version = max(version, r.version)
+    return {"event_id": event_id, "version": version, "layout_version": layout_version, "changes": out}
+
+
+def snapshot(db: Session, event_id: int) -> Optional[SeatIndex]:
+    """A one-off index read straight from the DB (SEAT_INDEX_ENABLED=0)."""
+    h = head(db, event_id)
+    return _build(db, event_id, *h) if h is not None else None
@@ -0,0 +1,143 @@
+"""
+Set-based seat-map generation.
+
+A seat map is a grid laid out in order: layout position p (0-based) is row
+p // per_row, column p % per_row + 1. Rows are labelled A..Z, AA..ZZ, AAA.. and a
+seat label is row label + sep + column ("A1" or "A-1"). Generating, growing and
+shrinking a map never builds Seat objects in Python. On Postgres the rows come
+from generate_series in a single INSERT .. SELECT; elsewhere (SQLite in tests)
+they go through a Core executemany. Only the row labels (one per row, not per
+seat) are computed here.
+
+Row labels sort by (length, label), not as plain strings ("AA" after "Z", not
+after "A"); SEAT_ORDER is the one seat-map order every query uses.
+"""
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import delete, func, insert, or_, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.seat import Seat
+
+_CHUNK = 20_000
+
+# front to back: row (length first), column, label
+SEAT_ORDER = (func.length(Seat.row_label), Seat.row_label, Seat.col_number, Seat.label)
+
+_PG_GENERATE = text("""
+    INSERT INTO seats (event_id, label, row_label, col_number, reserved, version)
+    SELECT :event_id, r.label || :sep || c.col, r.label, c.col, false, :version
+    FROM unnest(CAST(:labels AS text[])) WITH ORDINALITY AS r(label, n)
+    CROSS JOIN generate_series(1, :per_row) AS c(col)
+    WHERE (:first_row + r.n - 1) * :per_row + c.col - 1 BETWEEN :start AND :stop
+    ORDER BY r.n, c.col
+    ON CONFLICT (event_id, label) DO NOTHING
+""")
+
+
+def row_label(i: int) -> str:
+    """0->A, 25->Z, 26->AA, ..."""
+    s = ""
+    while True:
+        s = chr(ord("A") + (i % 26)) + s
+        i = i // 26 - 1
+        if i < 0:
+            return s
+
+
+def seat_at(position: int, per_row: int, sep: str = "-") -> Tuple[str, int, str]:
+    """0-based layout position -> (row_label, col_number, label)."""
+    row, col = divmod(position, per_row)
+    label = row_label(row)
+    return label, col + 1, f"{label}{sep}{col + 1}"
+
+
+def shape(db: Session, event_id: int, default: Tuple[int, str]) -> Tuple[int, str]:
+    """
+    (per_row, sep) an event's map was laid out with, read off its seats: the
+    widest row and the label of the front seat. <default> for an empty map or
+    one whose labels are not row + sep + column. A map smaller than one row
+    keeps growing at its current width.
+    """
+    per_row = db.execute(select(func.max(Seat.col_number)).where(Seat.event_id == event_id)).scalar()
+    front = db.execute(
+        select(Seat.label, Seat.row_label, Seat.col_number)
+        .where(Seat.event_id == event_id, Seat.col_number.isnot(None))
+        .order_by(*SEAT_ORDER).limit(1)
+    ).first()
+    if not per_row or front is None:
+        return default
+    label, row, col = front
+    if not row or not label.startswith(row) or not label.endswith(str(col)):
+        return default
+    return per_row, label[len(row):len(label) - len(str(col))]
+
+
+def generate(db: Session, event_id: int, start: int, count: int, per_row: int,
+             sep: str, version: int) -> int:
+    """
+    Insert the seats at layout positions start .. start+count-1 in the caller's
+    transaction. Positions whose label already exists are skipped; returns the
+    number of seats inserted.
+    """
+    if count <= 0:
+        return 0
+    first_row, last_row = start // per_row, (start + count - 1) // per_row
+    labels: List[str] = [row_label(r) for r in range(first_row, last_row + 1)]
+
+    if db.bind.dialect.name == "postgresql":
+        return db.execute(_PG_GENERATE, {
+            "event_id": event_id, "sep": sep, "version": version, "labels": labels,
+            "per_row": per_row, "first_row": first_row, "start": start, "stop": start + count - 1,
+        }).rowcount
+
+    stmt = sqlite_insert(Seat).on_conflict_do_nothing() if db.bind.dialect.name == "sqlite" else insert(Seat)
+    conn = db.connection()  # Core executemany, not the ORM bulk path
+    inserted = 0
+    for lo in range(start, start + count, _CHUNK):
+        rows = []
+        for p in range(lo, min(lo + _CHUNK, start + count)):
+            row, col = divmod(p, per_row)
+            rl = labels[row - first_row]
+            rows.append({"event_id": event_id, "label": f"{rl}{sep}{col + 1}", "row_label": rl,
+                         "col_number": col + 1, "reserved": False, "version": version})
+        inserted += conn.execute(stmt, rows).rowcount
+    return inserted
+
+
+def grow(db: Session, event_id: int, current: int, target: int, per_row: int,
+         sep: str, version: int) -> None:
+    """
+    Add seats until the map has <target>, continuing the layout after position
+    <current>; positions that still hold a seat (a shrink could not free the
+    tail) are skipped, earlier gaps are not refilled.
+    """
+    position, missing = current, target - current
+    while missing > 0:
+        inserted = generate(db, event_id, position, missing, per_row, sep, version)
+        position += missing
+        missing -= inserted
+
+
+def shrink(db: Session, event_id: int, extra: int, now: datetime) -> bool:
+    """
+    Delete the last <extra> free (unreserved, not held) seats in layout order in
+    one statement. False, with nothing useful done, if fewer are free; the
+    caller rolls back.
+    """
+    tail = (
+        select(Seat.id)
+        .where(
+            Seat.event_id == event_id,
+            Seat.reserved == False,
+            or_(Seat.held_until.is_(None), Seat.held_until < now),
+        )
+        .order_by(*(c.desc() for c in SEAT_ORDER[:3]), Seat.id.desc())
+        .limit(extra)
+    )
+    deleted = db.execute(
+        delete(Seat).where(Seat.id.in_(tail.scalar_subquery())).execution_options(synchronize_session=False)
+    ).rowcount
+    return deleted == extra
@@ -0,0 +1,185 @@
+"""
+Per-event virtual waiting room backed by Redis sorted sets.
+
+Clients join a FIFO queue (`wr:{id}:q`, scored by arrival sequence) and poll their
+position. Holders are moved into `wr:{id}:admitted` at a fixed rate per second;
+only admitted tokens may call POST /events/{id}/book while the room is open, so
+the number of buyers contending for the event row is bounded by the admission
+rate, not by the size of the crowd. Admission is advanced lazily by whichever
+request touches the room next (one Lua call, Redis clock), so no scheduler is
+needed. When Redis is unavailable the room fails open.
+
+A ticket belongs to the user who joined (`wr:{id}:owner`). Booking claims it
+atomically (claim(): ZREM, fails unless this call removed it), so an admitted
+token buys once however many requests race with it; a booking that fails puts
+it back (unclaim()).
+"""
+import uuid
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from app.core import cache
+
+def _keys(event_id: int):
+    base = f"wr:{event_id}"
+    return [f"{base}:cfg", f"{base}:q", f"{base}:admitted", f"{base}:seq", f"{base}:owner"]
+
+# KEYS: cfg, q, admitted, seq, owner -- promotes floor(elapsed * rate) holders, expires stale admissions.
+_ADVANCE = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate = tonumber(redis.call('HGET', KEYS[1], 'rate'))
+if not rate then return {-1, 0, '0'} end
+local ttl = tonumber(redis.call('HGET', KEYS[1], 'ttl'))
+local last = tonumber(redis.call('HGET', KEYS[1], 'last') or now)
+local n = math.floor((now - last) * rate)
+if n > 0 then
+  local popped = redis.call('ZPOPMIN', KEYS[2], n)
+  for i = 1, #popped, 2 do
+    redis.call('ZADD', KEYS[3], now + ttl, popped[i])
+  end
+  if #popped / 2 < n then last = now else last = last + n / rate end
+  redis.call('HSET', KEYS[1], 'last', tostring(last))
+end
+local stale = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now)
+for i = 1, #stale do redis.call('HDEL', KEYS[5], stale[i]) end
+if #stale > 0 then redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', now) end
+"""
+
+# ARGV[1] = token. Returns {state, value, rate}: 1 admitted (value = expiry epoch),
+# 2 waiting (value = 1-based position), 3 unknown/expired, -1 room closed.
+_STATUS = _ADVANCE + """
+local exp = redis.call('ZSCORE', KEYS[3], ARGV[1])
+if exp then return {1, exp, tostring(rate)} end
+local r = redis.call('ZRANK', KEYS[2], ARGV[1])
+if r then return {2, r + 1, tostring(rate)} end
+return {3, 0, tostring(rate)}
+"""
+
+# ARGV[1] = new token, ARGV[2] = owner; enqueue behind everyone already waiting, then report status.
+_JOIN = """
+if not redis.call('HGET', KEYS[1], 'rate') then return {-1, 0, '0'} end
+redis.call('ZADD', KEYS[2], redis.call('INCR', KEYS[4]), ARGV[1])
+redis.call('HSET', KEYS[5], ARGV[1], ARGV[2])
+""" + _STATUS
+
+# ARGV[1] = token, ARGV[2] = owner. Returns {1, expiry} when this call took the
+# admission, {0, 0} when the token is not admitted, spent or someone else's,
+# {-1, 0} when no room is open.
+_CLAIM = _ADVANCE + """
+if redis.call('HGET', KEYS[5], ARGV[1]) ~= ARGV[2] then return {0, 0} end
+local exp = redis.call('ZSCORE', KEYS[3], ARGV[1])
+if not exp or redis.call('ZREM', KEYS[3], ARGV[1]) ~= 1 then return {0, 0} end
+redis.call('HDEL', KEYS[5], ARGV[1])
+return {1, exp}
+"""
+
+# ARGV[1] = token, ARGV[2] = owner. {1} admitted and owned, {0} not, {-1, ...} no room open.
+_OWNED = _ADVANCE + """
+if redis.call('HGET', KEYS[5], ARGV[1]) == ARGV[2] and redis.call('ZSCORE', KEYS[3], ARGV[1]) then return {1} end
+return {0}
+"""
+
+# ARGV[1] = token, ARGV[2] = owner, ARGV[3] = expiry: give a claimed admission back.
+_UNCLAIM = """
+if not redis.call('HGET', KEYS[1], 'rate') then return 0 end
+redis.call('ZADD', KEYS[3], 'NX', ARGV[3], ARGV[1])
+redis.call('HSET', KEYS[5], ARGV[1], ARGV[2])
+return 1
+"""
+
+_STATES = {1: "admitted", 2: "waiting", 3: "expired"}
+
+_scripts = {}
+
+def _run(name: str, body: str, event_id: int, *args):
+    c = cache._get_client()
+    if not c:
+        return None
+    key = (id(c), name)
+    if key not in _scripts:
+        _scripts[key] = c.register_script(body)
+    try:
+        return _scripts[key](keys=_keys(event_id), args=list(args))
+    except Exception:
+        return None
+
+def _ticket(event_id: int, token: Optional[str], res) -> dict:
+    state, value, rate = int(res[0]), res[1], float(res[2])
+    if state < 0:
+        return {"event_id": event_id, "token": None, "state": "open", "position": 0}
+    out = {"event_id": event_id, "token": token, "state": _STATES[state], "position": 0}
+    if state == 1:
+        out["admitted_until"] = float(value)
+    elif state == 2:
+        out["position"] = int(value)
+        if rate:
+            out["estimated_wait_seconds"] = round(int(value) / rate, 1)
+    return out
+
+def open_room(event_id: int, admit_per_second: float, admit_ttl_seconds: int) -> bool:
+    c = cache._get_client()
+    if not c:
+        return False
+    cfg = _keys(event_id)[0]
+    try:
+        t = c.time()
+        c.hset(cfg, mapping={"rate": admit_per_second, "ttl": admit_ttl_seconds,
+                             "last": t[0] + t[1] / 1_000_000})
+    except Exception:
+        return False
+    return True
+
+def close_room(event_id: int) -> None:
+    c = cache._get_client()
+    if not c:
+        return
+    try:
+        c.delete(*_keys(event_id))
+    except Exception:
+        pass
+
+def join(event_id: int, owner: str) -> dict:
+    token = uuid.uuid4().hex
+    res = _run("join", _JOIN, event_id, token, owner)
+    if res is None:  # Redis down: fail open
+        return {"event_id": event_id, "token": None, "state": "open", "position": 0}
+    return _ticket(event_id, token, res)
+
+def poll(event_id: int, token: str) -> dict:
+    res = _run("status", _STATUS, event_id, token)
+    if res is None:
+        return {"event_id": event_id, "token": None, "state": "open", "position": 0}
+    return _ticket(event_id, token, res)
+
+_NOT_ADMITTED = "Waiting room is open for this event; join the queue and book with your admitted X-Queue-Token"
+
+def require_admitted(event_id: int, token: Optional[str], owner: str) -> None:
+    """
+    Gate for steps before the purchase (seat holds); no-op unless a room is open
+    for the event. 403 unless <token> is admitted and was issued to <owner>.
+    """
+    res = _run("owned", _OWNED, event_id, token or "", owner)
+    if res is None or int(res[0]) < 0:
+        return
+    if int(res[0]) != 1:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=_NOT_ADMITTED)
+
+def claim(event_id: int, token: Optional[str], owner: str) -> Optional[float]:
+    """
+    Gate for the booking endpoint; no-op (None) unless a room is open for the event.
+    Takes <owner>'s admission for this request and returns its expiry, to hand to
+    unclaim() if the booking does not go through. 403 if the token is not admitted,
+    already spent or not <owner>'s.
+    """
+    res = _run("claim", _CLAIM, event_id, token or "", owner)
+    if res is None or int(res[0]) < 0:
+        return None
+    if int(res[0]) != 1:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=_NOT_ADMITTED)
+    return float(res[1])
+
+def unclaim(event_id: int, token: str, owner: str, expires: float) -> None:
+    """Undo claim() after a failed booking; a room closed meanwhile stays closed."""
+    _run("unclaim", _UNCLAIM, event_id, token, owner, expires)
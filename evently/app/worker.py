@@ -0,0 +1,38 @@
+"""
+Outbox worker: python -m app.worker
+
+Drains the outbox table written by booking and admin writes when OUTBOX_ENABLED=1
+(waitlist promotion, cache invalidation, analytics rollups, notifications; see
+app/services/outbox.py). Any number of workers may run side by side. Exposes
+evently_outbox_lag_seconds / evently_outbox_messages_total on WORKER_METRICS_PORT.
+"""
+import logging
+import os
+import signal
+import threading
+
+from prometheus_client import start_http_server
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.services import outbox
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "info").upper(),
+        format="%(asctime)s %(levelname)s %(name)s %(message)s",
+    )
+    if not settings.OUTBOX_ENABLED:
+        logging.getLogger(__name__).warning("OUTBOX_ENABLED is off: the API runs side effects inline, nothing to drain")
+    if settings.WORKER_METRICS_PORT:
+        start_http_server(settings.WORKER_METRICS_PORT)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    outbox.run(SessionLocal, stop)
+
+
+if __name__ == "__main__":
+    main()
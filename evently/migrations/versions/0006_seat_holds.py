@@ -0,0 +1,19 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_seat_holds"
+down_revision = "0005_seed_admin"
+
+def upgrade():
+    op.add_column("seats", sa.Column("hold_token", sa.String(length=32), nullable=True))
+    op.add_column("seats", sa.Column("held_by", sa.BigInteger(), nullable=True))
+    op.add_column("seats", sa.Column("held_until", sa.DateTime(timezone=True), nullable=True))
+    op.create_index("ix_seats_hold_token", "seats", ["hold_token"])
+    op.create_index("ix_seats_held_until", "seats", ["held_until"])
+
+def downgrade():
+    op.drop_index("ix_seats_held_until", table_name="seats")
+    op.drop_index("ix_seats_hold_token", table_name="seats")
+    op.drop_column("seats", "held_until")
+    op.drop_column("seats", "held_by")
+    op.drop_column("seats", "hold_token")
@@ -0,0 +1,17 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_seat_versions"
+down_revision = "0006_seat_holds"
+
+def upgrade():
+    op.add_column("events", sa.Column("seat_version", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("events", sa.Column("seat_layout_version", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("seats", sa.Column("version", sa.Integer(), nullable=False, server_default="0"))
+    op.create_index("ix_seats_event_version", "seats", ["event_id", "version"])
+
+def downgrade():
+    op.drop_index("ix_seats_event_version", table_name="seats")
+    op.drop_column("seats", "version")
+    op.drop_column("events", "seat_layout_version")
+    op.drop_column("events", "seat_version")
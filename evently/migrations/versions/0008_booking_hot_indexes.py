@@ -0,0 +1,25 @@
+from alembic import op
+
+revision = "0008_booking_hot_indexes"
+down_revision = "0007_seat_versions"
+
+# Built CONCURRENTLY (outside the migration transaction) so existing bookings/seats
+# tables stay writable while the indexes build.
+_INDEXES = [
+    # waitlist FIFO (_fifo_prefix), waitlisted counts per event, analytics by status
+    ("ix_bookings_event_status_created", "bookings", ["event_id", "status", "created_at", "id"]),
+    # GET /me/bookings (newest first)
+    ("ix_bookings_user_created", "bookings", ["user_id", "created_at"]),
+    # seat labels of a booking, freeing seats on cancel
+    ("ix_seats_reserved_booking_id", "seats", ["reserved_booking_id"]),
+]
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, cols in _INDEXES:
+            op.create_index(name, table, cols, postgresql_concurrently=True, if_not_exists=True)
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
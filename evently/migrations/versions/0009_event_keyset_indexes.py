@@ -0,0 +1,22 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_event_keyset_indexes"
+down_revision = "0008_booking_hot_indexes"
+
+# One index per GET /events sort mode, ending in id so keyset pages are index range scans.
+_INDEXES = [
+    ("ix_events_start_time_id", ["start_time", "id"]),
+    ("ix_events_name_id", ["name", "id"]),
+    ("ix_events_utilization_id", [sa.text("(CAST(booked_count AS FLOAT) / NULLIF(capacity, 0))"), "id"]),
+]
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, cols in _INDEXES:
+            op.create_index(name, "events", cols, postgresql_concurrently=True, if_not_exists=True)
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(_INDEXES):
+            op.drop_index(name, table_name="events", postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,23 @@
+from alembic import op
+
+revision = "0010_event_search"
+down_revision = "0009_event_keyset_indexes"
+
+# Postgres-only search indexes (see app/services/event_search.py):
+#   - trigram GIN on lower(name)/lower(venue) serve `LIKE '%q%'` for GET /events?q=
+#   - byte-ordered btree on lower(name) serves prefix autocomplete (GET /events/suggest)
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_events_name_trgm "
+                   "ON events USING gin (lower(name) gin_trgm_ops)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_events_venue_trgm "
+                   "ON events USING gin (lower(venue) gin_trgm_ops)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_events_name_prefix "
+                   "ON events (lower(name) COLLATE \"C\", id)")
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_events_name_prefix")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_events_venue_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_events_name_trgm")
@@ -0,0 +1,24 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011_event_waitlist_counts"
+down_revision = "0010_event_search"
+
+def upgrade():
+    op.add_column("events", sa.Column("waitlisted_count", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("events", sa.Column("waitlisted_qty", sa.Integer(), nullable=False, server_default="0"))
+    op.execute("""
+        UPDATE events e
+        SET waitlisted_count = w.cnt, waitlisted_qty = w.qty
+        FROM (
+            SELECT event_id, COUNT(*) AS cnt, SUM(qty) AS qty
+            FROM bookings
+            WHERE status = 'WAITLISTED'
+            GROUP BY event_id
+        ) w
+        WHERE w.event_id = e.id
+    """)
+
+def downgrade():
+    op.drop_column("events", "waitlisted_qty")
+    op.drop_column("events", "waitlisted_count")
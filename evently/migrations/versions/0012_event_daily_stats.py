@@ -0,0 +1,35 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012_event_daily_stats"
+down_revision = "0011_event_waitlist_counts"
+
+def upgrade():
+    op.create_table(
+        "event_daily_stats",
+        sa.Column("event_id", sa.BigInteger(), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("bookings", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("cancellations", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("seats_booked", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("seats_released", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_event_daily_stats_day", "event_daily_stats", ["day"])
+    # Backfill with the write path's meaning: "bookings" counts every booking created that day, whatever
+    # became of it since. Bookings carry no cancel time, so cancellations made before this migration stay
+    # on their booking's creation day; from here on the write path records them on the day they happen.
+    op.execute("""
+        INSERT INTO event_daily_stats (event_id, day, bookings, cancellations, seats_booked, seats_released)
+        SELECT event_id, (created_at AT TIME ZONE 'UTC')::date,
+               COUNT(*),
+               COUNT(*) FILTER (WHERE status = 'CANCELLED'),
+               COALESCE(SUM(qty), 0),
+               COALESCE(SUM(qty) FILTER (WHERE status = 'CANCELLED'), 0)
+        FROM bookings
+        WHERE status IN ('CONFIRMED', 'CANCELLED')
+        GROUP BY 1, 2
+    """)
+
+def downgrade():
+    op.drop_index("ix_event_daily_stats_day", table_name="event_daily_stats")
+    op.drop_table("event_daily_stats")
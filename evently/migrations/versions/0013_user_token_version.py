@@ -0,0 +1,11 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0013_user_token_version"
+down_revision = "0012_event_daily_stats"
+
+def upgrade():
+    op.add_column("users", sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"))
+
+def downgrade():
+    op.drop_column("users", "token_version")
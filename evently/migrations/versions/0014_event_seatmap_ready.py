@@ -0,0 +1,18 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0014_event_seatmap_ready"
+down_revision = "0013_user_token_version"
+
+def upgrade():
+    op.add_column("events", sa.Column("seatmap_ready", sa.Boolean(), nullable=False, server_default=sa.false()))
+    # Events that already have seats keep their map; the rest are laid out by the seatmap sweep
+    op.execute("""
+        UPDATE events e SET seatmap_ready = true
+        WHERE EXISTS (SELECT 1 FROM seats s WHERE s.event_id = e.id)
+    """)
+    op.create_index("ix_events_seatmap_pending", "events", ["id"], postgresql_where=sa.text("NOT seatmap_ready"))
+
+def downgrade():
+    op.drop_index("ix_events_seatmap_pending", table_name="events")
+    op.drop_column("events", "seatmap_ready")
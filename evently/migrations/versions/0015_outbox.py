@@ -0,0 +1,17 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0015_outbox"
+down_revision = "0014_event_seatmap_ready"
+
+def upgrade():
+    op.create_table(
+        "outbox",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("event_id", sa.BigInteger(), nullable=True),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+def downgrade():
+    op.drop_table("outbox")
@@ -0,0 +1,29 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0016_seat_version_table"
+down_revision = "0015_outbox"
+
+def upgrade():
+    op.create_table(
+        "seat_versions",
+        sa.Column("event_id", sa.BigInteger(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("layout_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute(
+        "INSERT INTO seat_versions (event_id, version, layout_version) "
+        "SELECT id, seat_version, seat_layout_version FROM events "
+        "WHERE seat_version > 0 OR seat_layout_version > 0"
+    )
+    op.drop_column("events", "seat_layout_version")
+    op.drop_column("events", "seat_version")
+
+def downgrade():
+    op.add_column("events", sa.Column("seat_version", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("events", sa.Column("seat_layout_version", sa.Integer(), nullable=False, server_default="0"))
+    op.execute(
+        "UPDATE events SET seat_version = v.version, seat_layout_version = v.layout_version "
+        "FROM seat_versions v WHERE v.event_id = events.id"
+    )
+    op.drop_table("seat_versions")
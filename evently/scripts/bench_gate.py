@@ -0,0 +1,36 @@
+# Sold-out fast path: latency of the Redis admission gate (one EVALSHA per request).
+# Usage:
+#   REDIS_URL=redis://localhost:6379/0 python scripts/bench_gate.py --n 50000
+# End to end, run scripts/race_test.py against a sold-out event with the API on
+# INVENTORY_GATE_ENABLED=1 and compare the 409 latency with the gate off.
+import argparse, os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["INVENTORY_GATE_ENABLED"] = "1"
+
+from app.core import cache
+from app.services import inventory_gate
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--n', type=int, default=20000)
+    ap.add_argument('--event', type=int, default=999999)
+    a = ap.parse_args()
+
+    c = cache._get_client()
+    if not c:
+        sys.exit('Redis not reachable at REDIS_URL')
+    c.set(f'inv:{a.event}:remaining', 0, ex=60)  # sold out
+
+    lat = []
+    for _ in range(a.n):
+        t0 = time.perf_counter()
+        assert inventory_gate.try_acquire(a.event, 1) is False
+        lat.append((time.perf_counter() - t0) * 1000.0)
+    lat.sort()
+    total = sum(lat) / 1000.0
+    print(f'{a.n} sold-out checks: {a.n / total:.0f}/s  p50={lat[len(lat) // 2]:.3f} ms  p99={lat[int(0.99 * (len(lat) - 1))]:.3f} ms')
+    c.delete(f'inv:{a.event}:remaining')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+# Login latency during a booking load test: bcrypt on the request threadpool
+# (HASH_WORKERS=0, what login used to do) vs the hashing process pool.
+# Serves the app with uvicorn in-process on a scratch DB. --booking-threads
+# clients book continuously while --login-threads clients log in, and both
+# report p50/p99. Give it a Postgres DATABASE_URL for realistic booking
+# concurrency; on SQLite bookings serialize on the database lock.
+# Usage:
+#   python scripts/bench_login.py --seconds 15 --login-threads 8 --booking-threads 16
+import argparse, os, socket, sys, tempfile, threading, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+if not os.getenv("DATABASE_URL", "").startswith("postgresql"):
+    fd, path = tempfile.mkstemp(prefix="evently_bench_", suffix=".db")
+    os.close(fd)
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+import httpx, uvicorn
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import BigInteger, insert
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+from app.core import hashing
+from app.core.config import settings
+from app.core.security import create_access_token, hash_password
+from app.db import engine
+from app.main import app
+from app.models.base import Base
+from app.models.event import Event
+from app.models.user import User
+from app.services.booking_service import materialize_seatmap
+
+# SQLite only auto-assigns "INTEGER PRIMARY KEY" ids (same hook as tests/conftest.py)
+@compiles(BigInteger, "sqlite")
+def _bigint_as_integer_on_sqlite(type_, compiler, **kw):
+    return "INTEGER"
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[int(p * (len(xs) - 1))] if xs else float("nan")
+
+def _seed(users):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    pw = hash_password("bench-password")
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [dict(id=i, name=f"u{i}", email=f"u{i}@bench.io", password_hash=pw)
+                                    for i in range(1, users + 1)])
+        conn.execute(insert(Event), [dict(id=1, name="Bench", venue="Hall", start_time=now + timedelta(days=1),
+                                          end_time=now + timedelta(days=1, hours=2), capacity=20_000,
+                                          booked_count=0, status="active")])
+    with Session(engine) as db:
+        materialize_seatmap(db, 1)
+
+def _round(base, seconds, login_threads, booking_threads, users):
+    stop = time.monotonic() + seconds
+    logins, bookings, codes, lock = [], [], {}, threading.Lock()
+
+    def login(i):
+        with httpx.Client(base_url=base, timeout=30) as c:
+            while time.monotonic() < stop:
+                t0 = time.perf_counter()
+                r = c.post("/auth/login", json={"email": f"u{1 + i % users}@bench.io", "password": "bench-password"})
+                with lock:
+                    logins.append((time.perf_counter() - t0) * 1000)
+                    codes[r.status_code] = codes.get(r.status_code, 0) + 1
+
+    def book(i):
+        tok = create_access_token(str(1 + i % users), role="user", token_version=0)
+        with httpx.Client(base_url=base, timeout=30, headers={"Authorization": f"Bearer {tok}"}) as c:
+            n = 0
+            while time.monotonic() < stop:
+                n += 1
+                t0 = time.perf_counter()
+                c.post("/events/1/book", json={"qty": 1}, headers={"Idempotency-Key": f"b{i}-{n}-{t0}"})
+                with lock:
+                    bookings.append((time.perf_counter() - t0) * 1000)
+
+    ts = [threading.Thread(target=login, args=(i,)) for i in range(login_threads)]
+    ts += [threading.Thread(target=book, args=(i,)) for i in range(booking_threads)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    return logins, bookings, codes
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=15)
+    ap.add_argument("--login-threads", type=int, default=8)
+    ap.add_argument("--booking-threads", type=int, default=16)
+    ap.add_argument("--users", type=int, default=50)
+    a = ap.parse_args()
+
+    _seed(a.users)
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    base = f"http://127.0.0.1:{port}"
+    # The first booking builds the seat index; keep it out of the measurement
+    tok = create_access_token("1", role="user", token_version=0)
+    httpx.post(f"{base}/events/1/book", json={"qty": 1}, timeout=120, headers={"Authorization": f"Bearer {tok}"})
+
+    print(f"{engine.dialect.name} bcrypt_rounds={settings.BCRYPT_ROUNDS} cpus={os.cpu_count()} "
+          f"login_threads={a.login_threads} booking_threads={a.booking_threads} seconds={a.seconds}")
+    workers = settings.HASH_WORKERS or 1
+    for label, n in (("threadpool (HASH_WORKERS=0)", 0), (f"process pool (HASH_WORKERS={workers})", workers)):
+        settings.HASH_WORKERS = n
+        hashing.shutdown()
+        if n:  # start the processes outside the measured window
+            hashing._get_executor().submit(hashing._hash, "warmup", 4).result()
+        logins, bookings, codes = _round(base, a.seconds, a.login_threads, a.booking_threads, a.users)
+        print(f"{label:32} login p50 {_pct(logins, .5):7.1f} ms  p99 {_pct(logins, .99):7.1f} ms  "
+              f"({len(logins)} logins, status {codes})   "
+              f"booking p50 {_pct(bookings, .5):6.1f} ms  p99 {_pct(bookings, .99):7.1f} ms  ({len(bookings)})")
+    server.should_exit = True
+    hashing.shutdown()
+
+if __name__ == "__main__":
+    main()
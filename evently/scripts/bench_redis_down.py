@@ -0,0 +1,113 @@
+# Booking latency while Redis is unreachable: the old per-call client (new
+# connection + PING on every cache call), the pooled client with socket
+# timeouts only, and the pooled client behind the circuit breaker. Each booking
+# hits Redis at least once (mark_stale on the analytics summary), so with Redis
+# down every booking used to pay a connection attempt.
+# Two failure modes: --down refused (nothing listens; fails fast) and --down
+# silent (a local socket that accepts and never answers, like a hung server or a
+# dropped route; the old client had no socket timeout and would hang, so it is
+# skipped there).
+# Usage:
+#   python scripts/bench_redis_down.py --bookings 300 --down refused
+#   python scripts/bench_redis_down.py --bookings 50 --down silent
+import argparse, os, socket, sys, tempfile, threading, time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import BigInteger, create_engine, insert
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from app.core import cache
+from app.models.base import Base
+from app.models.event import Event
+from app.models.user import User
+from app.services.booking_service import create_booking, materialize_seatmap
+
+# SQLite only auto-assigns "INTEGER PRIMARY KEY" ids (same hook as tests/conftest.py)
+@compiles(BigInteger, "sqlite")
+def _bigint_as_integer_on_sqlite(type_, compiler, **kw):
+    return "INTEGER"
+
+def _legacy_client(url):
+    """The pre-pool _get_client() when the server is down: a fresh client and PING every call."""
+    def get():
+        import redis
+        c = redis.Redis.from_url(url, decode_responses=True)
+        try:
+            c.ping()
+        except Exception:
+            return None
+        return c
+    return get
+
+def _silent_server():
+    srv = socket.socket()
+    srv.bind(('127.0.0.1', 0))
+    srv.listen(128)
+    held = []
+    def accept():
+        while True:
+            held.append(srv.accept()[0])
+    threading.Thread(target=accept, daemon=True).start()
+    return f'redis://127.0.0.1:{srv.getsockname()[1]}/0'
+
+def run(SessionLocal, n, offset):
+    lat = []
+    with SessionLocal() as db:
+        for i in range(n):
+            t0 = time.perf_counter()
+            create_booking(db, user_id=1, event_id=1, qty=1, idempotency_key=f'k{offset + i}')
+            lat.append((time.perf_counter() - t0) * 1000.0)
+    lat.sort()
+    return lat[len(lat) // 2], lat[int(0.99 * (len(lat) - 1))]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--bookings', type=int, default=300)
+    ap.add_argument('--down', default='silent', choices=['refused', 'silent'])
+    a = ap.parse_args()
+
+    url = os.getenv('DATABASE_URL')
+    if not url or url.startswith('sqlite'):
+        fd, path = tempfile.mkstemp(prefix='evently_bench_', suffix='.db')
+        os.close(fd)
+        url = f'sqlite:///{path}'
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [dict(id=1, name='Bench', email='bench@example.com', password_hash='x')])
+        conn.execute(insert(Event), [dict(
+            id=1, name='Bench', venue='Hall', start_time=now + timedelta(days=1),
+            end_time=now + timedelta(days=1, hours=2), capacity=10 * a.bookings + 100,
+            booked_count=0, status='active',
+        )])
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+    with SessionLocal() as db:
+        materialize_seatmap(db, 1)
+
+    redis_url = 'redis://127.0.0.1:1/0' if a.down == 'refused' else _silent_server()
+    cache._REDIS_URL = redis_url
+    pooled = cache._get_client
+    run(SessionLocal, 5, 10_000_000)  # warms the seat index; trips the breaker
+
+    print(f'{engine.dialect.name} bookings={a.bookings} redis {a.down}')
+    if a.down == 'refused':
+        cache._get_client = _legacy_client(redis_url)
+        p50, p99 = run(SessionLocal, a.bookings, 0)
+        print(f'per-call client:        p50 {p50:7.2f} ms   p99 {p99:7.2f} ms')
+        cache._get_client = pooled
+    threshold, cache.breaker.threshold = cache.breaker.threshold, 10 ** 9
+    cache.breaker.success()  # closed, and it cannot open again until the threshold is restored
+    p50, p99 = run(SessionLocal, a.bookings, a.bookings)
+    print(f'pool, breaker disabled: p50 {p50:7.2f} ms   p99 {p99:7.2f} ms   (socket timeouts only)')
+    cache.breaker.threshold = threshold
+    p50, p99 = run(SessionLocal, a.bookings, 2 * a.bookings)
+    print(f'pool + circuit breaker: p50 {p50:7.2f} ms   p99 {p99:7.2f} ms   '
+          f'(breaker state {cache.breaker.state}, {cache.breaker.trips} trips)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# Seat-map payload benchmark: GET /events/{id}/seats (one SeatOut object per seat)
+# vs GET /events/{id}/seatmap (row layout + base64 bitmaps) and its
+# ?since_version= delta after --changes seats flip. Seeds a scratch DB with
+# --seats seats (50 per row), reserves a random --fill share, then reports
+# response size (raw / gzip) and median server time over --repeat requests
+# through the ASGI app (seat index warm, so both read from memory).
+# Usage:
+#   python scripts/bench_seatmap.py --seats 100000 --fill 0.6 --changes 200
+import argparse, gzip, os, random, statistics, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, update
+from sqlalchemy.orm import sessionmaker
+
+from app.db import get_db
+from app.main import app
+from app.models.base import Base
+from app.models.event import Event
+from app.models.booking import Booking  # noqa: F401  (FK target for seats)
+from app.models.seat import Seat
+from app.services import seat_index, seat_layout
+
+PER_ROW = 50
+
+def _measure(client, url, repeat):
+    times, r = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        r = client.get(url)
+        times.append((time.perf_counter() - t0) * 1000)
+    assert r.status_code == 200, r.text
+    return r.content, statistics.median(times)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--seats', type=int, default=100_000)
+    ap.add_argument('--fill', type=float, default=0.6, help='share of seats reserved at random')
+    ap.add_argument('--changes', type=int, default=200, help='seats flipped before the delta request')
+    ap.add_argument('--repeat', type=int, default=5)
+    a = ap.parse_args()
+
+    url = os.getenv('DATABASE_URL')
+    if not url or url.startswith('sqlite'):
+        fd, path = tempfile.mkstemp(prefix='evently_bench_', suffix='.db')
+        os.close(fd)
+        url = f'sqlite:///{path}'
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+
+    rnd = random.Random(42)
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        db.execute(insert(Event), [dict(id=1, name='Bench', venue='Stadium', start_time=now, end_time=now,
+                                        capacity=a.seats, booked_count=0, status='active', seatmap_ready=True)])
+        seat_layout.generate(db, 1, 0, a.seats, PER_ROW, '-', seat_index.bump_version(db, 1, layout=True))
+        ids = [r[0] for r in db.query(Seat.id).filter(Seat.event_id == 1)]
+        taken = rnd.sample(ids, int(len(ids) * a.fill))
+        version = seat_index.bump_version(db, 1)
+        for lo in range(0, len(taken), 5000):
+            db.execute(update(Seat).where(Seat.id.in_(taken[lo:lo + 5000])).values(reserved=True, version=version))
+        db.commit()
+
+    def _get_db():
+        with SessionLocal() as db:
+            yield db
+    app.dependency_overrides[get_db] = _get_db
+    client = TestClient(app)
+
+    print(f'{engine.dialect.name} seats={a.seats} fill={a.fill} changes={a.changes}')
+    rows = []
+    body, ms = _measure(client, '/events/1/seats', a.repeat)
+    rows.append(('GET /seats (SeatOut list)', body, ms))
+    body, ms = _measure(client, '/events/1/seatmap', a.repeat)
+    rows.append(('GET /seatmap (compact)', body, ms))
+    since = client.get('/events/1/seatmap').json()['version']
+
+    with SessionLocal() as db:
+        flip = rnd.sample(ids, a.changes)
+        db.execute(update(Seat).where(Seat.id.in_(flip))
+                   .values(reserved=~Seat.reserved, version=seat_index.bump_version(db, 1)))
+        db.commit()
+    body, ms = _measure(client, f'/events/1/seatmap?since_version={since}', a.repeat)
+    rows.append((f'GET /seatmap?since_version', body, ms))
+
+    for label, body, ms in rows:
+        print(f'{label:30} {len(body) / 1024:10.1f} KiB  gzip {len(gzip.compress(body)) / 1024:8.1f} KiB  '
+              f'median {ms:8.1f} ms')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# Waiting-room load test: N clients join an event's queue, poll until admitted,
+# then book. Booking latency is reported per time window; with the room open it
+# should stay flat however large N gets, because only admit_per_second buyers
+# reach POST /events/{id}/book at a time.
+# Usage (API with RATE_LIMIT_ENABLED=0; admin opens the room first):
+#   curl -X POST $BASE/admin/events/1/queue -H "Authorization: Bearer $ADMIN_TOKEN" \
+#        -H 'Content-Type: application/json' -d '{"admit_per_second": 100}'
+#   python scripts/queue_load_test.py --token <USER_TOKEN> --event 1 --clients 50000 --concurrency 2000
+import argparse, asyncio, random, time, httpx
+from collections import Counter, defaultdict
+
+def _pct(vals, p):
+    vals = sorted(vals)
+    return vals[min(len(vals) - 1, int(round(p / 100.0 * (len(vals) - 1))))] if vals else 0.0
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--base', default='http://localhost:8000')
+    ap.add_argument('--token', required=True)
+    ap.add_argument('--event', type=int, required=True)
+    ap.add_argument('--clients', type=int, default=50000)
+    ap.add_argument('--concurrency', type=int, default=1000, help='max in-flight HTTP requests')
+    ap.add_argument('--poll', type=float, default=2.0, help='seconds between position polls')
+    ap.add_argument('--window', type=float, default=10.0, help='latency report bucket (seconds)')
+    a = ap.parse_args()
+
+    headers = {'Authorization': f'Bearer {a.token}'}
+    sem = asyncio.Semaphore(a.concurrency)
+    book_lat = defaultdict(list)   # window -> booking latencies (ms)
+    outcomes = Counter()
+    t_start = time.perf_counter()
+
+    async with httpx.AsyncClient(timeout=60, limits=httpx.Limits(max_connections=a.concurrency)) as client:
+        async def request(method, url, **kw):
+            async with sem:
+                return await client.request(method, url, **kw)
+
+        async def one(i):
+            r = await request('POST', f'{a.base}/events/{a.event}/queue', headers=headers)
+            ticket = r.json()
+            while ticket['state'] == 'waiting':
+                await asyncio.sleep(a.poll * (0.5 + random.random()))
+                r = await request('GET', f"{a.base}/events/{a.event}/queue/{ticket['token']}")
+                ticket = r.json()
+            if ticket['state'] == 'expired':
+                outcomes['expired'] += 1
+                return
+            h = dict(headers)
+            if ticket.get('token'):
+                h['X-Queue-Token'] = ticket['token']
+            t0 = time.perf_counter()
+            r = await request('POST', f'{a.base}/events/{a.event}/book', headers=h,
+                              json={'qty': 1, 'waitlist': True})
+            book_lat[int((t0 - t_start) // a.window)].append((time.perf_counter() - t0) * 1000.0)
+            outcomes[r.status_code] += 1
+
+        await asyncio.gather(*[one(i) for i in range(a.clients)])
+
+    print('Outcomes:', dict(outcomes))
+    print(f'Total time: {time.perf_counter() - t_start:.1f}s')
+    for w in sorted(book_lat):
+        lat = book_lat[w]
+        print(f'  t={w * a.window:6.0f}s bookings={len(lat):6d} p50={_pct(lat, 50):7.1f} ms p99={_pct(lat, 99):7.1f} ms')
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,7 +1,37 @@
 # Simple race test: fires N concurrent book requests and prints results.
 # Usage:
 #   docker compose exec -T api python scripts/race_test.py --base http://localhost:8000 --token <USER_TOKEN> --event 1 --n 200 --qty 1
-import argparse, asyncio, httpx
+#
+# Also doubles as a small load generator for comparing request paths
+# (e.g. DB_ASYNC=0 vs DB_ASYNC=1). Start the API with RATE_LIMIT_ENABLED=0,
+# then compare the printed throughput / p99 across runs:
+#   python scripts/race_test.py --token <T> --event 1 --n 5000 --concurrency 200 --waitlist
+#   python scripts/race_test.py --token <T> --event 1 --n 20000 --concurrency 200 --read
+#
+# Seat allocation race: on a fresh seat-mapped event, run once with the API on
+# SEAT_ALLOCATION_MODE=locked and once with skip_locked; --by-status separates the
+# latency of successful claims from fast 409s once the map is full:
+#   python scripts/race_test.py --token <T> --event 7 --n 2000 --concurrency 100 --qty 2 --by-status
+import argparse, asyncio, time, httpx
+from collections import Counter
+
+def _pct(sorted_vals, p):
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, int(round(p / 100.0 * (len(sorted_vals) - 1))))
+    return sorted_vals[k]
+
+def _latency_line(label, latencies_ms):
+    lat = sorted(latencies_ms)
+    print(f'{label} ms: p50={_pct(lat, 50):.1f} p95={_pct(lat, 95):.1f} p99={_pct(lat, 99):.1f} max={(lat[-1] if lat else 0):.1f}')
+
+def report(statuses, latencies_ms, elapsed_s, by_status=False):
+    print('Status counts:', dict(Counter(statuses)))
+    print(f'Requests: {len(statuses)} in {elapsed_s:.2f}s -> {len(statuses) / max(elapsed_s, 1e-9):.1f} req/s')
+    _latency_line('Latency', latencies_ms)
+    if by_status:
+        for code in sorted(set(statuses)):
+            _latency_line(f'  [{code}]', [ms for s, ms in zip(statuses, latencies_ms) if s == code])
 
 async def main():
     ap = argparse.ArgumentParser()
@@ -10,20 +40,33 @@ async def main():
     ap.add_argument('--event', type=int, required=True)
     ap.add_argument('--n', type=int, default=100)
     ap.add_argument('--qty', type=int, default=1)
+    ap.add_argument('--concurrency', type=int, default=0, help='max in-flight requests (0 = all at once)')
+    ap.add_argument('--waitlist', action='store_true', help='book with waitlist=true (no 409 once sold out)')
+    ap.add_argument('--read', action='store_true', help='GET /events/{id} instead of booking')
     ap.add_argument('--idem', action='store_true', help='send few repeating idempotency keys')
+    ap.add_argument('--by-status', action='store_true', help='also print latency per status code')
     a = ap.parse_args()
 
     headers = {'Authorization': f'Bearer {a.token}'}
-    async with httpx.AsyncClient(timeout=10) as client:
+    sem = asyncio.Semaphore(a.concurrency or a.n)
+    limits = httpx.Limits(max_connections=a.concurrency or a.n)
+    async with httpx.AsyncClient(timeout=30, limits=limits) as client:
         async def one(i):
             h = dict(headers)
             if a.idem:
                 h['Idempotency-Key'] = f'k-{i%5}'  # reuse 5 keys
-            r = await client.post(f'{a.base}/events/{a.event}/book', headers=h, json={'qty': a.qty})
-            return r.status_code
+            async with sem:
+                t0 = time.perf_counter()
+                if a.read:
+                    r = await client.get(f'{a.base}/events/{a.event}', headers=h)
+                else:
+                    r = await client.post(f'{a.base}/events/{a.event}/book', headers=h,
+                                          json={'qty': a.qty, 'waitlist': a.waitlist})
+                return r.status_code, (time.perf_counter() - t0) * 1000.0
+        t0 = time.perf_counter()
         results = await asyncio.gather(*[one(i) for i in range(a.n)])
-        from collections import Counter
-        print('Status counts:', dict(Counter(results)))
+        elapsed = time.perf_counter() - t0
+        report([s for s, _ in results], [ms for _, ms in results], elapsed, by_status=a.by_status)
 
 if __name__ == '__main__':
     asyncio.run(main())
@@ -0,0 +1,77 @@
+# Seat feed fan-out check: opens --subscribers SSE streams on
+# GET /events/{id}/seats/stream of a running API, books --bookings single seats one
+# after another, and reports how many subscribers saw each booking's frame and
+# the delivery latency (booking request sent -> frame at the subscriber).
+# Needs the API's Redis (a local one is fine) and a seat-mapped event.
+# Usage:
+#   python scripts/seat_feed_load.py --base http://localhost:8000 --token <USER_TOKEN> --event 1 \
+#       --subscribers 2000 --bookings 50
+import argparse, asyncio, json, time
+import httpx
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[int(p * (len(xs) - 1))] if xs else float("nan")
+
+async def _subscriber(client, url, seen, ready):
+    async with client.stream("GET", url, timeout=None) as r:
+        kind = None
+        async for line in r.aiter_lines():
+            if line.startswith("event: "):
+                kind = line[7:]
+            elif line.startswith("data: "):
+                if kind == "hello":
+                    ready.release()
+                elif kind == "seats":
+                    msg = json.loads(line[6:])
+                    if msg.get("version") is not None:
+                        seen.setdefault(msg["version"], []).append(time.perf_counter())
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--base", default="http://localhost:8000")
+    ap.add_argument("--token", required=True)
+    ap.add_argument("--event", type=int, required=True)
+    ap.add_argument("--subscribers", type=int, default=1000)
+    ap.add_argument("--bookings", type=int, default=20)
+    a = ap.parse_args()
+
+    seen, ready = {}, asyncio.Semaphore(0)
+    limits = httpx.Limits(max_connections=a.subscribers + 10, max_keepalive_connections=a.subscribers + 10)
+    async with httpx.AsyncClient(base_url=a.base, limits=limits) as client:
+        url = f"/events/{a.event}/seats/stream"
+        tasks = [asyncio.create_task(_subscriber(client, url, seen, ready)) for _ in range(a.subscribers)]
+        t0 = time.perf_counter()
+        for _ in range(a.subscribers):
+            await ready.acquire()
+        print(f"{a.subscribers} subscribers connected in {time.perf_counter() - t0:.1f}s")
+
+        sent = {}
+        headers = {"Authorization": f"Bearer {a.token}"}
+        for n in range(a.bookings):
+            t_sent = time.perf_counter()
+            r = await client.post(f"/events/{a.event}/book", json={"qty": 1},
+                                  headers={**headers, "Idempotency-Key": f"feed-{n}-{time.time()}"})
+            if r.status_code != 200:
+                print("booking failed:", r.status_code, r.text)
+                break
+            sent[len(sent)] = t_sent
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(2)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # bookings are sequential, so the i-th delivered version belongs to the i-th booking
+    versions = sorted(seen)[-len(sent):] if sent else []
+    latencies, full = [], 0
+    for i, v in enumerate(versions):
+        arrivals = seen[v]
+        full += len(arrivals) == a.subscribers
+        latencies += [(t - sent[i]) * 1000 for t in arrivals]
+    print(f"bookings {len(sent)}  frames delivered {sum(len(seen[v]) for v in versions)} "
+          f"/ {len(sent) * a.subscribers}  complete fan-outs {full}")
+    print(f"delivery after the booking request was sent: p50 {_pct(latencies, .5):.1f} ms  p99 {_pct(latencies, .99):.1f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+import os, tempfile
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import BigInteger, create_engine, insert
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+# Rate limits would need the Redis-backed SlowAPI storage; tests don't exercise them.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+# Minimum bcrypt cost keeps password fixtures fast.
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from app.core import cache  # noqa: E402  (after the env tweaks above)
+from app.models.base import Base  # noqa: E402
+from app.models import booking, event, event_daily_stats, outbox, seat, seat_version, user  # noqa: E402,F401  (every table)
+from app.models.event import Event  # noqa: E402
+from app.services import inventory_gate, seat_index, waiting_room  # noqa: E402
+
+NOW = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+# SQLite only auto-assigns ids for "INTEGER PRIMARY KEY"; the models use BIGINT
+# ids (Postgres), so render them as INTEGER for the SQLite test databases.
+@compiles(BigInteger, "sqlite")
+def _bigint_as_integer_on_sqlite(type_, compiler, **kw):
+    return "INTEGER"
+
+
+@pytest.fixture(autouse=True)
+def _fresh_process_caches():
+    # The seat index and the local cache tier (principals, versions) are process-global
+    # and keyed by row ids; every test gets a new DB.
+    seat_index._indexes.clear()
+    with cache._local_lock:
+        cache._local.clear()
+    for tier in cache._tiers:
+        tier.clear()
+    yield
+
+
+@pytest.fixture()
+def session_factory():
+    """A sessionmaker on a fresh SQLite file with the full schema (threads may share it)."""
+    fd, path = tempfile.mkstemp(prefix="evently_test_", suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", future=True, connect_args={"timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+@pytest.fixture()
+def session(session_factory):
+    s = session_factory()
+    try:
+        yield s
+    finally:
+        s.close()
+
+
+@pytest.fixture()
+def make_event(session_factory):
+    """
+    make_event(db=None, **overrides) inserts one event row (id 1, capacity 10, active,
+    starting and ending at NOW unless overridden) and returns its id. With <db> the
+    insert joins that session's transaction and the caller commits; without it the
+    row is committed on its own connection.
+    """
+    def make(db=None, **overrides):
+        row = dict(id=1, name="E", venue="V", start_time=NOW, end_time=NOW,
+                   capacity=10, booked_count=0, status="active")
+        row.update(overrides)
+        if db is not None:
+            db.execute(insert(Event), [row])
+        else:
+            with session_factory.kw["bind"].begin() as conn:
+                conn.execute(insert(Event), [row])
+        return row["id"]
+    return make
+
+
+@pytest.fixture()
+def redis_client(monkeypatch):
+    """An in-memory Redis (fakeredis, Lua via lupa) behind cache._get_client()."""
+    fakeredis = pytest.importorskip("fakeredis")
+    r = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(cache, "breaker", cache.CircuitBreaker(threshold=3))
+    monkeypatch.setattr(cache, "_client", r)
+    monkeypatch.setattr(waiting_room, "_scripts", {})
+    monkeypatch.setattr(inventory_gate, "_scripts", {})
+    return r
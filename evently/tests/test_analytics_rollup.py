@@ -0,0 +1,33 @@
+import pytest
+from datetime import datetime, timezone
+
+from app.services.analytics_service import build_summary
+from app.services.booking_service import cancel_booking, create_booking
+
+@pytest.fixture()
+def session(session, make_event):
+    for i in (1, 2, 3):
+        make_event(id=i, name=f"E{i}", status="active" if i < 3 else "inactive")
+    return session
+
+def test_summary_reads_rollup_written_by_booking_path(session):
+    a = create_booking(session, user_id=1, event_id=1, qty=3, idempotency_key=None)
+    create_booking(session, user_id=2, event_id=1, qty=2, idempotency_key=None)
+    create_booking(session, user_id=3, event_id=2, qty=1, idempotency_key=None)
+    cancel_booking(session, a.id, user_id=1, is_admin=False)
+
+    summary = build_summary(session)
+    today = summary["timeseries_7d"]["bookings"][-1]
+    assert today == {"date": datetime.now(timezone.utc).date().isoformat(), "count": 3}
+    assert summary["timeseries_7d"]["cancellations"][-1]["count"] == 1
+    assert summary["totals"] == {"events": 3, "active_events": 2, "capacity": 30, "booked": 3,
+                                 "utilization_pct": 10.0}
+    assert [e["id"] for e in summary["top_events"]] == [1, 2, 3]
+
+def test_summary_flags_the_truncated_event_table(session, monkeypatch):
+    from app.services import analytics_service
+    monkeypatch.setattr(analytics_service, "EVENT_ROWS", 2)
+    summary = build_summary(session)
+    assert [e["id"] for e in summary["events"]] == [1, 2]
+    assert summary["events_total"] == 3 and summary["events_truncated"] is True
+    assert [e["id"] for e in analytics_service.event_rows(session, 2, 2)] == [3]
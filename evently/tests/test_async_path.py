@@ -0,0 +1,55 @@
+import asyncio, threading, pytest
+
+from app.api.deps import Principal
+from app.api.routes.bookings import _book, _cancel
+from app.core import cache
+from app.core.config import settings
+from app.models.event import Event
+from app.schemas.booking import BookingCreate
+from app.services import inventory_gate
+
+pytest.importorskip("aiosqlite")
+
+@pytest.fixture()
+def session(session, make_event):
+    make_event(capacity=5)
+    return session
+
+@pytest.fixture()
+def socket_threads(redis_client, monkeypatch):
+    """Route the fake Redis through the breaker connection and record which thread reads replies."""
+    threads = []
+    class Probe:
+        def read_response(self, *args, **kwargs):
+            threads.append(threading.get_ident())
+            return super().read_response(*args, **kwargs)
+    pool = redis_client.connection_pool
+    pool.connection_class = type("BreakerConnection", (cache._Tripwire, Probe, pool.connection_class), {})
+    monkeypatch.setattr(settings, "INVENTORY_GATE_ENABLED", True)
+    return threads
+
+def test_async_booking_round_trip_keeps_redis_off_the_loop(session, session_factory, redis_client, socket_threads):
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    url = str(session_factory.kw["bind"].url).replace("sqlite://", "sqlite+aiosqlite://", 1)
+    user = Principal(id=7, role="user")
+
+    async def scenario():
+        engine = create_async_engine(url)
+        try:
+            async with AsyncSession(engine, autoflush=False) as db:
+                loop_thread = threading.get_ident()
+                booked = await db.run_sync(_book, user, 1, BookingCreate(qty=2), "k1")
+                replay = await db.run_sync(_book, user, 1, BookingCreate(qty=2), "k1")
+                cancelled = await db.run_sync(_cancel, user, booked.id)
+            return loop_thread, booked, replay, cancelled
+        finally:
+            await engine.dispose()
+
+    loop_thread, booked, replay, cancelled = asyncio.run(scenario())
+    assert socket_threads and loop_thread not in socket_threads
+    assert (booked.status, booked.qty) == ("CONFIRMED", 2) and replay.id == booked.id
+    assert cancelled.status == "CANCELLED"
+    session.expire_all()
+    assert session.get(Event, 1).booked_count == 0
+    assert int(redis_client.get(inventory_gate._KEY.format(1))) == 5
@@ -0,0 +1,106 @@
+import threading, time
+
+from app.core import cache
+
+
+def _count(name, result):
+    return cache.CACHE_REQUESTS.labels(name, result)._value.get()
+
+def _race(n, fn):
+    start, out, errors = threading.Barrier(n), [], []
+    def run():
+        start.wait()
+        try:
+            out.append(fn())
+        except Exception as exc:
+            errors.append(exc)
+    threads = [threading.Thread(target=run) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out, errors
+
+def test_cold_miss_is_computed_once(redis_client):
+    calls = []
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"n": 1}
+
+    hits = _count("sf", "hit")
+    out, errors = _race(6, lambda: cache.get_or_compute("sf:k", compute, name="sf"))
+    assert not errors and out == [{"n": 1}] * 6 and len(calls) == 1
+    assert cache.get_or_compute("sf:k", compute, name="sf") == {"n": 1}
+    assert _count("sf", "hit") == hits + 1 and len(calls) == 1
+
+def test_stale_entry_is_served_while_one_caller_refreshes(redis_client):
+    cache.get_or_compute("swr:k", lambda: "old", soft_ttl=60, name="swr")
+    cache.mark_stale("swr:k")
+    redis_client.set("swr:k:lock", "someone else", ex=30)  # a refresh is already running
+
+    stale, misses = _count("swr", "stale"), _count("swr", "miss")
+    assert cache.get_or_compute("swr:k", lambda: "new", name="swr") == "old"
+    assert _count("swr", "stale") == stale + 1
+
+    redis_client.delete("swr:k:lock")
+    assert cache.get_or_compute("swr:k", lambda: "new", name="swr") == "new"
+    assert _count("swr", "miss") == misses + 1
+    assert cache.get_or_compute("swr:k", lambda: "newer", name="swr") == "new"
+
+def test_waiters_take_over_when_the_leader_fails(redis_client):
+    calls = []
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        if len(calls) == 1:
+            raise RuntimeError("db down")
+        return "ok"
+
+    began = time.monotonic()
+    out, errors = _race(4, lambda: cache.get_or_compute("fail:k", compute, wait_seconds=2.0, name="fail"))
+    assert len(errors) == 1 and out == ["ok"] * 3 and len(calls) == 2
+    assert time.monotonic() - began < 1.0
+
+def _wait_for(cond, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return cond()
+
+def test_invalidation_reaches_other_workers_local_tier(redis_client):
+    cache.start_listener()
+    try:
+        assert _wait_for(lambda: redis_client.pubsub_numsub(cache._INVALIDATE_CHANNEL)[0][1] == 1)
+        cache.set_local("inv:a", b"1", 60)
+        cache.set_local("inv:b", b"2", 60)
+
+        # what this worker sends...
+        ps = redis_client.pubsub(ignore_subscribe_messages=True)
+        ps.subscribe(cache._INVALIDATE_CHANNEL)
+        cache.invalidate("inv:a")
+        assert cache.get_local("inv:a") is None
+        sent = [ps.get_message(timeout=0.1) for _ in range(3)]
+        assert [m["data"] for m in sent if m] == ["inv:a"]
+        ps.close()
+
+        # ...and what it does when another worker sends it
+        redis_client.publish(cache._INVALIDATE_CHANNEL, "inv:b")
+        assert _wait_for(lambda: cache.get_local("inv:b") is None)
+    finally:
+        cache.stop_listener()
+        cache._listener.join(timeout=5)
+
+def test_bumps_missed_while_the_breaker_is_open_are_replayed(redis_client):
+    before = cache.version("ver:k")
+    for _ in range(cache.breaker.threshold):
+        cache.breaker.failure()
+
+    cache.bump("ver:k")
+    assert cache.version("ver:k") is None and "ver:k" in cache._unbumped
+    assert int(redis_client.get("ver:k")) == before
+
+    cache.breaker.success()
+    assert cache.version("other:k") is not None  # the first read back replays the bump
+    assert not cache._unbumped and int(redis_client.get("ver:k")) == before + 1
+    assert cache.version("ver:k") == before + 1
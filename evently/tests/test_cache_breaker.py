@@ -0,0 +1,43 @@
+from app.core import cache
+from app.core.cache import CircuitBreaker
+
+
+def test_breaker_opens_backs_off_and_closes(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: clock[0])
+    b = CircuitBreaker(threshold=3, base_delay=1.0, max_delay=4.0)
+
+    for _ in range(2):
+        b.failure()
+    assert b.state == b.CLOSED and b.allow()
+    b.failure()
+    assert b.state == b.OPEN and not b.allow()
+
+    # one probe after the backoff; a failed probe doubles the wait
+    clock[0] += 1.0
+    assert b.allow() and b.state == b.HALF_OPEN
+    assert not b.allow()
+    b.failure()
+    assert b.state == b.OPEN
+    clock[0] += 1.5
+    assert not b.allow()
+    clock[0] += 0.5
+    assert b.allow()
+    b.failure()
+    clock[0] += 4.0  # capped at max_delay
+    assert b.allow()
+
+    b.success()
+    assert b.state == b.CLOSED and b.failures == 0 and b.trips == 0 and b.allow()
+
+
+def test_unreachable_redis_short_circuits(monkeypatch):
+    b = CircuitBreaker(threshold=2, base_delay=60.0)
+    monkeypatch.setattr(cache, "breaker", b)
+    monkeypatch.setattr(cache, "_client", None)
+    monkeypatch.setattr(cache, "_REDIS_URL", "redis://127.0.0.1:1/0")
+
+    assert cache.get_json("k") is None  # fails open
+    cache.set_json("k", 1)
+    assert b.state == b.OPEN
+    assert cache._get_client() is None  # no network until the backoff expires
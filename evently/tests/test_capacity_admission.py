@@ -0,0 +1,62 @@
+import threading
+from fastapi import HTTPException
+
+from app.models.event import Event
+from app.models.booking import Booking
+from app.models.seat import Seat
+from app.services import booking_service
+
+def test_concurrent_capacity_bookings_never_oversell(session_factory, make_event):
+    # no seat map laid out: the capacity-only flow
+    capacity, buyers = 7, 40
+    make_event(capacity=capacity)
+
+    results, start = [], threading.Barrier(buyers)
+    def buy(i):
+        with session_factory() as s:
+            start.wait()
+            try:
+                bk = booking_service.create_booking(s, user_id=i + 1, event_id=1, qty=1,
+                                                    idempotency_key=None, allow_waitlist=(i % 2 == 0))
+                results.append(bk.status)
+            except HTTPException as e:
+                results.append(e.status_code)
+
+    threads = [threading.Thread(target=buy, args=(i,)) for i in range(buyers)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    with session_factory() as s:
+        ev = s.get(Event, 1)
+        confirmed = s.query(Booking).filter(Booking.status == "CONFIRMED").count()
+        assert ev.booked_count == confirmed == capacity
+        assert s.query(Seat).count() == 0
+    assert results.count("CONFIRMED") == capacity
+    assert results.count("WAITLISTED") + results.count(409) == buyers - capacity
+
+def test_admission_rejects_inactive_event(session_factory, make_event):
+    with session_factory() as s:
+        make_event(s, capacity=5, status="inactive")
+        assert booking_service._admit_capacity(s, 1, 1) is False
+        s.rollback()
+
+def test_seatmap_layout_seats_earlier_bookings_and_takes_over(session_factory, make_event):
+    make_event(capacity=12)
+    with session_factory() as s:
+        first = booking_service.create_booking(s, user_id=1, event_id=1, qty=3, idempotency_key=None)
+        second = booking_service.create_booking(s, user_id=2, event_id=1, qty=2, idempotency_key=None)
+        assert first.seat_labels == second.seat_labels == []
+
+        assert booking_service.materialize_seatmap(s, 1) is True
+        assert booking_service.materialize_seatmap(s, 1) is False
+        assert s.get(Event, 1).seatmap_ready
+        labels = {bid: [st.label for st in s.query(Seat).filter(Seat.reserved_booking_id == bid).order_by(Seat.id)]
+                  for bid in (first.id, second.id)}
+        assert labels == {first.id: ["A1", "A2", "A3"], second.id: ["A4", "A5"]}
+
+        # a capacity-flow admission that lost the race retries on the map
+        assert booking_service._admit_capacity(s, 1, 1, seatless=True) is False
+        s.rollback()
+        third = booking_service.create_booking(s, user_id=3, event_id=1, qty=2, idempotency_key=None)
+        assert third.seat_labels == ["A6", "A7"]
+        assert s.query(Seat).count() == 12 and s.get(Event, 1).booked_count == 7
@@ -59,6 +59,8 @@ def test_booking_flow(test_db):
     })
     assert r.status_code == 200, r.text
     eid = r.json()["id"]
+    # the seat map is laid out by a background task once the response is sent
+    assert c.get(f"/events/{eid}").json()["seatmap_ready"] is True
 
     # book 1 with idempotency
     r1 = c.post(f"/events/{eid}/book", headers={"Authorization": f"Bearer {user_tok}", "Idempotency-Key":"abc-1"}, json={"qty":1})
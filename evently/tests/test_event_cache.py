@@ -0,0 +1,75 @@
+import pytest
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from sqlalchemy import event as sa_event
+
+from app.core import cache
+from app.core.config import settings
+from app.db import get_db
+from app.main import app
+from app.services import event_cache
+from app.services.booking_service import create_booking
+
+
+def test_list_key_is_normalized():
+    a = event_cache.list_key({"page": 1, "page_size": 10, "q": None, "sort": "name",
+                              "date_from": datetime(2030, 1, 1, tzinfo=timezone.utc)})
+    b = event_cache.list_key({"date_from": datetime(2030, 1, 1, tzinfo=timezone.utc), "sort": "name",
+                              "page_size": 10, "page": 1})
+    assert a == b
+    assert a != event_cache.list_key({"page": 2, "page_size": 10, "sort": "name",
+                                      "date_from": datetime(2030, 1, 1, tzinfo=timezone.utc)})
+
+
+@pytest.fixture()
+def client(session_factory, session, make_event, redis_client, monkeypatch):
+    for i in (1, 2):
+        make_event(id=i, name=f"E{i}", capacity=5)
+    monkeypatch.setattr(event_cache.time, "time", lambda: 1000.0)
+    def _get_db():
+        with session_factory() as db:
+            yield db
+    app.dependency_overrides[get_db] = _get_db
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+@pytest.fixture()
+def statements(session_factory):
+    seen = []
+    listener = lambda conn, cur, stmt, *a: seen.append(stmt)
+    engine = session_factory.kw["bind"]
+    sa_event.listen(engine, "before_cursor_execute", listener)
+    yield seen
+    sa_event.remove(engine, "before_cursor_execute", listener)
+
+@pytest.mark.parametrize("path", ["/events/1", "/events?page=1"])
+def test_hits_and_revalidations_skip_the_database(client, statements, path):
+    first = client.get(path)
+    assert first.status_code == 200 and first.headers["ETag"]
+    assert statements
+    statements.clear()
+
+    cache._local.clear()  # the Redis tier, not just this worker's copy
+    again = client.get(path)
+    assert again.status_code == 200 and again.content == first.content
+    assert client.get(path, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+    assert statements == []
+
+def test_bookings_leave_lists_to_the_availability_window(client, session, monkeypatch):
+    detail, listing = client.get("/events/1").headers["ETag"], client.get("/events").headers["ETag"]
+
+    create_booking(session, user_id=1, event_id=1, qty=2, idempotency_key=None)
+    fresh = client.get("/events/1")
+    assert fresh.headers["ETag"] != detail and fresh.json()["booked_count"] == 2
+    stale = client.get("/events", headers={"If-None-Match": listing})
+    assert stale.status_code == 304
+
+    monkeypatch.setattr(event_cache.time, "time", lambda: 1000.0 + settings.EVENT_LIST_AVAILABILITY_SECONDS)
+    moved = client.get("/events")
+    assert moved.headers["ETag"] != listing and moved.json()["items"][0]["booked_count"] == 2
+    listing = moved.headers["ETag"]
+
+    event_cache.touch(2, catalog=True)  # an admin write
+    assert client.get("/events").headers["ETag"] != listing
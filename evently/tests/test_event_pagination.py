@@ -0,0 +1,53 @@
+import pytest
+from datetime import timedelta
+from fastapi import HTTPException
+
+from app.api.routes.events import _list_events
+from app.services import event_search
+
+from conftest import NOW
+
+@pytest.fixture()
+def session(session, make_event):
+    # duplicate sort keys on purpose: id must break ties
+    for i in range(1, 48):
+        make_event(id=i, name=f"Event {i % 7}", start_time=NOW + timedelta(hours=i % 5), booked_count=i % 4)
+    return session
+
+def _list(s, **kw):
+    args = dict(page=1, page_size=10, q=None, venue=None, status=None, date_from=None, date_to=None,
+                sort="start_time", order="asc")
+    args.update(kw)
+    return _list_events(s, **args)
+
+@pytest.mark.parametrize("sort", ["start_time", "name", "utilization"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_cursor_pages_match_offset_order(session, sort, order):
+    expected = [e.id for e in _list(session, page_size=100, sort=sort, order=order)["items"]]
+    seen, cursor = [], None
+    while True:
+        res = _list(session, sort=sort, order=order, cursor=cursor)
+        if cursor:
+            assert res["meta"]["page"] is None and res["meta"]["total"] is None
+        seen += [e.id for e in res["items"]]
+        cursor = res["meta"]["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected
+
+def test_page_mode_keeps_total_and_rejects_foreign_cursor(session):
+    meta = _list(session, page=2)["meta"]
+    assert (meta["page"], meta["total"]) == (2, 47)
+    assert meta["next_cursor"]
+    with pytest.raises(HTTPException) as exc:
+        _list(session, sort="name", cursor=meta["next_cursor"])
+    assert exc.value.status_code == 400
+
+def test_search_ranks_name_hits_and_suggests_by_prefix(session, make_event):
+    make_event(id=100, name="Jazz Night", venue="Blue Hall", capacity=5)
+    make_event(id=101, name="Rock 100%", venue="Jazz Club", capacity=5)
+    make_event(id=102, name="Late jazz", venue="Cellar", capacity=5)
+    ids = [e.id for e in _list(session, q="jazz", sort="relevance")["items"]]
+    assert ids == [100, 102, 101]  # name prefix, name substring, venue only
+    assert [e.id for e in _list(session, q="100%")["items"]] == [101]  # % is literal
+    assert [e.id for e in event_search.suggest(session, "ja")] == [100]
@@ -0,0 +1,67 @@
+import pytest
+from datetime import timedelta
+from fastapi import HTTPException
+from sqlalchemy import update
+
+from app.models.seat import Seat
+from app.services import seat_index
+from app.services.booking_service import _utcnow, create_booking, materialize_seatmap
+from app.services.hold_service import create_hold, release_expired_holds, release_hold
+
+@pytest.fixture()
+def session(session, make_event):
+    make_event(capacity=4)
+    materialize_seatmap(session, 1)  # A1..A4
+    return session
+
+def _hold(s, user_id, qty):
+    return create_hold(s, user_id=user_id, event_id=1, qty=qty, seat_ids=None, minutes=5)
+
+def _version(s):
+    v = seat_index.head(s, 1).version
+    s.rollback()
+    return v
+
+def test_hold_converts_into_booking(session):
+    hold = _hold(session, 1, 2)
+    assert hold["seat_labels"] == ["A1", "A2"]
+    with pytest.raises(HTTPException):
+        create_booking(session, user_id=2, event_id=1, qty=1, idempotency_key=None, seat_ids=[hold["seat_ids"][0]])
+
+    bk = create_booking(session, user_id=1, event_id=1, qty=2, idempotency_key=None, hold_token=hold["token"])
+    assert bk.status == "CONFIRMED" and sorted(bk.seat_labels) == ["A1", "A2"]
+    assert session.query(Seat).filter(Seat.hold_token.is_not(None)).count() == 0
+
+def test_hold_size_is_capped_per_user_and_event(session, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.SEAT_HOLD_MAX_SEATS", 3)
+    _hold(session, 1, 2)
+    with pytest.raises(HTTPException) as e:
+        _hold(session, 1, 2)
+    assert e.value.status_code == 409
+    _hold(session, 2, 2)  # another user has their own allowance
+
+def test_expired_hold_is_swept_and_promotes_the_waitlist(session):
+    _hold(session, 1, 4)
+    waiter = create_booking(session, user_id=2, event_id=1, qty=2, idempotency_key=None, allow_waitlist=True)
+    assert waiter.status == "WAITLISTED"
+
+    session.execute(update(Seat).values(held_until=_utcnow() - timedelta(seconds=1)))
+    session.commit()
+    assert release_expired_holds(session, batch_size=3) == 4  # two batches
+    session.refresh(waiter)
+    assert waiter.status == "CONFIRMED"
+    assert session.query(Seat).filter(Seat.held_by.is_not(None)).count() == 0
+
+def test_release_is_owner_only_and_promotes(session):
+    hold = _hold(session, 1, 4)
+    waiter = create_booking(session, user_id=2, event_id=1, qty=1, idempotency_key=None, allow_waitlist=True)
+
+    before = _version(session)
+    assert release_hold(session, hold["token"], user_id=2) == 0
+    assert _version(session) == before  # no event-row write for someone else's token
+    assert session.query(Seat).filter(Seat.hold_token == hold["token"]).count() == 4
+
+    assert release_hold(session, hold["token"], user_id=1) == 4
+    session.refresh(waiter)
+    assert waiter.status == "CONFIRMED"
+    assert release_hold(session, hold["token"], user_id=1) == 0
@@ -0,0 +1,108 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.models.event import Event
+from app.models.booking import Booking
+from app.services import booking_service, inventory_gate
+
+KEY = inventory_gate._KEY.format(1)
+
+@pytest.fixture()
+def gate(redis_client, monkeypatch):
+    monkeypatch.setattr(settings, "INVENTORY_GATE_ENABLED", True)
+    return redis_client
+
+@pytest.fixture()
+def session(session, make_event):
+    make_event(capacity=5)
+    make_event(id=2, name="F", capacity=5, status="inactive")
+    # the partial unique index from migration 0002 (not declared on the model)
+    session.execute(text("CREATE UNIQUE INDEX uq_bookings_idem_nonnull ON bookings (idempotency_key) "
+                         "WHERE idempotency_key IS NOT NULL"))
+    session.commit()
+    return session
+
+def test_acquire_and_adjust_scripts(gate):
+    assert inventory_gate.try_acquire(1, 2) is None  # no counter: no opinion
+    inventory_gate.adjust(1, 3)
+    assert gate.get(KEY) is None  # adjust never creates a counter
+
+    gate.set(KEY, 3)
+    assert inventory_gate.try_acquire(1, 2) is True and gate.get(KEY) == "1"
+    assert inventory_gate.try_acquire(1, 2) is False and gate.get(KEY) == "1"  # all-or-nothing
+    inventory_gate.release(1, 2)
+    assert gate.get(KEY) == "3"
+
+def test_prime_never_overwrites_a_live_counter(gate, session):
+    inventory_gate.prime(session, 1)
+    assert gate.get(KEY) == "5" and gate.ttl(KEY) > 0
+    assert inventory_gate.try_acquire(1, 4)
+    inventory_gate.prime(session, 1)  # a racing request primes late
+    assert gate.get(KEY) == "1"
+    inventory_gate.prime(session, 2)
+    assert gate.get(inventory_gate._KEY.format(2)) is None  # inactive events are not gated
+
+def test_failed_and_waitlisted_bookings_give_inventory_back(gate, session):
+    gate.set(KEY, 9)  # over-estimates: the DB has 5
+    with pytest.raises(HTTPException):
+        booking_service.create_booking(session, user_id=1, event_id=1, qty=6, idempotency_key=None)
+    assert gate.get(KEY) == "9"
+    bk = booking_service.create_booking(session, user_id=1, event_id=1, qty=6, idempotency_key=None,
+                                        allow_waitlist=True)
+    assert bk.status == "WAITLISTED" and gate.get(KEY) == "9"
+
+def test_idempotent_replay_race_releases_its_acquire(gate, session, monkeypatch):
+    gate.set(KEY, 5)
+    first = booking_service.create_booking(session, user_id=1, event_id=1, qty=2, idempotency_key="k")
+    assert gate.get(KEY) == "3"
+
+    # a concurrent retry that missed the first commit at the up-front lookup
+    real, calls = booking_service._find_idempotent, []
+    def racing(*a):
+        calls.append(a)
+        return None if len(calls) == 1 else real(*a)
+    monkeypatch.setattr(booking_service, "_find_idempotent", racing)
+    again = booking_service.create_booking(session, user_id=1, event_id=1, qty=2, idempotency_key="k")
+    assert again.id == first.id
+    assert gate.get(KEY) == "3"
+    assert session.query(Booking).count() == 1
+
+def test_sold_out_answers_for_missing_and_inactive_events(gate, session):
+    for event_id, code in ((2, 409), (99, 404)):
+        gate.set(inventory_gate._KEY.format(event_id), 0)
+        with pytest.raises(HTTPException) as e:
+            booking_service.create_booking(session, user_id=1, event_id=event_id, qty=1, idempotency_key=None,
+                                           allow_waitlist=True)
+        assert e.value.status_code == code
+    assert session.query(Booking).count() == 0
+
+def test_one_reconcile_per_interval(gate):
+    assert inventory_gate._reconcile_turn()
+    assert not inventory_gate._reconcile_turn()
+
+def test_reconcile_corrects_live_counters_only(gate, session):
+    gate.set(KEY, 9, ex=60)  # drifted: the DB has 5 left
+    assert inventory_gate.reconcile(session) == 1
+    assert gate.get(KEY) == "5" and 0 < gate.ttl(KEY) <= 60  # TTL kept, not refreshed
+    assert gate.get(inventory_gate._KEY.format(2)) is None  # inactive, and never primed
+
+def test_reconcile_never_overwrites_a_concurrent_update(gate, session, monkeypatch):
+    session.query(Event).filter(Event.id == 1).update({"booked_count": 3})
+    session.commit()
+    gate.set(KEY, 2, ex=60)
+
+    class CancelAfterSnapshot:  # a cancel commits and releases its 3 seats right after the DB read
+        def __init__(self, q):
+            self.q = q
+        def filter(self, *a):
+            return CancelAfterSnapshot(self.q.filter(*a))
+        def all(self):
+            rows = self.q.all()
+            gate.incrby(KEY, 3)
+            return rows
+    real = session.query
+    monkeypatch.setattr(session, "query", lambda *a: CancelAfterSnapshot(real(*a)) if len(a) > 1 else real(*a))
+    assert inventory_gate.reconcile(session) == 0
+    assert gate.get(KEY) == "5"  # a blind SET would write back 2 and answer "sold out" wrongly
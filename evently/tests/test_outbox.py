@@ -0,0 +1,71 @@
+import pytest
+from datetime import timedelta
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.models.booking import Booking
+from app.models.event_daily_stats import EventDailyStats
+from app.models.outbox import OutboxMessage
+from app.services import outbox
+from app.services.booking_service import cancel_booking
+
+from conftest import NOW
+
+@pytest.fixture()
+def factory(session_factory, make_event, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_ENABLED", True)
+    with session_factory.kw["bind"].begin() as conn:
+        make_event(conn, capacity=2, booked_count=2, waitlisted_count=1, waitlisted_qty=2)
+        conn.execute(insert(Booking), [
+            dict(id=1, user_id=1, event_id=1, qty=2, status="CONFIRMED", created_at=NOW),
+            dict(id=2, user_id=2, event_id=1, qty=2, status="WAITLISTED", created_at=NOW + timedelta(seconds=1)),
+        ])
+    return session_factory
+
+def _statuses(s):
+    return [b.status for b in s.query(Booking).order_by(Booking.id)]
+
+def _stats(s):
+    return [(r.bookings, r.cancellations, r.seats_booked, r.seats_released) for r in s.query(EventDailyStats)]
+
+def test_cancel_defers_promotion_and_rollup_to_worker(factory):
+    with factory() as s:
+        cancel_booking(s, 1, user_id=1, is_admin=False)
+        # the cancel committed with its outbox row; nothing downstream ran yet
+        assert _statuses(s) == ["CANCELLED", "WAITLISTED"]
+        assert _stats(s) == []
+        assert s.query(OutboxMessage).count() == 1
+
+    # first batch: the cancel (promotes the waiter, which writes its own message)
+    assert outbox.drain(factory, 100) == 1
+    # second batch: the promotion's rollup and notification
+    assert outbox.drain(factory, 100) == 1
+    assert outbox.drain(factory, 100) == 0
+
+    with factory() as s:
+        assert _statuses(s) == ["CANCELLED", "CONFIRMED"]
+        assert _stats(s) == [(1, 1, 2, 2)]
+        assert outbox.lag_seconds(s) == 0.0
+
+def test_failed_batch_is_redelivered_and_rolled_up_once(factory, monkeypatch):
+    with factory() as s:
+        cancel_booking(s, 1, user_id=1, is_admin=False)
+
+    def boom(db, notify):
+        raise RuntimeError("notification hook down")
+    real = outbox._notify
+    monkeypatch.setattr(outbox, "_notify", boom)
+    with pytest.raises(RuntimeError):
+        outbox.drain(factory, 100)
+    with factory() as s:
+        # the claim rolled back: the message is still there, nothing counted
+        assert s.query(OutboxMessage).count() == 2  # promotion already ran and queued its own
+        assert _stats(s) == []
+
+    monkeypatch.setattr(outbox, "_notify", real)
+    while outbox.drain(factory, 100):
+        pass
+    with factory() as s:
+        assert _statuses(s) == ["CANCELLED", "CONFIRMED"]
+        assert _stats(s) == [(1, 1, 2, 2)]
+        assert s.query(OutboxMessage).count() == 0
@@ -0,0 +1,143 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.main import app
+from app.db import get_db
+from app.models.user import User
+from app.core.security import create_access_token
+
+@pytest.fixture()
+def client(session_factory):
+    SessionLocal = session_factory
+    engine = SessionLocal.kw["bind"]
+    user_selects = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cur, stmt, *a: user_selects.append(stmt) if "FROM users" in stmt else None)
+
+    def _get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+    app.dependency_overrides[get_db] = _get_db
+    with SessionLocal() as s:
+        s.add_all([User(id=1, name="U", email="u@ex.com", password_hash="x", role="user"),
+                   User(id=2, name="A", email="a@ex.com", password_hash="x", role="admin")])
+        s.commit()
+    try:
+        yield TestClient(app), user_selects
+    finally:
+        app.dependency_overrides.clear()
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+def test_role_claims_skip_user_lookups_until_revoked(client):
+    c, user_selects = client
+    user = _auth(create_access_token("1", role="user", token_version=0))
+    admin = _auth(create_access_token("2", role="admin", token_version=0))
+
+    assert c.get("/me/bookings", headers=user).status_code == 200
+    n = len(user_selects)
+    for _ in range(3):
+        assert c.get("/me/bookings", headers=user).status_code == 200
+    assert len(user_selects) == n  # served from the principal cache
+    assert c.get("/admin/users", headers=user).status_code == 403
+
+    r = c.patch("/admin/users/1/role", headers=admin, json={"role": "admin"})
+    assert r.status_code == 200
+    assert c.get("/me/bookings", headers=user).status_code == 401  # old role, old token_version
+    promoted = _auth(create_access_token("1", role="admin", token_version=1))
+    assert c.get("/admin/users", headers=promoted).status_code == 200
+
+def test_tokens_without_claims_fall_back_to_the_users_table(client):
+    c, _ = client
+    assert c.get("/admin/users", headers=_auth(create_access_token("2"))).status_code == 200
+    assert c.get("/admin/users", headers=_auth(create_access_token("1"))).status_code == 403
+    assert c.get("/me/bookings", headers=_auth(create_access_token("99"))).status_code == 401
+
+def test_login_rehashes_at_the_configured_cost(client):
+    from app.core.security import make_context
+    c, _ = client
+    r = c.post("/auth/signup", json={"name": "N", "email": "n@ex.com", "password": "secret-pw"})
+    assert r.status_code == 200, r.text
+    db = next(app.dependency_overrides[get_db]())
+    u = db.query(User).filter(User.email == "n@ex.com").one()
+    assert u.password_hash.startswith("$2b$04$")  # BCRYPT_ROUNDS from conftest
+    u.password_hash = make_context(5).hash("secret-pw")
+    db.commit()
+
+    r = c.post("/auth/login", json={"email": "n@ex.com", "password": "secret-pw"})
+    assert r.status_code == 200, r.text
+    db.expire_all()
+    assert db.query(User.password_hash).filter(User.email == "n@ex.com").scalar().startswith("$2b$04$")
+    assert c.post("/auth/login", json={"email": "n@ex.com", "password": "wrong"}).status_code == 401
+    db.close()
+
+def test_hashing_backpressure_is_a_fast_503(client, monkeypatch):
+    import threading
+    from app.core import hashing
+    c, _ = client
+    full = threading.BoundedSemaphore(1)
+    full.acquire()
+    monkeypatch.setattr(hashing, "_slots", full)
+    r = c.post("/auth/login", json={"email": "a@ex.com", "password": "x"})
+    assert r.status_code == 503 and r.headers["retry-after"] == "1"
+    admin = _auth(create_access_token("2", role="admin", token_version=0))
+    r = c.post("/admin/users", headers=admin, json={"name": "N", "email": "n@ex.com", "password": "secret-pw", "role": "user"})
+    assert r.status_code == 503 and r.headers["retry-after"] == "1"
+
+def test_admin_created_users_are_hashed_in_the_pool(client, monkeypatch):
+    from app.core import hashing
+    c, _ = client
+    calls = []
+    real = hashing._submit
+    async def submit(fn, *args):
+        calls.append(fn)
+        return await real(fn, *args)
+    monkeypatch.setattr(hashing, "_submit", submit)
+    admin = _auth(create_access_token("2", role="admin", token_version=0))
+    r = c.post("/admin/users", headers=admin, json={"name": "N", "email": "n@ex.com", "password": "secret-pw", "role": "user"})
+    assert r.status_code == 201, r.text
+    assert calls == [hashing._hash]
+    r = c.post("/auth/login", json={"email": "n@ex.com", "password": "secret-pw"})
+    assert r.status_code == 200, r.text
+
+def test_revoked_tokens_cannot_hold_seats_or_queue(client, make_event, redis_client):
+    from app.services.booking_service import materialize_seatmap
+    c, _ = client
+    make_event()
+    db = next(app.dependency_overrides[get_db]())
+    materialize_seatmap(db, 1)
+    db.close()
+    user = _auth(create_access_token("1", role="user", token_version=0))
+    admin = _auth(create_access_token("2", role="admin", token_version=0))
+
+    assert c.post("/events/1/queue", headers=user).status_code == 200
+    hold = c.post("/events/1/holds", headers=user, json={"qty": 1})
+    assert hold.status_code == 200, hold.text
+    assert c.get("/auth/me", headers=user).status_code == 200
+
+    assert c.patch("/admin/users/1/role", headers=admin, json={"role": "admin"}).status_code == 200  # revokes
+    assert c.post("/events/1/queue", headers=user).status_code == 401
+    assert c.post("/events/1/holds", headers=user, json={"qty": 1}).status_code == 401
+    assert c.delete(f"/holds/{hold.json()['token']}", headers=user).status_code == 401
+    assert c.get("/auth/me", headers=user).status_code == 401
+    assert c.post("/events/1/queue", headers=_auth(create_access_token("99"))).status_code == 401
+
+def test_principals_have_their_own_cache(client, monkeypatch):
+    from app.api import deps
+    from app.core import cache
+    c, user_selects = client
+    user = _auth(create_access_token("1", role="user", token_version=0))
+    assert c.get("/me/bookings", headers=user).status_code == 200
+    n = len(user_selects)
+    for i in range(2000):  # a flood of response bodies in the shared tier
+        cache.set_local(f"events:detail:{i}", b"{}", 60)
+    assert c.get("/me/bookings", headers=user).status_code == 200
+    assert len(user_selects) == n
+    deps.invalidate_principal(1)
+    assert c.get("/me/bookings", headers=user).status_code == 200
+    assert len(user_selects) == n + 1
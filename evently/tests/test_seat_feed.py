@@ -0,0 +1,59 @@
+import asyncio, json, pytest
+
+from app.core import cache
+from app.core.config import settings
+from app.services import seat_feed
+from app.services.booking_service import _utcnow, cancel_booking, create_booking, materialize_seatmap
+
+class _Recorder:
+    def __init__(self):
+        self.sent = []
+    def publish(self, channel, body):
+        self.sent.append((channel, json.loads(body)))
+
+@pytest.fixture()
+def session(session, make_event):
+    make_event(capacity=20)
+    return session
+
+def test_writes_publish_seat_deltas_after_commit(session, monkeypatch):
+    rec = _Recorder()
+    monkeypatch.setattr(cache, "_get_client", lambda: rec)
+    materialize_seatmap(session, 1)
+    bk = create_booking(session, user_id=1, event_id=1, qty=2, idempotency_key=None)
+    cancel_booking(session, bk.id, user_id=1, is_admin=False)
+
+    channels = {ch for ch, _ in rec.sent}
+    kinds = [(m["type"], m["version"], [state for _, state in m["changes"]], m["booked"]) for _, m in rec.sent]
+    assert channels == {"seats:1"}
+    assert kinds == [("layout", None, [], 0), ("seats", 2, [1, 1], 2), ("seats", 3, [0, 0], -2)]
+    assert [sid for sid, _ in rec.sent[1][1]["changes"]] == [sid for sid, _ in rec.sent[2][1]["changes"]]
+
+    hello = seat_feed.hello(session, 1, 2, _utcnow()).decode()
+    assert hello.startswith("event: hello\ndata: ")
+    body = json.loads(hello.split("data: ", 1)[1])
+    assert (body["version"], body["booked_count"], len(body["changes"])) == (3, 0, 2)
+
+def test_hub_fans_out_and_resyncs_slow_subscribers(monkeypatch):
+    monkeypatch.setattr(cache, "get_async_client", lambda: None)
+    monkeypatch.setattr(settings, "SEAT_FEED_QUEUE", 2)
+
+    async def scenario():
+        hub = seat_feed._Hub()
+        fast, slow, other = hub.subscribe(1), hub.subscribe(1), hub.subscribe(2)
+        for n in range(3):
+            hub.dispatch(1, seat_feed.frame("seats", b'{"n":%d}' % n))
+            if n < 2:
+                await fast.get()
+        frames = [fast.get_nowait()]
+        slow_frames = [slow.get_nowait()]
+        hub.unsubscribe(1, fast)
+        hub.unsubscribe(1, slow)
+        hub.unsubscribe(2, other)
+        hub.stop()
+        return frames, slow_frames, other.empty(), hub.subscribers
+
+    frames, slow_frames, other_empty, left = asyncio.run(scenario())
+    assert frames == [b'event: seats\ndata: {"n":2}\n\n']
+    assert slow_frames == [seat_feed.RESYNC]
+    assert other_empty and left == {}
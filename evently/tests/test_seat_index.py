@@ -0,0 +1,145 @@
+import base64, pytest
+from sqlalchemy import insert, update
+
+from app.models.seat import Seat
+from app.services import seat_index
+from app.services.booking_service import _utcnow, cancel_booking, create_booking, materialize_seatmap
+from app.services.hold_service import create_hold
+
+@pytest.fixture()
+def session(session, make_event):
+    make_event(capacity=20)
+    materialize_seatmap(session, 1)  # 10-per-row grid
+    return session
+
+def _assert_matches_db(s):
+    now = _utcnow()
+    idx = seat_index.get(s, 1)
+    from_db = {
+        seat.id: (seat.reserved, seat.held_until is not None)
+        for seat in s.query(Seat).filter(Seat.event_id == 1)
+    }
+    assert {d["id"]: (d["reserved"], d["held"]) for d in idx.seats(now)} == from_db
+    free = [sid for sid, (reserved, held) in sorted(from_db.items()) if not reserved and not held]
+    assert idx.first_free(3, now) == free[:3]
+    assert idx.free_count(now) == len(free)
+    s.rollback()
+
+def test_index_follows_bookings_holds_and_cancels(session):
+    bk = create_booking(session, user_id=1, event_id=1, qty=3, idempotency_key=None)
+    _assert_matches_db(session)
+    hold = create_hold(session, user_id=2, event_id=1, qty=2, seat_ids=None, minutes=5)
+    assert hold["seat_labels"] == ["A4", "A5"]
+    _assert_matches_db(session)
+    create_booking(session, user_id=3, event_id=1, qty=2, idempotency_key=None)
+    _assert_matches_db(session)
+    cancel_booking(session, bk.id, user_id=1, is_admin=False)
+    _assert_matches_db(session)
+    assert seat_index.get(session, 1).version == 5  # layout, book, hold, book, cancel
+
+def test_prefer_contiguous_takes_best_fitting_run(session):
+    create_booking(session, user_id=1, event_id=1, qty=1, idempotency_key=None)
+    # Row A: A2 A3 | A5..A10 free; row B: B1..B4 free
+    session.execute(update(Seat).where(Seat.label.in_(["A1", "A4", "B5", "B6", "B7", "B8", "B9", "B10"]))
+                    .values(reserved=True, version=seat_index.bump_version(session, 1)))
+    session.commit()
+    bk = create_booking(session, user_id=2, event_id=1, qty=4, idempotency_key=None, prefer_contiguous=True)
+    assert bk.seat_labels == ["B1", "B2", "B3", "B4"]
+    bk = create_booking(session, user_id=3, event_id=1, qty=2, idempotency_key=None, prefer_contiguous=True)
+    assert bk.seat_labels == ["A2", "A3"]
+
+def _bits(b64, n):
+    raw = base64.b64decode(b64)
+    return [raw[i // 8] >> (7 - i % 8) & 1 for i in range(n)]
+
+def test_compact_map_and_deltas(session):
+    bk = create_booking(session, user_id=1, event_id=1, qty=3, idempotency_key=None)
+    create_hold(session, user_id=2, event_id=1, qty=1, seat_ids=None, minutes=5)
+    full = seat_index.get(session, 1).compact(_utcnow())
+    first_id = session.query(Seat.id).filter(Seat.label == "A1").scalar()
+    assert full["rows"] == [{"row": "A", "col": 1, "n": 10, "id": first_id, "sep": ""},
+                            {"row": "B", "col": 1, "n": 10, "id": first_id + 10, "sep": ""}]
+    assert _bits(full["reserved"], 20) == [1, 1, 1] + [0] * 17
+    assert _bits(full["held"], 20) == [0, 0, 0, 1] + [0] * 16
+
+    cancel_booking(session, bk.id, user_id=1, is_admin=False)
+    delta = seat_index.changes(session, 1, full["version"], _utcnow())
+    assert delta["version"] == full["version"] + 1 and delta["layout_version"] == full["layout_version"]
+    assert delta["changes"] == [[first_id + i, 0] for i in range(3)]
+    assert seat_index.changes(session, 1, delta["version"], _utcnow())["changes"] == []
+
+def test_irregular_layout_is_indexed_per_segment(session, make_event):
+    # ids that do not rise in seat-map order and labels that are not row + col
+    make_event(session, id=2, name="F", capacity=4, seatmap_ready=True)
+    session.execute(insert(Seat), [
+        dict(id=904, event_id=2, label="Box 1", row_label="A", col_number=1, reserved=False),
+        dict(id=903, event_id=2, label="Box 2", row_label="A", col_number=2, reserved=True),
+        dict(id=902, event_id=2, label="B1", row_label="B", col_number=1, reserved=False),
+        dict(id=901, event_id=2, label="Standing", row_label=None, col_number=None, reserved=False),
+    ])
+    session.commit()
+    idx = seat_index.get(session, 2)
+    now = _utcnow()
+    assert idx.label(903) == "Box 2" and idx.label(902) == "B1" and idx.label(1) is None
+    assert idx.is_free(903, now) is False and idx.is_free(904, now) is True
+    by_id = {d["id"]: d for d in idx.seats(now)}
+    assert (by_id[903]["label"], by_id[903]["row_label"], by_id[903]["col_number"]) == ("Box 2", "A", 2)
+    assert by_id[901]["label"] == "Standing" and by_id[901]["col_number"] is None
+    assert {tuple(r.get("ids", ())) for r in idx.compact(now)["rows"]} >= {(904, 903)}
+
+def test_cold_index_is_built_once_for_concurrent_readers(session_factory, session, monkeypatch):
+    import threading
+    builds, real = [], seat_index._build
+    def counting(*a):
+        builds.append(a[1])
+        return real(*a)
+    monkeypatch.setattr(seat_index, "_build", counting)
+    seat_index._indexes.clear()
+
+    start, got = threading.Barrier(8), []
+    def read():
+        with session_factory() as s:
+            start.wait()
+            got.append(seat_index.get(s, 1))
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert builds == [1] and len({id(i) for i in got}) == 1
+
+def test_seat_writes_leave_the_event_row_alone(session):
+    from sqlalchemy import event as sa_event
+    statements = []
+    listener = lambda conn, cur, stmt, *a: statements.append(stmt)
+    sa_event.listen(session.bind, "before_cursor_execute", listener)
+    try:
+        create_hold(session, user_id=2, event_id=1, qty=2, seat_ids=None, minutes=5)
+    finally:
+        sa_event.remove(session.bind, "before_cursor_execute", listener)
+    assert not [s for s in statements if s.lstrip().upper().startswith("UPDATE EVENTS")]
+    assert any("seat_versions" in s for s in statements)
+
+def _first(statements, *needles):
+    return min(i for i, s in enumerate(statements) if all(n in s.upper() for n in needles))
+
+@pytest.mark.parametrize("path", ["hold", "skip_locked"])
+def test_unlocked_bookings_take_the_event_row_before_seat_versions(session, monkeypatch, path):
+    from sqlalchemy import event as sa_event
+    from app.core.config import settings
+    if path == "hold":
+        token = create_hold(session, user_id=2, event_id=1, qty=2, seat_ids=None, minutes=5)["token"]
+        book = lambda: create_booking(session, user_id=2, event_id=1, qty=2, idempotency_key=None, hold_token=token)
+    else:
+        monkeypatch.setattr(settings, "SEAT_ALLOCATION_MODE", "skip_locked")
+        book = lambda: create_booking(session, user_id=2, event_id=1, qty=2, idempotency_key=None)
+
+    statements = []
+    listener = lambda conn, cur, stmt, *a: statements.append(stmt)
+    sa_event.listen(session.bind, "before_cursor_execute", listener)
+    try:
+        assert book().status == "CONFIRMED"
+    finally:
+        sa_event.remove(session.bind, "before_cursor_execute", listener)
+    # the admission UPDATE is this path's event-row lock; every locked path takes that first too
+    assert _first(statements, "UPDATE EVENTS") < _first(statements, "INSERT INTO SEAT_VERSIONS")
@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import func
+
+from app.models.event import Event
+from app.models.seat import Seat
+from app.core.config import settings
+from app.services import seat_index, seat_layout
+from app.services.booking_service import _utcnow, create_booking
+
+from conftest import NOW
+
+@pytest.fixture()
+def db(session, make_event):
+    make_event(capacity=0)
+    return session
+
+def test_row_labels_continue_past_z():
+    assert [seat_layout.row_label(i) for i in (0, 25, 26, 27, 701, 702)] == ["A", "Z", "AA", "AB", "ZZ", "AAA"]
+    assert seat_layout.seat_at(26 * 50, 50) == ("AA", 1, "AA-1")
+
+def test_generate_grow_and_shrink_are_set_based(db):
+    assert seat_layout.generate(db, 1, 0, 1400, 50, "-", 1) == 1400  # 28 rows: A..Z, AA, AB
+    labels = [l for (l,) in db.query(Seat.label)]
+    assert len(set(labels)) == 1400 and "AB-50" in labels
+
+    # the last seat is taken, so shrinking removes the 10 before it instead
+    db.query(Seat).filter(Seat.label == "AB-50").update({"reserved": True})
+    assert seat_layout.shrink(db, 1, 10, NOW)
+    remaining = {l for (l,) in db.query(Seat.label)}
+    assert "AB-50" in remaining and "AB-49" not in remaining and "AB-40" not in remaining and "AB-39" in remaining
+
+    # growing skips the position that still holds AB-50
+    seat_layout.grow(db, 1, 1390, 1400, 50, "-", 2)
+    assert db.query(func.count(Seat.id)).scalar() == 1400
+    assert "AC-1" in {l for (l,) in db.query(Seat.label)}
+
+    assert not seat_layout.shrink(db, 1, 1400, NOW)  # one seat is reserved
+    db.rollback()
+
+@pytest.mark.parametrize("use_index", [True, False])
+def test_rows_past_z_are_allocated_after_z(db, monkeypatch, use_index):
+    monkeypatch.setattr(settings, "SEAT_INDEX_ENABLED", use_index)
+    seat_layout.generate(db, 1, 0, 56, 2, "-", 1)  # rows A..Z, AA, AB
+    db.query(Event).filter(Event.id == 1).update({"capacity": 56, "seatmap_ready": True})
+    db.query(Seat).filter(func.length(Seat.row_label) == 1, Seat.row_label != "Z").update({"reserved": True})
+    db.commit()
+
+    bk = create_booking(db, user_id=1, event_id=1, qty=4, idempotency_key=None)
+    assert bk.seat_labels == ["Z-1", "Z-2", "AA-1", "AA-2"]
+    if use_index:
+        labels = [s["label"] for s in seat_index.get(db, 1).seats(_utcnow())]
+        assert labels[-6:] == ["Z-1", "Z-2", "AA-1", "AA-2", "AB-1", "AB-2"]
+
+@pytest.mark.parametrize("laid_out, grown", [
+    ("capacity", ["C10", "D1", "D5"]),   # materialize_seatmap: 10 per row, "A1"
+    ("admin", ["H-4", "K-4", "L-1"]),    # POST /admin/events/{id}/seats/generate: 30 as 4 per row, "A-1"
+])
+def test_growing_capacity_continues_the_maps_own_layout(db, laid_out, grown):
+    from app.api.routes.admin import _sync_seats_to_capacity
+    from app.services.booking_service import materialize_seatmap
+    ev = db.get(Event, 1)
+    if laid_out == "capacity":
+        ev.capacity = 30
+        db.commit()
+        materialize_seatmap(db, 1)
+    else:
+        seat_layout.generate(db, 1, 0, 30, 4, "-", seat_index.bump_version(db, 1, layout=True))
+        ev.capacity, ev.seatmap_ready = 30, True
+        db.commit()
+
+    ev = db.get(Event, 1)
+    ev.capacity = 45
+    db.commit()
+    _sync_seats_to_capacity(db, ev)
+    seats = db.query(Seat.label, Seat.row_label, Seat.col_number).all()
+    assert len(seats) == 45 and len({(r, c) for _, r, c in seats}) == 45
+    labels = {l for l, _, _ in seats}
+    assert set(grown) <= labels and not any(("-" in l) != (laid_out == "admin") for l in labels)
@@ -0,0 +1,69 @@
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import func
+
+from app.core.config import Settings, settings
+from app.models.booking import Booking
+from app.models.event import Event
+from app.models.seat import Seat
+from app.services import booking_service
+from app.services.booking_service import create_booking, materialize_seatmap
+
+@pytest.fixture()
+def session(session, make_event):
+    make_event(capacity=6)
+    materialize_seatmap(session, 1)
+    return session
+
+@pytest.fixture()
+def locked_by_others(monkeypatch):
+    """
+    SQLite has no row locks: stand in for seats another transaction holds FOR
+    UPDATE by hiding them from SKIP LOCKED seat queries, as Postgres would.
+    """
+    locked = set()
+    real = booking_service._with_lock
+    def with_lock(query, db, skip_locked=False):
+        if skip_locked and query.column_descriptions[0]["entity"] is Seat:
+            query = query.filter(Seat.id.notin_(locked))
+        return real(query, db, skip_locked=skip_locked)
+    monkeypatch.setattr(booking_service, "_with_lock", with_lock)
+    monkeypatch.setattr(settings, "SEAT_ALLOCATION_MODE", "skip_locked")
+    return locked
+
+def _seat_ids(s, *labels):
+    return {sid for (sid,) in s.query(Seat.id).filter(Seat.label.in_(labels))}
+
+def test_unknown_mode_fails_at_startup(monkeypatch):
+    monkeypatch.setenv("SEAT_ALLOCATION_MODE", "skiplocked")
+    with pytest.raises(ValidationError):
+        Settings()
+
+def test_buyers_over_disjoint_seats_both_book(session, locked_by_others):
+    locked_by_others |= _seat_ids(session, "A1", "A2")  # a first buyer is mid-transaction on these
+    second = create_booking(session, user_id=2, event_id=1, qty=2, idempotency_key=None)
+    assert second.seat_labels == ["A3", "A4"]
+
+    locked_by_others.clear()  # ...and then books them
+    first = create_booking(session, user_id=1, event_id=1, qty=2, idempotency_key=None)
+    assert first.seat_labels == ["A1", "A2"]
+    assert session.get(Event, 1).booked_count == 4
+    assert session.query(func.count(Seat.id)).filter(Seat.reserved == True).scalar() == 4
+
+@pytest.mark.parametrize("waitlist", [False, True])
+def test_fully_locked_candidates_never_over_allocate(session, locked_by_others, waitlist):
+    create_booking(session, user_id=1, event_id=1, qty=2, idempotency_key=None)
+    locked_by_others |= {sid for (sid,) in session.query(Seat.id).filter(Seat.reserved == False)}
+
+    if waitlist:
+        bk = create_booking(session, user_id=2, event_id=1, qty=2, idempotency_key=None, allow_waitlist=True)
+        assert bk.status == "WAITLISTED"
+    else:
+        with pytest.raises(HTTPException) as e:
+            create_booking(session, user_id=2, event_id=1, qty=2, idempotency_key=None)
+        assert e.value.status_code == 409
+    session.expire_all()
+    assert session.get(Event, 1).booked_count == 2
+    assert session.query(func.count(Seat.id)).filter(Seat.reserved == True).scalar() == 2
+    assert session.query(func.count(Booking.id)).filter(Booking.status == "CONFIRMED").scalar() == 1
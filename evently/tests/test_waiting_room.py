@@ -0,0 +1,69 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api.deps import Principal
+from app.api.routes.bookings import _book
+from app.schemas.booking import BookingCreate
+from app.services import waiting_room
+
+def _elapse(r, seconds):
+    # the room admits floor(elapsed * rate) holders, measured on the Redis clock
+    cfg = waiting_room._keys(1)[0]
+    r.hset(cfg, "last", float(r.hget(cfg, "last")) - seconds)
+
+@pytest.fixture()
+def room(redis_client):
+    assert waiting_room.open_room(1, admit_per_second=2, admit_ttl_seconds=60)
+    return redis_client
+
+def test_join_advance_and_status(room):
+    tickets = [waiting_room.join(1, str(u)) for u in (1, 2, 3)]
+    assert [(t["state"], t["position"]) for t in tickets] == [("waiting", 1), ("waiting", 2), ("waiting", 3)]
+    assert tickets[2]["estimated_wait_seconds"] == 1.5
+
+    _elapse(room, 1)  # two admissions
+    first, third = waiting_room.poll(1, tickets[0]["token"]), waiting_room.poll(1, tickets[2]["token"])
+    assert first["state"] == "admitted" and first["admitted_until"] > 0
+    assert (third["state"], third["position"]) == ("waiting", 1)
+    assert waiting_room.poll(1, "nope")["state"] == "expired"
+
+    # admissions lapse after admit_ttl_seconds, ownership with them
+    room.zadd(waiting_room._keys(1)[2], {tickets[0]["token"]: 1})
+    assert waiting_room.poll(1, tickets[0]["token"])["state"] == "expired"
+    assert not room.hexists(waiting_room._keys(1)[4], tickets[0]["token"])
+
+def test_admitted_token_buys_once_and_only_for_its_owner(room):
+    token = waiting_room.join(1, "1")["token"]
+    with pytest.raises(HTTPException) as e:
+        waiting_room.claim(1, token, "1")  # still waiting
+    assert e.value.status_code == 403
+    _elapse(room, 1)
+
+    with pytest.raises(HTTPException):
+        waiting_room.require_admitted(1, token, "2")
+    with pytest.raises(HTTPException):
+        waiting_room.claim(1, token, "2")  # someone else's ticket
+    waiting_room.require_admitted(1, token, "1")  # checking does not spend it
+
+    expires = waiting_room.claim(1, token, "1")
+    assert expires > 0
+    with pytest.raises(HTTPException):
+        waiting_room.claim(1, token, "1")  # double spend
+
+    waiting_room.unclaim(1, token, "1", expires)
+    assert waiting_room.claim(1, token, "1") == expires
+
+def test_failed_booking_returns_the_admission(room, session):
+    token = waiting_room.join(1, "7")["token"]
+    _elapse(room, 1)
+    with pytest.raises(HTTPException) as e:
+        _book(session, Principal(id=7, role="user"), 1, BookingCreate(qty=1), None, token)
+    assert e.value.status_code == 404  # no such event in the DB
+    assert waiting_room.poll(1, token)["state"] == "admitted"
+
+def test_closed_room_and_unreachable_redis_fail_open(room, monkeypatch):
+    waiting_room.close_room(1)
+    assert waiting_room.claim(1, None, "1") is None
+    assert waiting_room.join(1, "1")["state"] == "open"
+    monkeypatch.setattr(waiting_room.cache, "_get_client", lambda: None)
+    assert waiting_room.claim(1, "t", "1") is None
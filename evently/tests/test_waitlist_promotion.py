@@ -0,0 +1,88 @@
+from datetime import timedelta
+from sqlalchemy import insert, update
+
+from app.models.event import Event
+from app.models.booking import Booking
+from app.models.seat import Seat
+from app.services.booking_service import (
+    _try_promote_waitlist, cancel_booking, create_booking, reconcile_waitlist_counts,
+)
+
+from conftest import NOW
+
+def _seed(s, make_event, capacity, booked, waiter_qtys, seats=0):
+    with s.bind.begin() as conn:
+        make_event(conn, capacity=capacity, booked_count=booked, seatmap_ready=bool(seats),
+                   waitlisted_count=len(waiter_qtys), waitlisted_qty=sum(waiter_qtys))
+        if waiter_qtys:
+            conn.execute(insert(Booking), [
+                dict(id=i + 1, user_id=i + 1, event_id=1, qty=q, status="WAITLISTED",
+                     created_at=NOW + timedelta(seconds=i))
+                for i, q in enumerate(waiter_qtys)
+            ])
+        if seats:
+            conn.execute(insert(Seat), [
+                dict(id=i + 1, event_id=1, label=f"A{i + 1}", row_label="A", col_number=i + 1, reserved=False)
+                for i in range(seats)
+            ])
+
+def _statuses(s):
+    return [b.status for b in s.query(Booking).order_by(Booking.id)]
+
+def test_capacity_promotion_admits_fifo_prefix_only(session, make_event):
+    _seed(session, make_event, capacity=5, booked=0, waiter_qtys=[2, 2, 3, 1])
+    _try_promote_waitlist(session, 1)
+    # 2+2 fit; the 3-seat waiter blocks the 1-seat waiter behind it
+    assert _statuses(session) == ["CONFIRMED", "CONFIRMED", "WAITLISTED", "WAITLISTED"]
+    ev = session.get(Event, 1)
+    assert (ev.booked_count, ev.waitlisted_count, ev.waitlisted_qty) == (4, 2, 4)
+
+def test_waitlist_counters_follow_writes_and_reconcile(session, make_event):
+    _seed(session, make_event, capacity=1, booked=1, waiter_qtys=[])
+    bk = create_booking(session, user_id=9, event_id=1, qty=2, idempotency_key=None, allow_waitlist=True)
+    assert bk.status == "WAITLISTED"
+    assert (session.get(Event, 1).waitlisted_count, session.get(Event, 1).waitlisted_qty) == (1, 2)
+    cancel_booking(session, bk.id, user_id=9, is_admin=False)
+    session.expire_all()
+    assert (session.get(Event, 1).waitlisted_count, session.get(Event, 1).waitlisted_qty) == (0, 0)
+    # drift (e.g. a manual fix in the DB) is repaired by the reconcile job
+    session.execute(update(Event).values(waitlisted_count=7, waitlisted_qty=9)); session.commit()
+    assert reconcile_waitlist_counts(session) == 1
+    session.expire_all()
+    assert (session.get(Event, 1).waitlisted_count, session.get(Event, 1).waitlisted_qty) == (0, 0)
+
+def test_seatmap_promotion_assigns_seats_in_bulk(session, make_event):
+    _seed(session, make_event, capacity=5, booked=0, waiter_qtys=[2, 3, 1], seats=5)
+    _try_promote_waitlist(session, 1)
+    assert _statuses(session) == ["CONFIRMED", "CONFIRMED", "WAITLISTED"]
+    owners = {st.label: st.reserved_booking_id for st in session.query(Seat).order_by(Seat.col_number)}
+    assert owners == {"A1": 1, "A2": 1, "A3": 2, "A4": 2, "A5": 2}
+    assert session.get(Event, 1).booked_count == 5
+
+def test_reconcile_rewrites_only_drifted_events(session, make_event):
+    _seed(session, make_event, capacity=1, booked=1, waiter_qtys=[2, 1])
+    make_event(session, id=2, name="F", capacity=1, waitlisted_count=0, waitlisted_qty=0)
+    session.execute(update(Event).where(Event.id == 2).values(waitlisted_count=4))
+    session.commit()
+
+    from sqlalchemy import event as sa_event
+    updates = []
+    listener = lambda conn, cur, stmt, params, *a: updates.append(params) if stmt.startswith("UPDATE events") else None
+    sa_event.listen(session.bind, "before_cursor_execute", listener)
+    try:
+        assert reconcile_waitlist_counts(session) == 1
+    finally:
+        sa_event.remove(session.bind, "before_cursor_execute", listener)
+    assert len(updates) == 1 and 2 in updates[0]  # event 1 was right and is left alone
+    session.expire_all()
+    assert (session.get(Event, 1).waitlisted_count, session.get(Event, 2).waitlisted_count) == (2, 0)
+
+def test_reconcile_job_runs_once_per_interval(session_factory, redis_client, monkeypatch):
+    from app import db as app_db
+    from app.services import booking_service
+    runs = []
+    monkeypatch.setattr(app_db, "SessionLocal", session_factory)
+    monkeypatch.setattr(booking_service, "reconcile_waitlist_counts", lambda db: runs.append(db))
+    for _ in range(3):  # three API workers on the same tick
+        booking_service.waitlist_reconcile_job()
+    assert len(runs) == 1